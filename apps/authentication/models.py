@@ -5,9 +5,12 @@ Fichier : apps/authentication/models.py
 """
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from apps.gestion_academique.models import Departement, Etudiant, Enseignant
+from apps.structure_pedagogique.models import Matiere
+
 
 class Profile(models.Model):
     """
@@ -116,4 +119,24 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     """Sauvegarde le profil quand le User est sauvegardé"""
-    instance.profile.save()
\ No newline at end of file
+    instance.profile.save()
+
+
+@receiver(post_save, sender=Etudiant)
+@receiver(post_delete, sender=Etudiant)
+@receiver(post_save, sender=Enseignant)
+@receiver(post_delete, sender=Enseignant)
+@receiver(post_save, sender=Departement)
+@receiver(post_delete, sender=Departement)
+@receiver(post_save, sender=Matiere)
+@receiver(post_delete, sender=Matiere)
+@receiver(m2m_changed, sender=Enseignant.departements.through)
+@receiver(m2m_changed, sender=Matiere.departements.through)
+def invalider_tableaux_de_bord(sender, **kwargs):
+    """Les compteurs de la page d'accueil ont changé : cache à recalculer"""
+    if kwargs.get('action', 'post_').startswith('pre_'):
+        return
+
+    from .services import TableauBordService
+
+    TableauBordService.invalider()
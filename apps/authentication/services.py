@@ -0,0 +1,96 @@
+# authentication/services.py
+"""
+MODULE 1 : Authentication - Services
+Compteurs des tableaux de bord de la page d'accueil, mis en cache par rôle
+et département (invalidés par les signaux des modèles comptés, voir models.py)
+"""
+from django.core.cache import cache
+from django.db.models import F, Func, Subquery
+
+from config.cache_utils import invalider, versions
+
+
+class TableauBordService:
+    """Compteurs affichés sur la page d'accueil de la direction et des chefs"""
+
+    PREFIXE_CLE = 'tableau_bord'
+
+    # Filet de sécurité si une écriture échappe aux signaux (update(), SQL direct)
+    DUREE_CACHE = 600
+
+    @staticmethod
+    def cle(role, departement_id=None):
+        """Clé de cache : 'tableau_bord:<génération>:admin' ou '...:chef_departement:<id>'"""
+        generation, = versions((TableauBordService.PREFIXE_CLE, None))
+        cle = f'{TableauBordService.PREFIXE_CLE}:{generation}:{role}'
+        if departement_id is not None:
+            cle += f':{departement_id}'
+        return cle
+
+    @staticmethod
+    def compteurs(profile):
+        """
+        Compteurs du tableau de bord du profil (cache, sinon une seule requête)
+
+        Returns:
+            dict: nb_etudiants, nb_enseignants, nb_matieres (+ nb_departements pour la direction),
+                  vide pour les autres rôles
+        """
+        if profile.is_admin():
+            cle = TableauBordService.cle('admin')
+        elif profile.is_chef_departement() and profile.departement_id:
+            cle = TableauBordService.cle('chef_departement', profile.departement_id)
+        else:
+            return {}
+
+        compteurs = cache.get(cle)
+        if compteurs is None:
+            compteurs = TableauBordService.calculer(profile)
+            cache.set(cle, compteurs, TableauBordService.DUREE_CACHE)
+        return compteurs
+
+    @staticmethod
+    def calculer(profile):
+        """
+        Calcule les compteurs en une requête : un COUNT(*) par table en
+        sous-requête scalaire, lus sur la ligne du profil
+        """
+        from apps.authentication.models import Profile
+        from apps.gestion_academique.models import Departement, Etudiant, Enseignant
+        from apps.structure_pedagogique.models import Matiere
+
+        etudiants = Etudiant.objects.all()
+        enseignants = Enseignant.objects.all()
+        matieres = Matiere.objects.all()
+        sous_requetes = {}
+
+        if profile.is_admin():
+            sous_requetes['nb_departements'] = TableauBordService.nombre(Departement.objects.all())
+        else:
+            etudiants = etudiants.filter(departement_id=profile.departement_id)
+            enseignants = enseignants.filter(departements=profile.departement_id)
+            matieres = matieres.filter(departements=profile.departement_id)
+
+        sous_requetes.update({
+            'nb_etudiants': TableauBordService.nombre(etudiants),
+            'nb_enseignants': TableauBordService.nombre(enseignants),
+            'nb_matieres': TableauBordService.nombre(matieres),
+        })
+
+        return Profile.objects.filter(pk=profile.pk).values(**sous_requetes).get()
+
+    @staticmethod
+    def nombre(queryset):
+        """Sous-requête scalaire SELECT COUNT(*) d'un QuerySet (sans GROUP BY)"""
+        return Subquery(
+            queryset.order_by().annotate(nombre=Func(F('pk'), function='COUNT')).values('nombre')
+        )
+
+    @staticmethod
+    def invalider():
+        """
+        Rend obsolètes les compteurs de la direction et de tous les départements,
+        et ceux des listes d'étudiants (config.stats_utils.compter_en_cache)
+        (nouvelle génération, sans requête : appelé à chaque écriture des modèles comptés)
+        """
+        invalider(TableauBordService.PREFIXE_CLE)
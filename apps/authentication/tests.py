@@ -1 +1,103 @@
 # authentication/tests.py
+"""
+MODULE 1 : Authentication - Tests
+"""
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.gestion_academique.models import AnneeAcademique, Departement, Enseignant, Etudiant, Niveau
+from apps.structure_pedagogique.models import Matiere, Semestre
+from .services import TableauBordService
+
+
+class TableauBordTests(TestCase):
+    """Compteurs de la page d'accueil de la direction et des chefs, en cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ntic = Departement.objects.create(code='NTIC', nom='NTIC')
+        cls.dl = Departement.objects.create(code='DL', nom='Développement Logiciel')
+        cls.niveau = Niveau.objects.create(code='L1', nom='Licence 1', ordre=1)
+        semestre = Semestre.objects.create(code='S1', nom='Semestre 1', ordre=1, niveau=cls.niveau)
+        cls.annee = AnneeAcademique.objects.create(
+            annee='2025-2026', date_debut=date(2025, 10, 1), date_fin=date(2026, 7, 31), est_active=True
+        )
+        enseignant = Enseignant.objects.create(
+            code='ENS-001', nom='Camara', prenom='Alpha', grade='assistant',
+            specialite='Réseaux', email='ens001@example.com'
+        )
+        enseignant.departements.add(cls.ntic)
+        matiere = Matiere.objects.create(
+            code='RES101', nom='Réseaux', coefficient=1, credits=3, niveau=cls.niveau, semestre=semestre
+        )
+        matiere.departements.add(cls.ntic)
+        for i, departement in enumerate([cls.ntic, cls.ntic, cls.dl]):
+            cls.creer_etudiant(i, departement)
+
+        cls.admin = User.objects.create_superuser('ADMIN', password=None)
+        cls.chef = User.objects.create_user('CHEF-NTIC', password=None)
+        cls.chef.profile.role = 'chef_departement'
+        cls.chef.profile.departement = cls.ntic
+        cls.chef.profile.save()
+
+    @classmethod
+    def creer_etudiant(cls, numero, departement):
+        return Etudiant.objects.create(
+            matricule=f'111-222-333-{numero:03d}', nom='Diallo', prenom=f'Étudiant {numero}',
+            date_naissance=date(2004, 1, 1), lieu_naissance='Conakry', sexe='F',
+            departement=departement, niveau=cls.niveau, annee_academique=cls.annee
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_compteurs_direction(self):
+        self.assertEqual(TableauBordService.compteurs(self.admin.profile), {
+            'nb_departements': 2, 'nb_etudiants': 3, 'nb_enseignants': 1, 'nb_matieres': 1,
+        })
+
+    def test_compteurs_chef_du_departement(self):
+        self.chef.profile.departement = self.dl
+        self.assertEqual(TableauBordService.compteurs(self.chef.profile), {
+            'nb_etudiants': 1, 'nb_enseignants': 0, 'nb_matieres': 0,
+        })
+        self.chef.profile.departement = self.ntic
+        self.assertEqual(TableauBordService.compteurs(self.chef.profile), {
+            'nb_etudiants': 2, 'nb_enseignants': 1, 'nb_matieres': 1,
+        })
+
+    def test_calcul_en_une_requete_puis_cache(self):
+        with CaptureQueriesContext(connection) as requetes:
+            TableauBordService.compteurs(self.admin.profile)
+        self.assertEqual(len(requetes), 1)
+
+        with CaptureQueriesContext(connection) as requetes:
+            TableauBordService.compteurs(self.admin.profile)
+        self.assertEqual(len(requetes), 0)
+
+    def test_invalidation(self):
+        TableauBordService.compteurs(self.chef.profile)
+
+        # Signal post_save : compteurs recalculés
+        self.creer_etudiant(10, self.ntic)
+        self.assertEqual(TableauBordService.compteurs(self.chef.profile)['nb_etudiants'], 3)
+
+        # update() n'émet pas de signal : invalidation explicite
+        Etudiant.objects.filter(departement=self.ntic).update(departement=self.dl)
+        self.assertEqual(TableauBordService.compteurs(self.chef.profile)['nb_etudiants'], 3)
+        TableauBordService.invalider()
+        self.assertEqual(TableauBordService.compteurs(self.chef.profile)['nb_etudiants'], 0)
+
+    def test_page_d_accueil(self):
+        self.client.force_login(self.admin)
+
+        response = self.client.get('/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['nb_etudiants'], 3)
+        self.assertEqual(response.context['nb_departements'], 2)
@@ -9,6 +9,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.models import User
 from .models import Profile
+from .services import TableauBordService
 from .forms import LoginForm, ProfileForm, UserRegistrationForm
 
 
@@ -19,8 +20,7 @@ def home_view(request):
     """
     Page d'accueil - Affiche un dashboard selon le rôle de l'utilisateur
     """
-    from apps.gestion_academique.models import Departement, Niveau, Etudiant, Enseignant
-    from apps.structure_pedagogique.models import Matiere, Semestre
+    from apps.structure_pedagogique.models import Matiere
 
     context = {
         'user': request.user,
@@ -29,51 +29,24 @@ def home_view(request):
 
     # ===== ADMIN (Doyen) =====
     if request.user.profile.is_admin():
-        context.update({
-            'nb_etudiants': Etudiant.objects.count(),
-            'nb_enseignants': Enseignant.objects.count(),
-            'nb_departements': Departement.objects.count(),
-            'nb_matieres': Matiere.objects.count(),
-        })
+        context.update(TableauBordService.compteurs(request.user.profile))
 
     # ===== CHEF DE DÉPARTEMENT =====
     elif request.user.profile.is_chef_departement():
-        dept = request.user.profile.departement
-        context.update({
-            'departement': dept,
-            'nb_etudiants': Etudiant.objects.filter(departement=dept).count(),
-            'nb_enseignants': Enseignant.objects.filter(departements=dept).count(),
-            'nb_matieres': Matiere.objects.filter(departements=dept).count(),
-        })
-
-    # ===== DIRECTEUR DU PROGRAMME =====
-        # ===== DIRECTEUR DU PROGRAMME =====
-    elif request.user.profile.is_chef_departement():
-        departement = request.user.profile.departement
-        
-        # Stats filtrées par département
-        nb_matieres = Matiere.objects.filter(departements=departement).distinct().count()
-        nb_enseignants = Enseignant.objects.filter(departements=departement).distinct().count()
-        nb_etudiants = Etudiant.objects.filter(departement=departement).count()
-        nb_niveaux = Niveau.objects.count()
-        
         context.update({
-            'departement': departement,
-            'nb_matieres': nb_matieres,
-            'nb_enseignants': nb_enseignants,
-            'nb_etudiants': nb_etudiants,
-            'nb_niveaux': nb_niveaux,
+            'departement': request.user.profile.departement,
+            **TableauBordService.compteurs(request.user.profile),
         })
 
     # ===== ENSEIGNANT =====
     elif request.user.profile.is_enseignant():
         enseignant = request.user.profile.enseignant
         if enseignant:
-            matieres = Matiere.objects.filter(enseignants=enseignant)
+            matieres = list(Matiere.objects.filter(enseignants=enseignant))
             context.update({
                 'enseignant': enseignant,
                 'matieres': matieres,
-                'nb_matieres': matieres.count(),
+                'nb_matieres': len(matieres),
             })
 
     # ===== ÉTUDIANT =====
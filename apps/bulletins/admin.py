@@ -14,5 +14,6 @@ class ResultatAdmin(admin.ModelAdmin):
 
 @admin.register(Bulletin)
 class BulletinAdmin(admin.ModelAdmin):
-    list_display = ('resultat', 'genere_le', 'nombre_telechargements', 'telecharge_le')
-    readonly_fields = ('genere_le', 'telecharge_le', 'nombre_telechargements')
\ No newline at end of file
+    list_display = ('etudiant', 'annee_academique', 'resultat', 'genere_le', 'nombre_telechargements', 'telecharge_le')
+    search_fields = ('etudiant__matricule', 'etudiant__nom', 'etudiant__prenom')
+    readonly_fields = ('genere_le', 'telecharge_le', 'nombre_telechargements', 'empreinte')
\ No newline at end of file
@@ -0,0 +1,36 @@
+# bulletins/management/commands/calculer_resultats.py
+"""
+Calcul et enregistrement des résultats semestriels
+Usage : python manage.py calculer_resultats [--departement NTIC] [--niveau L1] [--annee 2025-2026]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.gestion_academique.models import Etudiant
+from apps.bulletins.services import ResultatService
+
+
+class Command(BaseCommand):
+    help = "Calcule moyenne générale, crédits et décision de chaque étudiant par semestre"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departement', help="Code du département (ex : NTIC)")
+        parser.add_argument('--niveau', help="Code du niveau (ex : L1)")
+        parser.add_argument('--annee', help="Année universitaire (ex : 2025-2026)")
+
+    def handle(self, *args, **options):
+        etudiants = Etudiant.objects.all()
+
+        if options['departement']:
+            etudiants = etudiants.filter(departement__code=options['departement'])
+        if options['niveau']:
+            etudiants = etudiants.filter(niveau__code=options['niveau'])
+        if options['annee']:
+            etudiants = etudiants.filter(annee_academique__annee=options['annee'])
+
+        debut = time.perf_counter()
+        nombre = ResultatService.materialiser(etudiants)
+        duree = time.perf_counter() - debut
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {nombre} résultat(s) enregistré(s) en {duree:.2f} s"))
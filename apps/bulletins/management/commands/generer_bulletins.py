@@ -0,0 +1,59 @@
+# bulletins/management/commands/generer_bulletins.py
+"""
+Génération des bulletins par lots
+Usage : python manage.py generer_bulletins [--departement NTIC] [--niveau L1]
+        [--annee 2025-2026] [--format zip|pdf] [--sortie Bulletins.zip] [--processus 8]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.gestion_academique.models import Etudiant
+from apps.bulletins.services import BulletinService
+
+
+class Command(BaseCommand):
+    help = "Génère les bulletins PDF de tous les étudiants filtrés (ZIP ou PDF unique)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departement', help="Code du département (ex : NTIC)")
+        parser.add_argument('--niveau', help="Code du niveau (ex : L1)")
+        parser.add_argument('--annee', help="Année universitaire (ex : 2025-2026)")
+        parser.add_argument(
+            '--format',
+            choices=['zip', 'pdf'],
+            default='zip',
+            help="ZIP de PDF (défaut) ou PDF unique"
+        )
+        parser.add_argument('--sortie', help="Fichier produit (défaut : Bulletins.zip / Bulletins.pdf)")
+        parser.add_argument(
+            '--processus',
+            type=int,
+            help="Processus de rendu pour le ZIP (défaut : BULLETINS_PROCESSUS)"
+        )
+
+    def handle(self, *args, **options):
+        etudiants = Etudiant.objects.order_by('nom', 'prenom')
+
+        if options['departement']:
+            etudiants = etudiants.filter(departement__code=options['departement'])
+        if options['niveau']:
+            etudiants = etudiants.filter(niveau__code=options['niveau'])
+        if options['annee']:
+            etudiants = etudiants.filter(annee_academique__annee=options['annee'])
+
+        if not etudiants.exists():
+            raise CommandError("Aucun étudiant ne correspond aux filtres")
+
+        sortie = options['sortie'] or f"Bulletins.{options['format']}"
+
+        with open(sortie, 'wb') as fichier:
+            if options['format'] == 'pdf':
+                stats = BulletinService.generer_pdf_unique(etudiants, fichier)
+            else:
+                stats = {}
+                processus = options['processus'] or settings.BULLETINS_PROCESSUS
+                for morceau in BulletinService.flux_zip(etudiants, stats, processus):
+                    fichier.write(morceau)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {sortie}"))
+        self.stdout.write(BulletinService.texte_rapport(stats))
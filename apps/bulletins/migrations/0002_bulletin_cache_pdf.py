@@ -0,0 +1,39 @@
+# Generated by Django 5.2.10 on 2026-10-17 22:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bulletins', '0001_initial'),
+        ('gestion_academique', '0005_etudiantarchive_ues_manquantes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulletin',
+            name='annee_academique',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bulletins', to='gestion_academique.anneeacademique', verbose_name='Année académique'),
+        ),
+        migrations.AddField(
+            model_name='bulletin',
+            name='empreinte',
+            field=models.CharField(blank=True, help_text='SHA-256 des notes validées et de la version du gabarit ayant produit le fichier', max_length=64, verbose_name='Empreinte'),
+        ),
+        migrations.AddField(
+            model_name='bulletin',
+            name='etudiant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bulletins', to='gestion_academique.etudiant', verbose_name='Étudiant'),
+        ),
+        migrations.AlterField(
+            model_name='bulletin',
+            name='resultat',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bulletin', to='bulletins.resultat', verbose_name='Résultat'),
+        ),
+        migrations.AddConstraint(
+            model_name='bulletin',
+            constraint=models.UniqueConstraint(fields=('etudiant', 'annee_academique'), name='bulletin_unique_par_etudiant_annee'),
+        ),
+    ]
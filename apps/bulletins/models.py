@@ -63,43 +63,37 @@ class Resultat(models.Model):
     def __str__(self):
         return f"{self.etudiant} - {self.semestre} {self.annee_academique} - {self.get_decision_display()}"
     
+    def statistiques_notes(self):
+        """Moyenne et crédits du semestre calculés en une requête agrégée"""
+        from .services import ResultatService
+        
+        notes = Note.objects.filter(etudiant_id=self.etudiant_id, matiere__semestre_id=self.semestre_id)
+        return ResultatService.statistiques(notes).get((self.etudiant_id, self.semestre_id), {
+            'moyenne_generale': 0,
+            'total_credits_obtenus': 0,
+            'total_credits_requis': 0,
+        })
+    
     def calculer_moyenne(self):
         """Calcule la moyenne générale pondérée par les coefficients"""
-        notes = Note.objects.filter(
-            etudiant=self.etudiant,
-            matiere__semestre=self.semestre,
-            statut='valide'
-        )
-        
-        if not notes.exists():
-            self.moyenne_generale = 0
-            return 0
-        
-        somme_notes_ponderees = sum(note.moyenne() * note.matiere.coefficient for note in notes)
-        somme_coefficients = sum(note.matiere.coefficient for note in notes)
-        
-        if somme_coefficients > 0:
-            self.moyenne_generale = round(somme_notes_ponderees / somme_coefficients, 2)
-        else:
-            self.moyenne_generale = 0
-        
+        self.moyenne_generale = self.statistiques_notes()['moyenne_generale']
         return self.moyenne_generale
     
     def calculer_credits(self):
         """Calcule le total des crédits obtenus et requis"""
-        notes = Note.objects.filter(
-            etudiant=self.etudiant,
-            matiere__semestre=self.semestre,
-            statut='valide'
-        )
-        
-        self.total_credits_requis = sum(note.matiere.credits for note in notes)
-        self.total_credits_obtenus = sum(
-            note.matiere.credits for note in notes if note.est_admis()
-        )
-        
+        statistiques = self.statistiques_notes()
+        self.total_credits_requis = statistiques['total_credits_requis']
+        self.total_credits_obtenus = statistiques['total_credits_obtenus']
         return self.total_credits_obtenus
     
+    def calculer(self):
+        """Moyenne, crédits et décision en une seule requête"""
+        statistiques = self.statistiques_notes()
+        self.moyenne_generale = statistiques['moyenne_generale']
+        self.total_credits_requis = statistiques['total_credits_requis']
+        self.total_credits_obtenus = statistiques['total_credits_obtenus']
+        return self.determiner_decision()
+    
     def determiner_decision(self):
         """Détermine si l'étudiant est admis ou ajourné (moyenne >= 5)"""
         if self.moyenne_generale >= 5:
@@ -117,19 +111,47 @@ class Resultat(models.Model):
 
 
 class Bulletin(models.Model):
-    """Bulletin de notes PDF"""
+    """
+    Bulletin de notes PDF
+    Le bulletin annuel (2 semestres) d'un étudiant est mis en cache : le fichier
+    est réutilisé tant que l'empreinte (notes validées + version du gabarit) ne change pas
+    """
     resultat = models.OneToOneField(
         Resultat,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='bulletin',
         verbose_name="Résultat"
     )
+    etudiant = models.ForeignKey(
+        Etudiant,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='bulletins',
+        verbose_name="Étudiant"
+    )
+    annee_academique = models.ForeignKey(
+        AnneeAcademique,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='bulletins',
+        verbose_name="Année académique"
+    )
     fichier_pdf = models.FileField(
         upload_to='bulletins/',
         null=True,
         blank=True,
         verbose_name="Fichier PDF"
     )
+    empreinte = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="Empreinte",
+        help_text="SHA-256 des notes validées et de la version du gabarit ayant produit le fichier"
+    )
     
     genere_le = models.DateTimeField(auto_now_add=True, verbose_name="Généré le")
     telecharge_le = models.DateTimeField(null=True, blank=True, verbose_name="Téléchargé le")
@@ -139,9 +161,17 @@ class Bulletin(models.Model):
         verbose_name = "Bulletin"
         verbose_name_plural = "Bulletins"
         ordering = ['-genere_le']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['etudiant', 'annee_academique'],
+                name='bulletin_unique_par_etudiant_annee'
+            ),
+        ]
     
     def __str__(self):
-        return f"Bulletin - {self.resultat.etudiant} - {self.resultat.semestre}"
+        if self.resultat_id:
+            return f"Bulletin - {self.resultat.etudiant} - {self.resultat.semestre}"
+        return f"Bulletin - {self.etudiant} - {self.annee_academique}"
     
     def incrementer_telechargements(self):
         """Incrémente le compteur de téléchargements"""
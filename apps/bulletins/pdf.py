@@ -0,0 +1,328 @@
+# bulletins/pdf.py
+"""
+MODULE 5 : Bulletins - Rendu PDF (ReportLab)
+Travaille uniquement sur les données préparées par BulletinService.preparer_bulletin :
+aucun accès à la base, styles et logos chargés une seule fois par processus
+"""
+from functools import lru_cache
+from io import BytesIO
+from datetime import date
+import os
+
+from django.conf import settings
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+
+
+# Flux binaires au lieu de l'encodage ASCII85 (en Python pur sans rl_accel) :
+# les logos ne sont plus ré-encodés à chaque bulletin, PDF plus petits
+rl_config.useA85 = 0
+
+# Version de la mise en page, incluse dans l'empreinte des bulletins en cache :
+# à incrémenter à chaque modification du rendu pour régénérer les fichiers stockés
+VERSION_GABARIT = '1'
+
+
+@lru_cache(maxsize=None)
+def styles_bulletin():
+    """Styles de paragraphe du bulletin, créés une fois et partagés par tous les rendus"""
+    styles = getSampleStyleSheet()
+    return {
+        'normal': styles['Normal'],
+        'titre': ParagraphStyle(
+            'TitreStyle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.white,
+            alignment=TA_CENTER,
+            spaceAfter=6,
+            backColor=colors.grey
+        ),
+        'header': ParagraphStyle('center', parent=styles['Normal'], alignment=TA_CENTER, fontSize=9),
+        'infos': ParagraphStyle('left', parent=styles['Normal'], fontSize=10),
+        'center': ParagraphStyle('center', parent=styles['Normal'], alignment=TA_CENTER, fontSize=10, fontName='Helvetica-Bold'),
+        'center_normal': ParagraphStyle('center_normal', parent=styles['Normal'], alignment=TA_CENTER, fontSize=9),
+        'footer_right': ParagraphStyle('right', parent=styles['Normal'], alignment=TA_RIGHT, fontSize=9),
+        'footer_left': ParagraphStyle('left', parent=styles['Normal'], alignment=TA_LEFT, fontSize=9),
+    }
+
+
+@lru_cache(maxsize=None)
+def lire_logo(nom_fichier):
+    """Contenu d'un logo de static/images (None s'il est absent), lu une fois par processus"""
+    chemin = os.path.join(settings.BASE_DIR, 'static', 'images', nom_fichier)
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, 'rb') as fichier:
+        return fichier.read()
+
+
+def creer_logo(nom_fichier):
+    """Flowable du logo (ou cellule vide si le fichier est absent)"""
+    contenu = lire_logo(nom_fichier)
+    if contenu is None:
+        return ''
+    return Image(BytesIO(contenu), width=3*cm, height=2*cm)
+
+
+def creer_document(fichier):
+    """Document A4 aux marges du bulletin"""
+    return SimpleDocTemplate(
+        fichier,
+        pagesize=A4,
+        rightMargin=1.5*cm,
+        leftMargin=1.5*cm,
+        topMargin=1*cm,
+        bottomMargin=1.5*cm
+    )
+
+
+def creer_elements_bulletin(bulletin):
+    """Flowables d'un bulletin (données de BulletinService.preparer_bulletin)"""
+    
+    elements = []
+    styles = styles_bulletin()
+    
+    # ===== EN-TÊTE =====
+    elements.append(creer_header())
+    elements.append(Spacer(1, 0.2*cm))
+    
+    # ===== TITRE =====
+    titre = Paragraph("RELEVÉ DE NOTES", styles['titre'])
+    elements.append(titre)
+    elements.append(Spacer(1, 0.2*cm))
+    
+    # ===== INFOS ÉTUDIANT =====
+    elements.append(creer_infos_etudiant(bulletin['etudiant']))
+    elements.append(Spacer(1, 0.3*cm))
+    
+    semestre1, semestre2 = bulletin['semestres']
+    
+    # ===== SEMESTRE 1 =====
+    elements.append(creer_tableau_semestre(semestre1['nom'], semestre1['donnees']))
+    elements.append(Spacer(1, 0.3*cm))
+    
+    # ===== SEMESTRE 2 =====
+    elements.append(creer_tableau_semestre(semestre2['nom'], semestre2['donnees']))
+    elements.append(Spacer(1, 1*cm))  # ⭐ AUGMENTÉ de 0.3cm à 1cm pour faire descendre le footer
+    
+    # ===== FOOTER =====
+    elements.append(creer_footer(bulletin['date_edition']))
+    
+    return elements
+
+
+def generer_pdf_bulletin(bulletin):
+    """Génère le PDF d'un bulletin avec ReportLab"""
+    
+    buffer = BytesIO()
+    creer_document(buffer).build(creer_elements_bulletin(bulletin))
+    
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    
+    return pdf_content
+
+
+def generer_pdf_fusionne(bulletins, fichier):
+    """
+    Écrit dans `fichier` un seul PDF contenant tous les bulletins
+    (un saut de page entre deux bulletins)
+    """
+    elements = []
+    for index, bulletin in enumerate(bulletins):
+        if index:
+            elements.append(PageBreak())
+        elements.extend(creer_elements_bulletin(bulletin))
+    
+    creer_document(fichier).build(elements)
+
+
+def creer_header():
+    """Crée l'en-tête du bulletin avec logos"""
+    
+    style_center = styles_bulletin()['header']
+    
+    # Contenu header
+    data = [[
+        creer_logo('logo_uganc.jpg'),
+        Paragraph("<b>UNIVERSITÉ GAMAL ABDEL<br/>NASSER DE CONAKRY</b><br/>B.P : 1147<br/>Conakry/ R. Guinée", style_center),
+        Paragraph("<b>LA FACULTÉ POLYTECHNIQUE</b><br/>Tél : +224 624 08 45 01<br/>+224 657 99 43 57<br/>ibrahima.k.toure@ci.edu.gn", style_center),
+        creer_logo('logo_centre_informatique.jpg'),
+    ]]
+    
+    table = Table(data, colWidths=[4*cm, 5*cm, 5*cm, 4*cm])
+    table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ]))
+    
+    return table
+
+
+def creer_infos_etudiant(etudiant):
+    """Crée le bloc d'informations de l'étudiant"""
+    
+    info_text = f"""
+    <b>Étudiante :</b> {etudiant['nom_complet']}<br/>
+    <b>Programme :</b> {etudiant['departement']}<br/>
+    <b>Classe :</b> {etudiant['niveau']}<br/>
+    <b>Matricule :</b> {etudiant['matricule']}<br/>
+    <b>Année universitaire :</b> {etudiant['annee']}
+    """
+    
+    return Paragraph(info_text, styles_bulletin()['infos'])
+
+
+def creer_tableau_semestre(nom_semestre, donnees):
+    """
+    Crée le tableau des notes pour un semestre avec fusion de cellules pour les UE
+    ⭐ MODIFIÉ : Hauteur des cellules augmentée de 0.1cm (1mm)
+    """
+    
+    styles = styles_bulletin()
+    style_center_normal = styles['center_normal']
+    
+    # Titre semestre
+    titre = Paragraph(f"<b>{nom_semestre}</b>", styles['center'])
+    
+    # En-tête tableau
+    data = [
+        ['MATIÈRES', 'NOTES', 'NOTE LITTÉRALE', 'OBSERV']
+    ]
+    
+    # Liste pour stocker les commandes de fusion
+    table_style_commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        # ⭐⭐ PADDING NORMAL (hauteur contrôlée par rowHeights) ⭐⭐
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('LEFTPADDING', (0, 0), (-1, -1), 3),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ]
+    
+    row_index = 1  # Commence après l'en-tête
+    
+    # UE
+    for ue in donnees['ues']:
+        nb_matieres = len(ue['matieres'])
+        
+        # Nom UE
+        data.append([Paragraph(f"<b>{ue['nom']}</b>", styles['normal']), '', '', ''])
+        start_row_ue = row_index
+        
+        # ENLEVER LA LIGNE VERTICALE à gauche de la colonne NOTES pour la ligne titre UE
+        table_style_commands.append(
+            ('LINEAFTER', (0, row_index), (0, row_index), 0, colors.white)
+        )
+        
+        row_index += 1
+        
+        # Matières de l'UE
+        for mat in ue['matieres']:
+            data.append([
+                Paragraph(f"    {mat['nom']}", styles['normal']),
+                mat['moyenne'],
+                '',  # Cellule vide, sera fusionnée
+                ''   # Cellule vide, sera fusionnée
+            ])
+            row_index += 1
+        
+        # Moyenne UE
+        data.append([
+            Paragraph("<b>Moyenne UE</b>", styles['normal']),
+            Paragraph(f"<b>{ue['moyenne']}</b>", styles['normal']),
+            '',  # Cellule vide, sera fusionnée
+            ''   # Cellule vide, sera fusionnée
+        ])
+        end_row_ue = row_index
+        row_index += 1
+        
+        # FUSION : Seulement si 2+ matières dans l'UE
+        if nb_matieres >= 2:
+            # Fusionner NOTE LITTÉRALE (colonne 2)
+            table_style_commands.append(
+                ('SPAN', (2, start_row_ue), (2, end_row_ue))
+            )
+            
+            # Fusionner OBSERV (colonne 3)
+            table_style_commands.append(
+                ('SPAN', (3, start_row_ue), (3, end_row_ue))
+            )
+            
+            # CENTRER le contenu des cellules fusionnées
+            table_style_commands.append(
+                ('ALIGN', (2, start_row_ue), (2, end_row_ue), 'CENTER')
+            )
+            table_style_commands.append(
+                ('ALIGN', (3, start_row_ue), (3, end_row_ue), 'CENTER')
+            )
+            
+            # Remplir les cellules fusionnées avec les valeurs CENTRÉES
+            data[start_row_ue][2] = Paragraph(ue['note_litterale'], style_center_normal)
+            data[start_row_ue][3] = Paragraph('Validé' if ue['valide'] else 'Non-validé', style_center_normal)
+        else:
+            # Si 1 seule matière, pas de fusion, remplir et centrer normalement
+            data[end_row_ue][2] = ue['note_litterale']
+            data[end_row_ue][3] = 'Validé' if ue['valide'] else 'Non-validé'
+    
+    # Matières seules (sans UE)
+    for mat in donnees['matieres_seules']:
+        data.append([
+            Paragraph(f"<b>{mat['nom']}</b>", styles['normal']),
+            mat['moyenne'],
+            mat['note_litterale'],
+            'Validé' if mat['valide'] else 'Non-validé'
+        ])
+        row_index += 1
+    
+    # Créer le tableau avec hauteur de ligne augmentée
+    # ⭐ Chaque ligne fait environ 0.5cm de base + 0.1cm = 0.6cm
+    nombre_lignes = len(data)
+    hauteur_base = 0.5*cm  # Hauteur de base
+    hauteur_ajout = 0.1*cm  # ⭐ Augmentation de 0.1cm (1mm) par ligne
+    row_heights = [hauteur_base + hauteur_ajout] * nombre_lignes
+    
+    table = Table(data, colWidths=[8*cm, 3*cm, 3.5*cm, 3.5*cm], rowHeights=row_heights)
+    
+    # Appliquer le style avec les fusions
+    table.setStyle(TableStyle(table_style_commands))
+    
+    return Table([[titre], [table]])
+
+
+def creer_footer(date_edition):
+    """Crée le footer avec date d'édition (ISO, voir preparer_bulletin) et signatures"""
+    
+    styles = styles_bulletin()
+    style_right = styles['footer_right']
+    style_left = styles['footer_left']
+    
+    date_aujourdhui = date.fromisoformat(date_edition).strftime("%d %B %Y")
+    
+    footer_data = [[
+        Paragraph(f"<br/><br/>Le DGA/Etudes<br/><br/><br/><br/><b>Dr. Mohamed CONTE</b>", style_left),  # ⭐ 2 lignes vides + titre + 4 lignes = aligné avec Directeur
+        Paragraph(f"Fait à Conakry, le {date_aujourdhui}<br/><br/>Le Directeur Général<br/><br/><br/><br/><b>Dr. Ibrahima Kalil TOURE</b>", style_right),  # Date + 2 lignes + titre + 4 lignes
+    ]]
+    
+    table = Table(footer_data, colWidths=[9*cm, 9*cm])
+    table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    
+    return table
@@ -0,0 +1,692 @@
+# bulletins/services.py
+"""
+MODULE 5 : Bulletins - Services
+Préparation des données des bulletins (un étudiant ou toute une classe)
+et génération par lots : ZIP de PDF ou PDF unique
+Bulletins individuels mis en cache sur disque (modèle Bulletin) par empreinte
+Résultats semestriels calculés par agrégation et enregistrés en masse (modèle Resultat)
+"""
+import hashlib
+import time
+import zipfile
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from apps.gestion_academique.models import Etudiant
+from apps.gestion_notes.models import Note, ResultatUE, UniteEnseignement
+from apps.structure_pedagogique.models import Matiere, Semestre
+from config.cache_utils import memoiser, versions
+from .models import Bulletin, Resultat
+from .pdf import VERSION_GABARIT, generer_pdf_bulletin, generer_pdf_fusionne
+
+
+# Mapping Niveau → Semestres
+SEMESTRES_PAR_NIVEAU = {
+    'L1': ['S1', 'S2'],
+    'L2': ['S3', 'S4'],
+    'L3': ['S5', 'S6'],
+}
+
+
+class TamponFlux:
+    """
+    Fichier en écriture seule dont le contenu est vidé au fil de l'eau
+    Permet à zipfile d'écrire une archive envoyée par morceaux (StreamingHttpResponse)
+    """
+
+    def __init__(self):
+        self.morceaux = []
+
+    def write(self, donnees):
+        self.morceaux.append(bytes(donnees))
+        return len(donnees)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        contenu = b''.join(self.morceaux)
+        self.morceaux = []
+        return contenu
+
+
+class BulletinService:
+    """
+    Service de préparation et de génération des bulletins
+    """
+
+    # Nombre d'étudiants dont les notes sont chargées en une fois lors d'un lot
+    TAILLE_LOT = 500
+
+    # Filtres de la liste des bulletins, transmis tels quels à la génération par lot
+    FILTRES = ('departement', 'niveau', 'annee', 'matricule')
+
+    @staticmethod
+    def filtrer_etudiants(filtres):
+        """
+        Étudiants sélectionnés par les filtres (département, niveau, année, matricule)
+
+        Args:
+            filtres: dict ou QueryDict (request.GET, paramètres d'une tâche)
+        """
+        etudiants = Etudiant.objects.select_related(
+            'departement', 'niveau', 'annee_academique'
+        ).order_by('nom', 'prenom')
+
+        departement_id = filtres.get('departement', '')
+        niveau_code = filtres.get('niveau', '')
+        annee_id = filtres.get('annee', '')
+        matricule = filtres.get('matricule', '').strip()
+
+        if departement_id:
+            etudiants = etudiants.filter(departement_id=departement_id)
+
+        if niveau_code:
+            etudiants = etudiants.filter(niveau__code=niveau_code)
+
+        if annee_id:
+            etudiants = etudiants.filter(annee_academique_id=annee_id)
+
+        # Recherche par matricule
+        if matricule:
+            etudiants = etudiants.filter(matricule__icontains=matricule)
+
+        return etudiants
+
+    @staticmethod
+    def get_semestres(niveau_code):
+        """
+        Retourne les 2 semestres de l'année pour un niveau
+
+        Returns:
+            tuple: (semestre1, semestre2) ou None si le niveau ou un semestre est inconnu
+        """
+        codes_semestres = SEMESTRES_PAR_NIVEAU.get(niveau_code)
+        if not codes_semestres:
+            return None
+
+        semestres = Semestre.objects.in_bulk(codes_semestres, field_name='code')
+        if len(semestres) != len(codes_semestres):
+            return None
+
+        return tuple(semestres[code] for code in codes_semestres)
+
+    @staticmethod
+    def charger_notes_valides(etudiant, semestres):
+        """
+        Charge en une seule requête les notes validées de l'étudiant
+        pour les matières des semestres (matières seules et matières des UE)
+        Retourne : {matiere_id: Note}
+        """
+        notes = Note.objects.filter(
+            Q(matiere__semestre__in=semestres) | Q(matiere__unites__semestre__in=semestres),
+            etudiant=etudiant,
+            statut='valide'
+        )
+        return {note.matiere_id: note for note in notes}
+
+    @staticmethod
+    def donnees_matiere(matiere, note):
+        """Ligne d'une matière du bulletin (note validée ou None)"""
+        if note is None:
+            return {
+                'nom': matiere.nom,
+                'moyenne': '—',
+                'note_litterale': '—',
+                'valide': False
+            }
+        return {
+            'nom': matiere.nom,
+            'moyenne': f"{note.moyenne:.2f}".replace('.', ','),
+            'note_litterale': note.get_note_litterale(),
+            'valide': note.est_valide()
+        }
+
+    @staticmethod
+    def charger_moyennes_ue(etudiants, semestres):
+        """
+        Moyennes UE des semestres lues dans la table ResultatUE (une requête)
+        Retourne : {etudiant_id: {ue_id: moyenne}}
+        """
+        moyennes = defaultdict(dict)
+        for etudiant_id, ue_id, moyenne in ResultatUE.objects.filter(
+            etudiant__in=etudiants,
+            ue__semestre__in=semestres
+        ).values_list('etudiant_id', 'ue_id', 'moyenne'):
+            moyennes[etudiant_id][ue_id] = moyenne
+        return moyennes
+
+    @staticmethod
+    def construire_donnees_semestre(ues, matieres_seules, notes, moyennes_ue):
+        """
+        Construit les données d'un semestre sans aucune requête
+        Les moyennes des UE viennent de la table ResultatUE, notes littérales
+        et validations en découlent
+
+        Args:
+            ues: UE du semestre (matières préchargées)
+            matieres_seules: Matières du semestre sans UE
+            notes: {matiere_id: Note} des notes validées de l'étudiant
+            moyennes_ue: {ue_id: moyenne} de l'étudiant (UE absente = 0)
+
+        Returns: {
+            'ues': [...],  # UE avec leurs matières et moyennes
+            'matieres_seules': [...]  # Matières sans UE
+        }
+        """
+        donnees = {
+            'ues': [],
+            'matieres_seules': []
+        }
+
+        for ue in ues:
+            matieres_data = [
+                BulletinService.donnees_matiere(matiere, notes.get(matiere.pk))
+                for matiere in ue.matieres.all()
+            ]
+            moyenne_ue = moyennes_ue.get(ue.pk, 0.0)
+
+            donnees['ues'].append({
+                'nom': ue.nom,
+                'matieres': matieres_data,
+                'moyenne': f"{moyenne_ue:.2f}".replace('.', ',') if moyenne_ue > 0 else '—',
+                'note_litterale': UniteEnseignement.note_litterale_pour_moyenne(moyenne_ue) if moyenne_ue > 0 else '—',
+                'valide': UniteEnseignement.est_valide_moyenne(moyenne_ue)
+            })
+
+        for matiere in matieres_seules:
+            donnees['matieres_seules'].append(
+                BulletinService.donnees_matiere(matiere, notes.get(matiere.pk))
+            )
+
+        return donnees
+
+    @staticmethod
+    def preparer_donnees_semestre(etudiant, semestre, notes=None):
+        """
+        Prépare les données d'un semestre pour le PDF et la prévisualisation
+
+        Args:
+            notes: Résultat de charger_notes_valides (chargé si absent)
+        """
+        if notes is None:
+            notes = BulletinService.charger_notes_valides(etudiant, [semestre])
+
+        ues = UniteEnseignement.objects.filter(semestre=semestre).prefetch_related('matieres')
+        matieres_seules = Matiere.objects.filter(
+            semestre=semestre,
+            niveau=etudiant.niveau,
+            unites__isnull=True
+        )
+        moyennes_ue = BulletinService.charger_moyennes_ue([etudiant.pk], [semestre])[etudiant.pk]
+
+        return BulletinService.construire_donnees_semestre(ues, matieres_seules, notes, moyennes_ue)
+
+    @staticmethod
+    @memoiser('etudiant', dependances=('matiere', 'ue'))
+    def donnees_bulletin(etudiant, semestre1, semestre2):
+        """
+        Données des deux semestres du bulletin (prévisualisation), en cache
+        jusqu'à la prochaine modification des notes de l'étudiant, des matières ou des UE
+
+        Returns:
+            tuple: (données semestre 1, données semestre 2), types simples
+        """
+        notes = BulletinService.charger_notes_valides(etudiant, [semestre1, semestre2])
+        return (
+            BulletinService.preparer_donnees_semestre(etudiant, semestre1, notes),
+            BulletinService.preparer_donnees_semestre(etudiant, semestre2, notes),
+        )
+
+    @staticmethod
+    def infos_etudiant(etudiant):
+        """En-tête étudiant du bulletin (types simples)"""
+        return {
+            'nom': etudiant.nom,
+            'prenom': etudiant.prenom,
+            'nom_complet': etudiant.get_full_name(),
+            'matricule': etudiant.matricule,
+            'departement': etudiant.departement.nom,
+            'niveau': etudiant.niveau.nom,
+            'niveau_code': etudiant.niveau.code,
+            'annee': etudiant.annee_academique.annee,
+        }
+
+    @staticmethod
+    def preparer_bulletin(etudiant, semestre1, data_s1, semestre2, data_s2):
+        """
+        Données complètes d'un bulletin, uniquement des types simples
+        (chaînes, booléens, listes, dict) : le rendu PDF n'accède plus à la base
+        """
+        return {
+            'etudiant': BulletinService.infos_etudiant(etudiant),
+            'date_edition': BulletinService.date_edition().isoformat(),
+            'semestres': [
+                {'nom': semestre1.nom, 'donnees': data_s1},
+                {'nom': semestre2.nom, 'donnees': data_s2},
+            ],
+        }
+
+    @staticmethod
+    def date_edition():
+        """Date « Fait à Conakry, le ... » des bulletins générés aujourd'hui"""
+        return timezone.localdate()
+
+    @staticmethod
+    def nom_fichier(bulletin):
+        """Nom du fichier PDF d'un bulletin"""
+        etudiant = bulletin['etudiant']
+        return f"Bulletin_{etudiant['nom']}_{etudiant['prenom']}_{etudiant['niveau_code']}_{etudiant['annee']}.pdf"
+
+    @staticmethod
+    def calculer_empreinte(etudiant, semestres):
+        """
+        Empreinte SHA-256 du bulletin d'un étudiant : identifiants et dates de
+        modification de ses notes validées sur les semestres, en-tête étudiant,
+        semestres, générations 'matiere' et 'ue' du cache (coefficient, crédits,
+        intitulé ou composition modifiés), date d'édition (pied de page) et
+        version du gabarit PDF
+        Une seule requête légère (aucune instance Note chargée)
+        """
+        notes = Note.objects.filter(
+            Q(matiere__semestre__in=semestres) | Q(matiere__unites__semestre__in=semestres),
+            etudiant=etudiant,
+            statut='valide'
+        ).values_list('pk', 'date_modification').order_by('pk').distinct()
+
+        empreinte = hashlib.sha256()
+        empreinte.update(f"gabarit:{VERSION_GABARIT}\n".encode())
+        empreinte.update(f"edition:{BulletinService.date_edition().isoformat()}\n".encode())
+        generation_matiere, generation_ue = versions(('matiere', None), ('ue', None))
+        empreinte.update(f"matiere:{generation_matiere}\nue:{generation_ue}\n".encode())
+
+        infos = BulletinService.infos_etudiant(etudiant)
+        for cle in sorted(infos):
+            empreinte.update(f"{cle}:{infos[cle]}\n".encode())
+        for semestre in semestres:
+            empreinte.update(f"semestre:{semestre.pk}:{semestre.nom}\n".encode())
+        for note_id, date_modification in notes:
+            empreinte.update(f"note:{note_id}:{date_modification.isoformat()}\n".encode())
+
+        return empreinte.hexdigest()
+
+    @staticmethod
+    def pdf_bulletin(etudiant, semestre1, semestre2):
+        """
+        PDF du bulletin annuel d'un étudiant, servi depuis le cache disque
+        tant que l'empreinte est inchangée, sinon régénéré et stocké
+
+        Une note validée, modifiée, invalidée ou supprimée change l'empreinte :
+        le fichier stocké n'est plus servi et est remplacé au prochain téléchargement
+
+        Returns:
+            tuple: (Bulletin, contenu PDF en bytes)
+        """
+        empreinte = BulletinService.calculer_empreinte(etudiant, [semestre1, semestre2])
+
+        bulletin, _ = Bulletin.objects.get_or_create(
+            etudiant=etudiant,
+            annee_academique=etudiant.annee_academique
+        )
+
+        if bulletin.empreinte == empreinte and bulletin.fichier_pdf:
+            try:
+                with bulletin.fichier_pdf.open('rb') as fichier:
+                    return bulletin, fichier.read()
+            except FileNotFoundError:
+                pass  # Fichier supprimé du disque : régénération
+
+        notes = BulletinService.charger_notes_valides(etudiant, [semestre1, semestre2])
+        data_s1 = BulletinService.preparer_donnees_semestre(etudiant, semestre1, notes)
+        data_s2 = BulletinService.preparer_donnees_semestre(etudiant, semestre2, notes)
+        contenu = generer_pdf_bulletin(
+            BulletinService.preparer_bulletin(etudiant, semestre1, data_s1, semestre2, data_s2)
+        )
+
+        # Fichier nommé par son empreinte, l'ancien est supprimé
+        ancien_fichier = bulletin.fichier_pdf.name if bulletin.fichier_pdf else None
+        bulletin.fichier_pdf.save(f"{empreinte}.pdf", ContentFile(contenu), save=False)
+        bulletin.empreinte = empreinte
+        bulletin.genere_le = timezone.now()
+        bulletin.save(update_fields=['fichier_pdf', 'empreinte', 'genere_le'])
+
+        if ancien_fichier and ancien_fichier != bulletin.fichier_pdf.name:
+            bulletin.fichier_pdf.storage.delete(ancien_fichier)
+
+        return bulletin, contenu
+
+    @staticmethod
+    def preparer_lot(etudiants, ignores=None, taille_lot=TAILLE_LOT):
+        """
+        Prépare les bulletins de toute une sélection d'étudiants
+        Par tranche de `taille_lot` étudiants : une requête pour les notes,
+        UE et matières chargées une seule fois pour toute la sélection
+
+        Args:
+            etudiants: QuerySet d'Etudiant
+            ignores: Liste complétée avec les étudiants sans bulletin possible (optionnel)
+
+        Yields:
+            dict: Données de chaque bulletin (voir preparer_bulletin)
+        """
+        etudiants = list(etudiants.select_related('departement', 'niveau', 'annee_academique'))
+
+        # Semestres, UE et matières seules de tous les niveaux concernés
+        codes = {
+            code
+            for etudiant in etudiants
+            for code in SEMESTRES_PAR_NIVEAU.get(etudiant.niveau.code, [])
+        }
+        semestres = Semestre.objects.in_bulk(codes, field_name='code')
+
+        ues_par_semestre = defaultdict(list)
+        for ue in UniteEnseignement.objects.filter(
+            semestre__in=semestres.values()
+        ).prefetch_related('matieres'):
+            ues_par_semestre[ue.semestre_id].append(ue)
+
+        matieres_seules = defaultdict(list)
+        for matiere in Matiere.objects.filter(semestre__in=semestres.values(), unites__isnull=True):
+            matieres_seules[(matiere.semestre_id, matiere.niveau_id)].append(matiere)
+
+        for debut in range(0, len(etudiants), taille_lot):
+            tranche = etudiants[debut:debut + taille_lot]
+
+            notes_par_etudiant = defaultdict(dict)
+            for note in Note.objects.filter(
+                Q(matiere__semestre__in=semestres.values()) | Q(matiere__unites__semestre__in=semestres.values()),
+                etudiant__in=[etudiant.pk for etudiant in tranche],
+                statut='valide'
+            ):
+                notes_par_etudiant[note.etudiant_id][note.matiere_id] = note
+
+            moyennes_par_etudiant = BulletinService.charger_moyennes_ue(
+                [etudiant.pk for etudiant in tranche], semestres.values()
+            )
+
+            for etudiant in tranche:
+                codes_semestres = SEMESTRES_PAR_NIVEAU.get(etudiant.niveau.code, [])
+                semestres_etudiant = [semestres.get(code) for code in codes_semestres]
+
+                if not codes_semestres or None in semestres_etudiant:
+                    if ignores is not None:
+                        ignores.append(f"{etudiant.matricule} : semestres du niveau {etudiant.niveau.code} introuvables")
+                    continue
+
+                notes = notes_par_etudiant[etudiant.pk]
+                moyennes_ue = moyennes_par_etudiant[etudiant.pk]
+                semestre1, semestre2 = semestres_etudiant
+
+                yield BulletinService.preparer_bulletin(
+                    etudiant,
+                    semestre1,
+                    BulletinService.construire_donnees_semestre(
+                        ues_par_semestre[semestre1.pk],
+                        matieres_seules[(semestre1.pk, etudiant.niveau_id)],
+                        notes,
+                        moyennes_ue
+                    ),
+                    semestre2,
+                    BulletinService.construire_donnees_semestre(
+                        ues_par_semestre[semestre2.pk],
+                        matieres_seules[(semestre2.pk, etudiant.niveau_id)],
+                        notes,
+                        moyennes_ue
+                    ),
+                )
+
+    @staticmethod
+    def rendre_pdfs(bulletins, processus=None):
+        """
+        Rend les PDF des bulletins, dans l'ordre d'arrivée
+        Avec plusieurs processus, le rendu (ReportLab, limité par le CPU) est réparti
+        sur un ProcessPoolExecutor : les workers ne reçoivent que les données
+        sérialisées des bulletins et n'accèdent jamais à la base
+        Réservé au worker des tâches et aux commandes (processus = BULLETINS_PROCESSUS) :
+        une requête web ne crée pas de processus
+
+        Args:
+            bulletins: Itérable de données de bulletins (voir preparer_bulletin)
+            processus: Nombre de processus de rendu (défaut : 1, rendu dans le processus courant)
+
+        Yields:
+            tuple: (bulletin, contenu PDF)
+        """
+        if not processus or processus <= 1:
+            for bulletin in bulletins:
+                yield bulletin, generer_pdf_bulletin(bulletin)
+            return
+
+        executor = ProcessPoolExecutor(max_workers=processus)
+        en_cours = deque()
+
+        try:
+            for bulletin in bulletins:
+                en_cours.append((bulletin, executor.submit(generer_pdf_bulletin, bulletin)))
+
+                # Fenêtre bornée : la mémoire ne dépend pas de la taille du lot
+                if len(en_cours) >= processus * 4:
+                    bulletin_rendu, futur = en_cours.popleft()
+                    yield bulletin_rendu, futur.result()
+
+            while en_cours:
+                bulletin_rendu, futur = en_cours.popleft()
+                yield bulletin_rendu, futur.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def rapport(nombre, debut, ignores):
+        """Statistiques d'une génération : nombre, durée et débit (bulletins/s)"""
+        duree = time.perf_counter() - debut
+        return {
+            'nombre': nombre,
+            'duree': round(duree, 2),
+            'debit': round(nombre / duree, 1) if duree > 0 else 0,
+            'ignores': ignores,
+        }
+
+    @staticmethod
+    def texte_rapport(stats):
+        """Résumé lisible d'une génération"""
+        lignes = [
+            f"{stats['nombre']} bulletin(s) générés en {stats['duree']} s "
+            f"({stats['debit']} bulletins/s, {stats.get('processus', 1)} processus de rendu)"
+        ]
+        lignes += [f"Ignoré - {raison}" for raison in stats['ignores']]
+        return '\n'.join(lignes)
+
+    @staticmethod
+    def flux_zip(etudiants, stats=None, processus=None):
+        """
+        Génère un ZIP des bulletins PDF, envoyé morceau par morceau
+        (un morceau par bulletin). Un fichier rapport.txt termine l'archive
+
+        Args:
+            stats: dict complété avec les statistiques en fin de génération (optionnel)
+            processus: Nombre de processus de rendu (voir rendre_pdfs)
+
+        Yields:
+            bytes: Morceaux successifs de l'archive ZIP
+        """
+        debut = time.perf_counter()
+        ignores = []
+        nombre = 0
+        tampon = TamponFlux()
+
+        with zipfile.ZipFile(tampon, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for bulletin, pdf in BulletinService.rendre_pdfs(
+                BulletinService.preparer_lot(etudiants, ignores), processus
+            ):
+                # Matricule en préfixe : deux homonymes ne s'écrasent pas dans l'archive
+                nom = f"{bulletin['etudiant']['matricule']}_{BulletinService.nom_fichier(bulletin)}"
+                archive.writestr(nom, pdf)
+                nombre += 1
+                yield tampon.vider()
+
+            resultat = BulletinService.rapport(nombre, debut, ignores)
+            resultat['processus'] = processus or 1
+            archive.writestr('rapport.txt', BulletinService.texte_rapport(resultat))
+
+        if stats is not None:
+            stats.update(resultat)
+
+        yield tampon.vider()
+
+    @staticmethod
+    def generer_lot(etudiants, fichier, format_lot='zip', processus=None, progression=None):
+        """
+        Génère les bulletins d'une sélection dans `fichier` (tâche generation_bulletins)
+
+        Args:
+            fichier: Fichier binaire ouvert en écriture
+            format_lot: 'zip' (un PDF par étudiant) ou 'pdf' (PDF unique)
+            progression: Fonction appelée avec (traités, total) pendant la génération
+
+        Returns:
+            dict: Statistiques (voir rapport)
+        """
+        total = etudiants.count()
+        stats = {}
+
+        if format_lot == 'pdf':
+            stats = BulletinService.generer_pdf_unique(etudiants, fichier)
+        else:
+            # Un morceau par bulletin, puis la fin de l'archive
+            for traites, morceau in enumerate(BulletinService.flux_zip(etudiants, stats, processus), 1):
+                fichier.write(morceau)
+                if progression and traites % 20 == 0:
+                    progression(min(traites, total), total)
+
+        if progression:
+            progression(total, total)
+        return stats
+
+    @staticmethod
+    def generer_pdf_unique(etudiants, fichier):
+        """
+        Écrit dans `fichier` un seul PDF contenant tous les bulletins
+
+        Returns:
+            dict: Statistiques (voir rapport)
+        """
+        debut = time.perf_counter()
+        ignores = []
+
+        bulletins = list(BulletinService.preparer_lot(etudiants, ignores))
+        if bulletins:
+            generer_pdf_fusionne(bulletins, fichier)
+
+        return BulletinService.rapport(len(bulletins), debut, ignores)
+
+
+class ResultatService:
+    """
+    Calcul des résultats semestriels (moyenne générale, crédits, décision)
+    pour toute une cohorte en une requête agrégée, puis enregistrement en masse
+    """
+
+    TAILLE_LOT = 500
+
+    @staticmethod
+    def statistiques(notes):
+        """
+        Agrège les notes validées par (étudiant, semestre) en une seule requête
+        Moyenne générale = somme(moyenne * coefficient) / somme(coefficients)
+        Crédits requis = crédits des matières notées, obtenus = matières avec moyenne >= 5
+
+        Args:
+            notes: QuerySet de Note (filtré sur statut='valide' ici)
+
+        Returns:
+            dict: {(etudiant_id, semestre_id): {'moyenne_generale', 'total_credits_obtenus', 'total_credits_requis'}}
+        """
+        lignes = notes.filter(statut='valide').values(
+            'etudiant_id', 'matiere__semestre_id'
+        ).annotate(
+            total_points=Sum(F('moyenne') * F('matiere__coefficient')),
+            total_coef=Sum('matiere__coefficient'),
+            credits_requis=Sum('matiere__credits'),
+            credits_obtenus=Sum('matiere__credits', filter=Q(moyenne__gte=5)),
+        ).order_by()
+
+        statistiques = {}
+        for ligne in lignes:
+            moyenne = ligne['total_points'] / ligne['total_coef'] if ligne['total_coef'] else 0
+            statistiques[(ligne['etudiant_id'], ligne['matiere__semestre_id'])] = {
+                'moyenne_generale': Decimal(f"{moyenne:.2f}"),
+                'total_credits_obtenus': ligne['credits_obtenus'] or 0,
+                'total_credits_requis': ligne['credits_requis'] or 0,
+            }
+        return statistiques
+
+    @staticmethod
+    def decision(moyenne_generale):
+        """Admis si moyenne >= 5, sinon ajourné (même règle que Resultat.determiner_decision)"""
+        return 'admis' if moyenne_generale >= 5 else 'ajourne'
+
+    @staticmethod
+    def materialiser(etudiants, taille_lot=TAILLE_LOT):
+        """
+        Calcule et enregistre les résultats de chaque étudiant pour les semestres
+        de son niveau, dans son année académique courante
+        Un résultat existant est mis à jour (bulk_create avec update_conflicts)
+
+        Requêtes par lot d'étudiants : 1 (cohorte) + 1 (agrégat) + écriture en masse
+
+        Args:
+            etudiants: QuerySet d'Etudiant
+
+        Returns:
+            int: Nombre de résultats enregistrés
+        """
+        semestres_par_niveau = defaultdict(list)
+        for semestre_id, niveau_id in Semestre.objects.values_list('pk', 'niveau_id'):
+            semestres_par_niveau[niveau_id].append(semestre_id)
+
+        nombre = 0
+        cohorte = etudiants.order_by('pk').values_list('pk', 'niveau_id', 'annee_academique_id')
+
+        for debut in range(0, cohorte.count(), taille_lot):
+            lot = list(cohorte[debut:debut + taille_lot])
+
+            # Notes des semestres du niveau actuel uniquement (pas des années précédentes)
+            statistiques = ResultatService.statistiques(Note.objects.filter(
+                etudiant_id__in=[etudiant_id for etudiant_id, _, _ in lot],
+                matiere__semestre__niveau_id=F('etudiant__niveau_id'),
+            ))
+
+            resultats = []
+            for etudiant_id, niveau_id, annee_id in lot:
+                for semestre_id in semestres_par_niveau.get(niveau_id, []):
+                    valeurs = statistiques.get((etudiant_id, semestre_id), {
+                        'moyenne_generale': Decimal('0.00'),
+                        'total_credits_obtenus': 0,
+                        'total_credits_requis': 0,
+                    })
+                    resultats.append(Resultat(
+                        etudiant_id=etudiant_id,
+                        semestre_id=semestre_id,
+                        annee_academique_id=annee_id,
+                        decision=ResultatService.decision(valeurs['moyenne_generale']),
+                        **valeurs
+                    ))
+
+            Resultat.objects.bulk_create(
+                resultats,
+                batch_size=taille_lot,
+                update_conflicts=True,
+                unique_fields=['etudiant', 'semestre', 'annee_academique'],
+                update_fields=[
+                    'moyenne_generale', 'total_credits_obtenus', 'total_credits_requis',
+                    'decision', 'genere_le',
+                ],
+            )
+            nombre += len(resultats)
+
+        return nombre
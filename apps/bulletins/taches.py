@@ -0,0 +1,39 @@
+# bulletins/taches.py
+"""
+Gestionnaires des tâches de fond du module Bulletins
+Appelés par le worker (apps.taches) avec (tache, **parametres)
+"""
+import tempfile
+
+from django.conf import settings
+
+from .services import BulletinService
+
+
+def executer_generation_bulletins(tache, filtres, format_lot='zip'):
+    """Génération par lot des bulletins des étudiants filtrés (ZIP ou PDF unique)"""
+    etudiants = BulletinService.filtrer_etudiants(filtres)
+
+    tache.maj_progression(0, etudiants.count(), "Génération des bulletins...")
+
+    # Fichier conservé en base : le site ne voit pas le disque du worker
+    with tempfile.TemporaryFile() as fichier:
+        stats = BulletinService.generer_lot(
+            etudiants,
+            fichier,
+            format_lot=format_lot,
+            processus=settings.BULLETINS_PROCESSUS,
+            progression=lambda traites, total: tache.maj_progression(
+                traites, total, f"{traites}/{total} bulletin(s) généré(s)"
+            )
+        )
+
+        if stats['nombre']:
+            tache.enregistrer_fichier(
+                f'Bulletins.{format_lot}',
+                'application/pdf' if format_lot == 'pdf' else 'application/zip',
+                fichier
+            )
+            stats['fichier'] = True
+
+    return stats
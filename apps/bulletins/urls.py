@@ -15,4 +15,8 @@ urlpatterns = [
     # Générer le bulletin PDF pour un étudiant
     path('generer/<int:etudiant_id>/', views.generer_bulletin_pdf, name='generer_bulletin_pdf'),
     path('detail/<int:etudiant_id>/', views.bulletin_detail, name='bulletin_detail'),
+    
+    # Générer les bulletins de tous les étudiants filtrés (ZIP ou PDF unique, en tâche de fond)
+    path('generer-lot/', views.generer_bulletins_lot, name='generer_bulletins_lot'),
+    path('generer-lot/<int:tache_id>/telecharger/', views.telecharger_bulletins_lot, name='telecharger_bulletins_lot'),
 ]
@@ -0,0 +1,16 @@
+# gestion_academique/context_processors.py
+"""
+Variables communes à tous les gabarits : année active et liste des années
+Évaluées seulement si le gabarit les utilise (voir AnneeAcademique.get_toutes)
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .models import AnneeAcademique
+
+
+def annees_academiques(request):
+    """annee_active (None si aucune) et annees_academiques (active en tête)"""
+    return {
+        'annee_active': SimpleLazyObject(AnneeAcademique.get_active),
+        'annees_academiques': SimpleLazyObject(lambda: AnneeAcademique.get_toutes(active_en_tete=True)),
+    }
@@ -270,4 +270,4 @@ class ImportEtudiantsForm(forms.Form):
         super().__init__(*args, **kwargs)
         from apps.gestion_academique.models import AnneeAcademique
         self.fields['annee_academique'].queryset = AnneeAcademique.objects.all().order_by('-est_active', '-date_debut')
-        self.fields['annee_academique'].initial = AnneeAcademique.objects.filter(est_active=True).first()
\ No newline at end of file
+        self.fields['annee_academique'].initial = AnneeAcademique.get_active()
\ No newline at end of file
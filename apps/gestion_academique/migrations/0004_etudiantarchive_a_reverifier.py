@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-17 22:36
+
+from django.db import migrations, models
+
+
+def marquer_non_diplomes(apps, schema_editor):
+    """Les archives existantes n'ont jamais été suivies : toutes à re-vérifier"""
+    EtudiantArchive = apps.get_model('gestion_academique', 'EtudiantArchive')
+    EtudiantArchive.objects.filter(statut_diplome='non_diplome').update(a_reverifier=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_academique', '0003_etudiant_passage_manuel_etudiant_passage_manuel_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etudiantarchive',
+            name='a_reverifier',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='À re-vérifier'),
+        ),
+        migrations.RunPython(marquer_non_diplomes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.10 on 2026-10-17 22:37
+
+import json
+
+from django.db import migrations, models
+
+
+def copier_codes_vers_relation(apps, schema_editor):
+    """Convertit la liste JSON des codes UE en liens vers UniteEnseignement"""
+    EtudiantArchive = apps.get_model('gestion_academique', 'EtudiantArchive')
+    UniteEnseignement = apps.get_model('gestion_notes', 'UniteEnseignement')
+    UeManquante = EtudiantArchive.ues_manquantes.through
+
+    ue_par_code = dict(UniteEnseignement.objects.values_list('code', 'pk'))
+    liens = []
+
+    for archive_id, ue_manquantes in EtudiantArchive.objects.exclude(
+        ue_manquantes=''
+    ).values_list('pk', 'ue_manquantes').iterator():
+        try:
+            codes = json.loads(ue_manquantes)
+        except ValueError:
+            continue
+        # Une UE qui n'existe plus est ignorée (même règle que la re-vérification)
+        for ue_id in {ue_par_code[code] for code in codes if code in ue_par_code}:
+            liens.append(UeManquante(etudiantarchive_id=archive_id, uniteenseignement_id=ue_id))
+
+    UeManquante.objects.bulk_create(liens, batch_size=1000)
+
+
+def copier_relation_vers_codes(apps, schema_editor):
+    """Retour arrière : reconstruit la liste JSON des codes UE"""
+    EtudiantArchive = apps.get_model('gestion_academique', 'EtudiantArchive')
+
+    for archive in EtudiantArchive.objects.prefetch_related('ues_manquantes'):
+        archive.ue_manquantes = json.dumps(sorted(ue.code for ue in archive.ues_manquantes.all()))
+        archive.save(update_fields=['ue_manquantes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_academique', '0004_etudiantarchive_a_reverifier'),
+        ('gestion_notes', '0002_alter_note_enseignant_alter_note_etudiant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etudiantarchive',
+            name='ues_manquantes',
+            field=models.ManyToManyField(blank=True, help_text='UE non validées à la sortie', related_name='archives_manquantes', to='gestion_notes.uniteenseignement', verbose_name='UE manquantes'),
+        ),
+        migrations.RunPython(copier_codes_vers_relation, copier_relation_vers_codes),
+        migrations.RemoveField(
+            model_name='etudiantarchive',
+            name='ue_manquantes',
+        ),
+    ]
@@ -6,11 +6,26 @@ Ajout de :
 - Règle des 4 dettes maximum pour passer
 - Méthodes de calcul des dettes
 """
+import copy
+import time
+
 from django.db import models
 from django.core.validators import RegexValidator
 from django.utils import timezone
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from datetime import date
 
+from apps.gestion_notes.signals import notes_validees
+from config.cache_utils import invalider
+
+
+# Années académiques en mémoire du processus (voir AnneeAcademique.get_toutes),
+# rechargées après DUREE_ANNEES_PROCESSUS secondes ou dès qu'une année est
+# modifiée dans ce processus (invalider_cache_annee)
+_ANNEES_PROCESSUS = {'annees': [], 'expiration': 0}
+DUREE_ANNEES_PROCESSUS = 30
+
 
 class Departement(models.Model):
     """Département (NTIC, Développement Logiciel)"""
@@ -67,6 +82,33 @@ class AnneeAcademique(models.Model):
         if self.est_active:
             AnneeAcademique.objects.filter(est_active=True).update(est_active=False)
         super().save(*args, **kwargs)
+        # post_save (invalider_cache_annee) : nouvelle version des années en cache
+    
+    @staticmethod
+    def get_toutes(active_en_tete=False):
+        """
+        Toutes les années, la plus récente d'abord (l'année active en tête si
+        demandé, ordre des listes déroulantes)
+        Gardées en mémoire du processus : une requête au plus toutes les
+        DUREE_ANNEES_PROCESSUS secondes, aucun accès au cache entre-temps
+        Une modification faite dans ce processus est vue aussitôt ; faite par
+        un autre processus (worker, autre instance), au plus tard après ce délai
+        Les instances sont des copies : l'appelant peut les modifier
+        """
+        maintenant = time.monotonic()
+        if _ANNEES_PROCESSUS['expiration'] <= maintenant:
+            _ANNEES_PROCESSUS['annees'] = list(AnneeAcademique.objects.order_by('-date_debut'))
+            _ANNEES_PROCESSUS['expiration'] = maintenant + DUREE_ANNEES_PROCESSUS
+        annees = [copy.copy(annee) for annee in _ANNEES_PROCESSUS['annees']]
+        
+        if active_en_tete:
+            annees.sort(key=lambda annee: not annee.est_active)
+        return annees
+    
+    @staticmethod
+    def get_active():
+        """Année active (voir get_toutes), None si aucune"""
+        return next((annee for annee in AnneeAcademique.get_toutes() if annee.est_active), None)
     
     @staticmethod
     def generer_nom_annee(date_creation):
@@ -192,28 +234,21 @@ class Etudiant(models.Model):
     def compter_ues_non_validees(self):
         """
         Compte le nombre d'UE non validées pour cet étudiant
+        (UE de son département, du niveau actuel et des niveaux précédents)
+        Pour toute une cohorte, utiliser MoyenneUEService.compter_ues_non_validees
         Returns: int - Nombre d'UE non validées
         """
-        from apps.gestion_notes.models import UniteEnseignement
-        
-        # Récupérer toutes les UE du niveau actuel et des niveaux précédents
-        ues = UniteEnseignement.objects.filter(
-            semestre__niveau__ordre__lte=self.niveau.ordre,
-            matieres__departements=self.departement
-        ).distinct()
+        from apps.gestion_notes.services import MoyenneUEService
         
-        nb_ues_non_validees = 0
-        for ue in ues:
-            if not ue.est_valide_ue(self):
-                nb_ues_non_validees += 1
-        
-        return nb_ues_non_validees
+        return MoyenneUEService.compter_ues_non_validees([self]).get(self.pk, 0)
     
     # ⭐ NOUVELLE MÉTHODE
-    def peut_passer_niveau_superieur(self):
+    def peut_passer_niveau_superieur(self, nb_dettes=None):
         """
         Vérifie si l'étudiant peut passer au niveau supérieur
         RÈGLE: Moins de 4 UE non validées OU passage manuel
+        Args:
+            nb_dettes: Nombre d'UE non validées déjà calculé (None = le calculer)
         Returns: tuple (bool, str) - (Peut passer, Raison)
         """
         # Si passage manuel, passe automatiquement
@@ -221,7 +256,8 @@ class Etudiant(models.Model):
             return (True, "Passage manuel par la direction")
         
         # Compter les UE non validées
-        nb_dettes = self.compter_ues_non_validees()
+        if nb_dettes is None:
+            nb_dettes = self.compter_ues_non_validees()
         
         if nb_dettes < 4:
             return (True, f"{nb_dettes} dette(s) - OK pour passage")
@@ -266,11 +302,20 @@ class EtudiantArchive(models.Model):
         verbose_name="Statut diplôme"
     )
     
-    # Informations sur les UE manquantes pour les non-diplômés
-    ue_manquantes = models.TextField(
+    # UE manquantes pour les non-diplômés
+    ues_manquantes = models.ManyToManyField(
+        'gestion_notes.UniteEnseignement',
         blank=True,
-        verbose_name="UE manquantes (JSON)",
-        help_text="Liste des codes UE non validées"
+        related_name='archives_manquantes',
+        verbose_name="UE manquantes",
+        help_text="UE non validées à la sortie"
+    )
+    
+    # Positionné quand une note d'une UE manquante est validée
+    a_reverifier = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name="À re-vérifier"
     )
     
     date_archivage = models.DateTimeField(auto_now_add=True, verbose_name="Date d'archivage")
@@ -293,49 +338,9 @@ class EtudiantArchive(models.Model):
         if self.statut_diplome == 'diplome':
             return False  # Déjà diplômé, rien à faire
         
-        from apps.gestion_notes.models import UniteEnseignement
-        import json
+        from .services import ArchivageService
         
-        # Récupérer les UE manquantes
-        if not self.ue_manquantes:
-            # Pas d'UE manquantes enregistrées, devrait être diplômé
-            self.statut_diplome = 'diplome'
-            self.ue_manquantes = '[]'
-            self.save()
-            return True
-        
-        ue_codes_manquantes = json.loads(self.ue_manquantes)
-        
-        if not ue_codes_manquantes:
-            # Liste vide, peut passer à diplômé
-            self.statut_diplome = 'diplome'
-            self.save()
-            return True
-        
-        # Vérifier chaque UE manquante
-        ues_toujours_manquantes = []
-        
-        for ue_code in ue_codes_manquantes:
-            try:
-                ue = UniteEnseignement.objects.get(code=ue_code)
-                if not ue.est_valide_ue(self.etudiant):
-                    ues_toujours_manquantes.append(ue_code)
-            except UniteEnseignement.DoesNotExist:
-                # UE n'existe plus, on l'ignore
-                pass
-        
-        # Mettre à jour
-        if not ues_toujours_manquantes:
-            # Toutes les UE sont validées !
-            self.statut_diplome = 'diplome'
-            self.ue_manquantes = '[]'
-            self.save()
-            return True
-        else:
-            # Mettre à jour la liste des UE encore manquantes
-            self.ue_manquantes = json.dumps(ues_toujours_manquantes)
-            self.save()
-            return False
+        return bool(ArchivageService.reverifier_archives([self]))
 
 
 class Enseignant(models.Model):
@@ -381,4 +386,32 @@ class Enseignant(models.Model):
     
     def get_full_name(self):
         """Retourne le nom complet avec grade"""
-        return f"{self.get_grade_display()} {self.nom} {self.prenom}"
\ No newline at end of file
+        return f"{self.get_grade_display()} {self.nom} {self.prenom}"
+
+
+@receiver(notes_validees)
+def marquer_archives_a_reverifier(sender, paires, **kwargs):
+    """
+    Marque à re-vérifier les archives non diplômées dont une UE manquante
+    contient une matière dont la note vient d'être validée
+    """
+    from .services import ArchivageService
+    
+    ArchivageService.marquer_archives_a_reverifier(paires)
+
+
+# ===== INVALIDATION DU CACHE (config/cache_utils.py) =====
+
+@receiver(post_save, sender=Etudiant)
+@receiver(post_delete, sender=Etudiant)
+def invalider_cache_etudiant(sender, instance, **kwargs):
+    """Niveau, année ou statut de l'étudiant modifié"""
+    invalider('etudiant', instance.pk)
+
+
+@receiver(post_save, sender=AnneeAcademique)
+@receiver(post_delete, sender=AnneeAcademique)
+def invalider_cache_annee(sender, instance, **kwargs):
+    """Année créée, activée ou clôturée : toutes les entrées dépendant des années"""
+    _ANNEES_PROCESSUS['expiration'] = 0
+    invalider('annee')
@@ -3,13 +3,17 @@
 Services pour la gestion du passage d'année et de l'archivage
 MODIFIÉ : Ajout règle des 4 dettes max + passage manuel
 """
+from collections import defaultdict
+
 from django.db import transaction
 from django.utils import timezone
 from apps.gestion_academique.models import (
     Etudiant, AnneeAcademique, Niveau, EtudiantArchive
 )
 from apps.gestion_notes.models import UniteEnseignement, Note
-import json
+from apps.gestion_notes.services import MoyenneUEService
+from apps.authentication.services import TableauBordService
+from config.cache_utils import invalider_objets
 
 
 class PassageAnneeService:
@@ -18,12 +22,19 @@ class PassageAnneeService:
     NOUVELLE RÈGLE: Maximum 3 dettes (UE non validées) pour passer
     """
     
+    # Nombre d'étudiants enregistrés par transaction lors du passage
+    TAILLE_LOT = 500
+    
     @staticmethod
-    def passage_automatique_annee(ancienne_annee, nouvelle_annee):
+    def passage_automatique_annee(ancienne_annee, nouvelle_annee, taille_lot=TAILLE_LOT, progression=None):
         """
         Effectue le passage des étudiants vers l'année suivante
         avec vérification de la règle des 4 dettes max
         
+        Traitement ensembliste : dettes et UE manquantes calculées pour toute
+        la cohorte, puis écriture par lots (bulk_update / bulk_create)
+        dans des transactions courtes de `taille_lot` étudiants
+        
         RÈGLE:
         - 0 à 3 UE non validées → Passe au niveau supérieur
         - 4 UE non validées ou plus → Redouble
@@ -32,6 +43,8 @@ class PassageAnneeService:
         Args:
             ancienne_annee: AnneeAcademique qui se termine
             nouvelle_annee: AnneeAcademique qui commence
+            taille_lot: Nombre d'étudiants enregistrés par transaction
+            progression: Callable(traites, total) appelé après chaque lot (optionnel)
             
         Returns:
             dict: Statistiques détaillées du passage
@@ -62,86 +75,151 @@ class PassageAnneeService:
         }
         
         try:
-            with transaction.atomic():
-                # Récupérer tous les étudiants actifs de l'ancienne année
-                etudiants = Etudiant.objects.filter(
-                    annee_academique=ancienne_annee,
-                    statut='actif'
-                ).select_related('niveau', 'departement')
-                
-                for etudiant in etudiants:
-                    try:
-                        # Déterminer le niveau suivant
-                        niveau_actuel_ordre = etudiant.niveau.ordre
+            # ===== 1. PRÉPARATION (lecture seule, aucun verrou d'écriture) =====
+            etudiants = list(Etudiant.objects.filter(
+                annee_academique=ancienne_annee,
+                statut='actif'
+            ).select_related('niveau', 'departement'))
+            
+            # Échelle des niveaux chargée une seule fois : {ordre: Niveau}
+            niveaux = {niveau.ordre: niveau for niveau in Niveau.objects.all()}
+            
+            # Dettes des L1/L2 et UE manquantes des L3 calculées pour toute la cohorte
+            dettes = MoyenneUEService.compter_ues_non_validees(
+                [e for e in etudiants if e.niveau.ordre < 3]
+            )
+            ues_manquantes = MoyenneUEService.ues_non_validees(
+                [e for e in etudiants if e.niveau.ordre >= 3], ordre_max=3
+            )
+            maintenant = timezone.now()
+            
+            # Plan de passage : (etudiant, archive ou None, compteurs, détail redoublant)
+            plan = []
+            
+            for etudiant in etudiants:
+                try:
+                    niveau_actuel_ordre = etudiant.niveau.ordre
+                    archive = None
+                    compteurs = []
+                    detail = None
+                    
+                    if niveau_actuel_ordre < 3:
+                        # L1 ou L2 → Vérifier les dettes
+                        nb_dettes = dettes.get(etudiant.pk, 0)
+                        peut_passer, raison = etudiant.peut_passer_niveau_superieur(nb_dettes=nb_dettes)
+                        niveau_label = 'l1' if niveau_actuel_ordre == 1 else 'l2'
                         
-                        if niveau_actuel_ordre < 3:
-                            # L1 ou L2 → Vérifier les dettes
-                            
-                            # Vérifier si l'étudiant peut passer
-                            peut_passer, raison = etudiant.peut_passer_niveau_superieur()
-                            
-                            if peut_passer:
-                                # ✅ PASSAGE AU NIVEAU SUPÉRIEUR
-                                niveau_suivant = Niveau.objects.get(ordre=niveau_actuel_ordre + 1)
-                                
-                                etudiant.niveau = niveau_suivant
-                                etudiant.annee_academique = nouvelle_annee
-                                etudiant.save()
-                                
-                                # Comptabiliser
-                                if niveau_actuel_ordre == 1:
-                                    if etudiant.passage_manuel:
-                                        stats['l1_vers_l2_manuel'] += 1
-                                    else:
-                                        stats['l1_vers_l2'] += 1
-                                else:
-                                    if etudiant.passage_manuel:
-                                        stats['l2_vers_l3_manuel'] += 1
-                                    else:
-                                        stats['l2_vers_l3'] += 1
+                        if peut_passer:
+                            # ✅ PASSAGE AU NIVEAU SUPÉRIEUR
+                            niveau_suivant = niveaux.get(niveau_actuel_ordre + 1)
+                            if niveau_suivant is None:
+                                raise Niveau.DoesNotExist(
+                                    f"Niveau d'ordre {niveau_actuel_ordre + 1} introuvable"
+                                )
                             
-                            else:
-                                # ❌ REDOUBLEMENT
-                                # L'étudiant reste au même niveau mais change d'année
-                                
-                                etudiant.annee_academique = nouvelle_annee
-                                # Le niveau reste le même (pas de changement)
-                                etudiant.save()
-                                
-                                # Comptabiliser
-                                if niveau_actuel_ordre == 1:
-                                    stats['l1_redouble'] += 1
-                                else:
-                                    stats['l2_redouble'] += 1
-                                
-                                # Enregistrer les détails
-                                nb_dettes = etudiant.compter_ues_non_validees()
-                                stats['redoublants_detail'].append({
-                                    'matricule': etudiant.matricule,
-                                    'nom': etudiant.get_full_name(),
-                                    'niveau': etudiant.niveau.code,
-                                    'nb_dettes': nb_dettes,
-                                    'raison': raison
-                                })
-                        
+                            etudiant.niveau = niveau_suivant
+                            cle = 'l1_vers_l2' if niveau_actuel_ordre == 1 else 'l2_vers_l3'
+                            compteurs.append(f'{cle}_manuel' if etudiant.passage_manuel else cle)
                         else:
-                            # L3 → Archivage
-                            resultat_archivage = ArchivageService.archiver_etudiant_sortant(
-                                etudiant, nouvelle_annee
-                            )
-                            
-                            stats['l3_archives'] += 1
-                            if resultat_archivage['statut'] == 'diplome':
-                                stats['l3_diplomes'] += 1
-                            else:
-                                stats['l3_non_diplomes'] += 1
+                            # ❌ REDOUBLEMENT : le niveau reste le même
+                            compteurs.append(f'{niveau_label}_redouble')
+                            detail = {
+                                'matricule': etudiant.matricule,
+                                'nom': etudiant.get_full_name(),
+                                'niveau': etudiant.niveau.code,
+                                'nb_dettes': nb_dettes,
+                                'raison': raison
+                            }
+                        
+                        etudiant.annee_academique = nouvelle_annee
                     
-                    except Exception as e:
+                    else:
+                        # L3 → Archivage
+                        statut_diplome = 'non_diplome' if ues_manquantes.get(etudiant.pk) else 'diplome'
+                        archive = EtudiantArchive(
+                            etudiant=etudiant,
+                            departement=etudiant.departement,
+                            annee_sortie=nouvelle_annee,
+                            statut_diplome=statut_diplome,
+                        )
+                        etudiant.statut = 'diplome' if statut_diplome == 'diplome' else 'archive'
+                        compteurs += ['l3_archives', 'l3_diplomes' if statut_diplome == 'diplome' else 'l3_non_diplomes']
+                    
+                    etudiant.updated_at = maintenant
+                    plan.append((etudiant, archive, compteurs, detail))
+                
+                except Exception as e:
+                    stats['erreurs'].append({
+                        'etudiant': etudiant.get_full_name(),
+                        'erreur': str(e)
+                    })
+            
+            # ===== 2. ÉCRITURE PAR LOTS (une courte transaction par lot) =====
+            lots_en_echec = 0
+            for debut in range(0, len(plan), taille_lot):
+                lot = plan[debut:debut + taille_lot]
+                try:
+                    with transaction.atomic():
+                        Etudiant.objects.bulk_update(
+                            [etudiant for etudiant, _, _, _ in lot],
+                            ['niveau', 'annee_academique', 'statut', 'updated_at']
+                        )
+                        archives = [archive for _, archive, _, _ in lot if archive is not None]
+                        if archives:
+                            EtudiantArchive.objects.bulk_create(
+                                archives,
+                                update_conflicts=True,
+                                unique_fields=['etudiant', 'annee_sortie'],
+                                update_fields=['departement', 'statut_diplome', 'a_reverifier', 'date_derniere_maj'],
+                            )
+                            # Les identifiants ne sont pas renvoyés par tous les SGBD
+                            # après un upsert : relecture par (etudiant, annee_sortie)
+                            archive_ids = EtudiantArchive.objects.filter(
+                                annee_sortie=nouvelle_annee,
+                                etudiant_id__in=[archive.etudiant_id for archive in archives]
+                            ).values_list('etudiant_id', 'pk')
+                            ArchivageService.enregistrer_ues_manquantes({
+                                archive_id: ues_manquantes.get(etudiant_id, [])
+                                for etudiant_id, archive_id in archive_ids
+                            })
+                except Exception as e:
+                    for etudiant, _, _, _ in lot:
                         stats['erreurs'].append({
                             'etudiant': etudiant.get_full_name(),
                             'erreur': str(e)
                         })
+                    lots_en_echec += 1
+                    continue
+                
+                # bulk_update / bulk_create n'envoient pas de signaux : les caches
+                # des étudiants du lot sont invalidés ici
+                invalider_objets('etudiant', [etudiant for etudiant, _, _, _ in lot])
                 
+                # Comptabiliser uniquement les lots effectivement enregistrés
+                for _, _, compteurs, detail in lot:
+                    for cle in compteurs:
+                        stats[cle] += 1
+                    if detail:
+                        stats['redoublants_detail'].append(detail)
+                
+                if progression:
+                    progression(min(debut + taille_lot, len(plan)), len(plan))
+            
+            # Compteurs des tableaux de bord (statuts et niveaux modifiés sans signaux)
+            TableauBordService.invalider()
+            
+            # ===== 3. BASCULE DES ANNÉES =====
+            # Pas de bascule si des étudiants sont restés dans l'ancienne année :
+            # un nouveau passage ne reprend que les étudiants encore actifs
+            # dans l'ancienne année (ceux des lots enregistrés ont changé d'année)
+            if lots_en_echec:
+                stats['erreurs'].append({
+                    'general': f"Passage incomplet : {lots_en_echec} lot(s) non enregistré(s). "
+                               f"L'année {ancienne_annee.annee} reste active, relancez le passage."
+                })
+                return stats
+            
+            with transaction.atomic():
                 # Marquer l'ancienne année comme ayant effectué le passage
                 ancienne_annee.passage_effectue = True
                 ancienne_annee.date_passage = timezone.now()
@@ -185,9 +263,8 @@ class PassageAnneeService:
                 }
             
             # Récupérer l'année active
-            try:
-                annee_active = AnneeAcademique.objects.get(est_active=True)
-            except AnneeAcademique.DoesNotExist:
+            annee_active = AnneeAcademique.get_active()
+            if annee_active is None:
                 return {
                     'success': False,
                     'message': "Aucune année académique active"
@@ -256,15 +333,8 @@ class ArchivageService:
         # Vérifier si l'étudiant a validé TOUTES les UE de L1 à L3
         ues_non_validees = ArchivageService.get_ues_non_validees(etudiant)
         
-        if not ues_non_validees:
-            # Étudiant diplômé
-            statut_diplome = 'diplome'
-            ue_manquantes_json = '[]'
-        else:
-            # Étudiant non diplômé
-            statut_diplome = 'non_diplome'
-            ue_codes = [ue.code for ue in ues_non_validees]
-            ue_manquantes_json = json.dumps(ue_codes)
+        # Diplômé si aucune UE non validée
+        statut_diplome = 'non_diplome' if ues_non_validees else 'diplome'
         
         # Créer ou mettre à jour l'archive
         archive, created = EtudiantArchive.objects.update_or_create(
@@ -273,9 +343,10 @@ class ArchivageService:
             defaults={
                 'departement': etudiant.departement,
                 'statut_diplome': statut_diplome,
-                'ue_manquantes': ue_manquantes_json,
+                'a_reverifier': False,
             }
         )
+        archive.ues_manquantes.set(ues_non_validees)
         
         # Mettre à jour le statut de l'étudiant
         if statut_diplome == 'diplome':
@@ -302,45 +373,164 @@ class ArchivageService:
         Returns:
             list: Liste des UniteEnseignement non validées
         """
-        # Récupérer toutes les UE du département de l'étudiant
+        # Récupérer toutes les UE non validées du département de l'étudiant
         # pour les niveaux L1, L2, L3 (ordre 1, 2, 3)
-        ues = UniteEnseignement.objects.filter(
-            semestre__niveau__ordre__lte=3,
-            matieres__departements=etudiant.departement
-        ).distinct()
+        ue_ids = MoyenneUEService.ues_non_validees([etudiant], ordre_max=3).get(etudiant.pk, [])
         
-        ues_non_validees = []
+        return list(UniteEnseignement.objects.filter(pk__in=ue_ids))
+    
+    @staticmethod
+    def enregistrer_ues_manquantes(ues_par_archive):
+        """
+        Remplace les UE manquantes d'un lot d'archives (écriture groupée)
         
-        for ue in ues:
-            if not ue.est_valide_ue(etudiant):
-                ues_non_validees.append(ue)
+        Args:
+            ues_par_archive: {archive_id: [ue_id, ...]}
+        """
+        UeManquante = EtudiantArchive.ues_manquantes.through
         
-        return ues_non_validees
+        UeManquante.objects.filter(etudiantarchive_id__in=list(ues_par_archive)).delete()
+        UeManquante.objects.bulk_create([
+            UeManquante(etudiantarchive_id=archive_id, uniteenseignement_id=ue_id)
+            for archive_id, ue_ids in ues_par_archive.items()
+            for ue_id in ue_ids
+        ])
     
     @staticmethod
-    def verifier_maj_archives_auto():
+    def marquer_archives_a_reverifier(paires):
         """
-        Vérifie tous les étudiants archivés "non diplômés"
-        et met à jour automatiquement leur statut s'ils ont validé leurs UE manquantes
+        Marque à re-vérifier les archives non diplômées concernées par des notes validées
+        Une archive est concernée si l'une de ses UE manquantes contient la matière
+        
+        Args:
+            paires: Itérable de (etudiant_id, matiere_id) des notes validées
+            
+        Returns:
+            int: Nombre d'archives marquées
+        """
+        matieres_par_etudiant = defaultdict(set)
+        for etudiant_id, matiere_id in paires:
+            matieres_par_etudiant[etudiant_id].add(matiere_id)
+        
+        if not matieres_par_etudiant:
+            return 0
+        
+        # Jointure archive → UE manquante → matière, filtrée ensuite par étudiant
+        candidates = EtudiantArchive.objects.filter(
+            etudiant_id__in=matieres_par_etudiant,
+            statut_diplome='non_diplome',
+            a_reverifier=False,
+            ues_manquantes__matieres__in=set().union(*matieres_par_etudiant.values())
+        ).values_list('pk', 'etudiant_id', 'ues_manquantes__matieres')
         
+        archive_ids = {
+            archive_id for archive_id, etudiant_id, matiere_id in candidates
+            if matiere_id in matieres_par_etudiant[etudiant_id]
+        }
+        
+        if not archive_ids:
+            return 0
+        
+        return EtudiantArchive.objects.filter(pk__in=archive_ids).update(a_reverifier=True)
+    
+    @staticmethod
+    def reverifier_archives(archives):
+        """
+        Recalcule les UE manquantes d'un lot d'archives non diplômées
+        (une requête pour les UE manquantes, une pour les moyennes, écritures groupées)
+        Les archives dont toutes les UE sont validées passent à "diplômé"
+        
+        Args:
+            archives: Liste d'EtudiantArchive
+            
         Returns:
-            dict: Nombre d'étudiants dont le statut a changé
+            list: Archives passées à "diplômé"
         """
-        archives_non_diplomes = EtudiantArchive.objects.filter(
-            statut_diplome='non_diplome'
+        archives = [archive for archive in archives if archive.statut_diplome != 'diplome']
+        if not archives:
+            return []
+        
+        UeManquante = EtudiantArchive.ues_manquantes.through
+        
+        liens = list(UeManquante.objects.filter(
+            etudiantarchive_id__in=[archive.pk for archive in archives]
+        ).values_list('pk', 'etudiantarchive_id', 'uniteenseignement_id'))
+        
+        etudiant_par_archive = {archive.pk: archive.etudiant_id for archive in archives}
+        matrice = MoyenneUEService.lire_matrice(
+            list(etudiant_par_archive.values()),
+            {ue_id for _, _, ue_id in liens}
+        )
+        
+        # Liens vers les UE désormais validées, et archives qui gardent des UE manquantes
+        liens_valides = []
+        archives_incompletes = set()
+        for lien_id, archive_id, ue_id in liens:
+            if matrice.est_valide(etudiant_par_archive[archive_id], ue_id):
+                liens_valides.append(lien_id)
+            else:
+                archives_incompletes.add(archive_id)
+        
+        maintenant = timezone.now()
+        diplomes = []
+        
+        for archive in archives:
+            if archive.pk not in archives_incompletes:
+                # Toutes les UE sont validées !
+                archive.statut_diplome = 'diplome'
+                diplomes.append(archive)
+            archive.a_reverifier = False
+            archive.date_derniere_maj = maintenant
+        
+        UeManquante.objects.filter(pk__in=liens_valides).delete()
+        EtudiantArchive.objects.bulk_update(
+            archives,
+            ['statut_diplome', 'a_reverifier', 'date_derniere_maj']
         )
         
+        return diplomes
+    
+    @staticmethod
+    def verifier_maj_archives_auto(incremental=True, progression=None, taille_lot=500):
+        """
+        Vérifie les étudiants archivés "non diplômés"
+        et met à jour automatiquement leur statut s'ils ont validé leurs UE manquantes
+        
+        Args:
+            incremental: Ne traiter que les archives marquées à re-vérifier
+                         (False = toutes les archives non diplômées)
+            progression: Callable(traites, total) appelé après chaque lot (optionnel)
+            taille_lot: Nombre d'archives traitées par transaction
+        
+        Returns:
+            dict: Nombre d'archives vérifiées et d'étudiants dont le statut a changé
+        """
+        archives_non_diplomes = EtudiantArchive.objects.filter(statut_diplome='non_diplome')
+        if incremental:
+            archives_non_diplomes = archives_non_diplomes.filter(a_reverifier=True)
+        
+        archives_non_diplomes = list(archives_non_diplomes.order_by('pk'))
+        total = len(archives_non_diplomes)
+        
         nb_passages_diplome = 0
         
-        for archive in archives_non_diplomes:
-            if archive.verifier_et_maj_statut():
-                nb_passages_diplome += 1
-                # Mettre à jour aussi le statut de l'étudiant
-                archive.etudiant.statut = 'diplome'
-                archive.etudiant.save()
+        for debut in range(0, total, taille_lot):
+            lot = archives_non_diplomes[debut:debut + taille_lot]
+            
+            with transaction.atomic():
+                diplomes = ArchivageService.reverifier_archives(lot)
+                # Mettre à jour aussi le statut des étudiants
+                Etudiant.objects.filter(
+                    pk__in=[archive.etudiant_id for archive in diplomes]
+                ).update(statut='diplome', updated_at=timezone.now())
+            
+            nb_passages_diplome += len(diplomes)
+            
+            if progression:
+                progression(debut + len(lot), total)
         
         return {
-            'verifies': archives_non_diplomes.count(),
+            'verifies': total,
             'passages_diplome': nb_passages_diplome
         }
 
@@ -366,12 +556,15 @@ class GestionNotesService:
         Returns:
             QuerySet: Étudiants actifs avec notes à valider
         """
+        annee_active = AnneeAcademique.get_active()
+        if annee_active is None:
+            raise AnneeAcademique.DoesNotExist("Aucune année académique active")
+        
         if annee_academique is None:
-            annee_academique = AnneeAcademique.objects.get(est_active=True)
+            annee_academique = annee_active
         
         # Pour l'année courante : uniquement les étudiants actifs
         # Pour les années précédentes : tous les étudiants (y compris archivés)
-        annee_active = AnneeAcademique.objects.get(est_active=True)
         
         if annee_academique == annee_active:
             # Année courante : seulement étudiants actifs
@@ -0,0 +1,88 @@
+# gestion_academique/taches.py
+"""
+Gestionnaires des tâches de fond du module Gestion Académique
+Appelés par le worker (apps.taches) avec (tache, **parametres)
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.contrib.auth.models import User
+
+from .models import AnneeAcademique
+from .services import PassageAnneeService, ArchivageService
+
+# Comptes traités par lot par executer_mots_de_passe_etudiants
+TAILLE_LOT_MOTS_DE_PASSE = 200
+
+
+def executer_passage_annee(tache, ancienne_annee_id, nouvelle_annee_id):
+    """Passage automatique d'année en arrière-plan"""
+    ancienne_annee = AnneeAcademique.objects.get(pk=ancienne_annee_id)
+    nouvelle_annee = AnneeAcademique.objects.get(pk=nouvelle_annee_id)
+
+    if ancienne_annee.passage_effectue:
+        raise ValueError(f"Le passage de l'année {ancienne_annee.annee} a déjà été effectué !")
+
+    tache.maj_progression(0, message=f"Passage {ancienne_annee.annee} → {nouvelle_annee.annee}")
+
+    return PassageAnneeService.passage_automatique_annee(
+        ancienne_annee,
+        nouvelle_annee,
+        progression=lambda traites, total: tache.maj_progression(
+            traites, total, f"{traites}/{total} étudiant(s) traité(s)"
+        )
+    )
+
+
+def executer_verification_archives(tache, incremental=True):
+    """Vérification des archives non diplômées en arrière-plan"""
+    return ArchivageService.verifier_maj_archives_auto(
+        incremental=incremental,
+        progression=lambda traites, total: tache.maj_progression(
+            traites, total, f"{traites}/{total} archive(s) vérifiée(s)"
+        )
+    )
+
+
+def executer_mots_de_passe_etudiants(tache, comptes):
+    """
+    Mot de passe initial (matricule) des comptes créés par un import d'étudiants
+    Seuls les comptes encore sans mot de passe utilisable sont modifiés
+    """
+    total = len(comptes)
+    modifies = 0
+    tache.maj_progression(0, total, "Hachage des mots de passe...")
+
+    for debut in range(0, total, TAILLE_LOT_MOTS_DE_PASSE):
+        users = list(User.objects.filter(
+            pk__in=comptes[debut:debut + TAILLE_LOT_MOTS_DE_PASSE],
+            password__startswith=UNUSABLE_PASSWORD_PREFIX
+        ).only('pk', 'username'))
+
+        for user, mot_de_passe in zip(users, hacher_mots_de_passe([user.username for user in users])):
+            user.password = mot_de_passe
+        User.objects.bulk_update(users, ['password'])
+        modifies += len(users)
+
+        traites = min(debut + TAILLE_LOT_MOTS_DE_PASSE, total)
+        tache.maj_progression(traites, total, f"{traites}/{total} compte(s) traité(s)")
+
+    return {'comptes': total, 'mots_de_passe': modifies}
+
+
+def hacher_mots_de_passe(mots_de_passe, threads=None):
+    """
+    Hache des mots de passe (make_password) sur plusieurs threads du worker
+    hashlib libère le GIL pendant le calcul PBKDF2 : les threads occupent les cœurs
+    threads : défaut settings.IMPORT_THREADS_HACHAGE
+    Retourne : les hachés, dans l'ordre des mots de passe
+    """
+    if threads is None:
+        threads = settings.IMPORT_THREADS_HACHAGE
+
+    if threads <= 1 or len(mots_de_passe) < 2:
+        return [make_password(mot_de_passe) for mot_de_passe in mots_de_passe]
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(make_password, mots_de_passe))
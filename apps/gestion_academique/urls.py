@@ -40,6 +40,7 @@ urlpatterns = [
     path('passage-manuel/historique/', views_annee.passage_manuel_historique, name='passage_manuel_historique'),
     # ==================== ARCHIVES ====================
     path('archives/', views_annee.archives_list, name='archives_list'),
+    path('archives/export/', views_annee.archives_export, name='archives_export'),
     path('archives/<int:pk>/', views_annee.archive_detail, name='archive_detail'),
     path('archives/verifier-maj/', views_annee.archives_verifier_maj, name='archives_verifier_maj'),
     
@@ -8,6 +8,9 @@ from django.contrib import messages
 from django.db.models import Q, Count
 from .models import Departement, Niveau, AnneeAcademique, Etudiant, Enseignant
 from .forms import DepartementForm, NiveauForm, AnneeAcademiqueForm, EtudiantForm, EnseignantForm
+from apps.authentication.services import TableauBordService
+from config.pagination_utils import PageCurseur
+from config.stats_utils import compter_en_cache
 
 
 # ==================== DÉPARTEMENTS (Admin uniquement) ====================
@@ -301,7 +304,7 @@ def etudiant_list(request):
     """Liste des étudiants - Filtrage par département pour Chef"""
     etudiants = Etudiant.objects.select_related(
         'departement', 'niveau', 'annee_academique'
-    ).order_by('nom', 'prenom')
+    )
     
     # Si Chef de département, filtrer par son département uniquement
     if request.user.profile.is_chef_departement()  or request.user.profile.is_chef_departement():
@@ -330,20 +333,22 @@ def etudiant_list(request):
     if annee:
         etudiants = etudiants.filter(annee_academique_id=annee)
     
-    # Statistiques
-    total = etudiants.count()
-    ntic_count = etudiants.filter(departement__code='NTIC').count()
-    dl_count = etudiants.filter(departement__code='DL').count()
+    # Statistiques : une requête agrégée, en cache tant qu'aucun étudiant n'est modifié
+    compteurs = compter_en_cache(
+        etudiants, 'departement__code', {'ntic_count': 'NTIC', 'dl_count': 'DL'},
+        TableauBordService.PREFIXE_CLE
+    )
+    
+    page = PageCurseur(request, etudiants, ['nom', 'prenom'])
     
     context = {
-        'etudiants': etudiants,
-        'total': total,
-        'ntic_count': ntic_count,
-        'dl_count': dl_count,
+        'etudiants': page,
+        'page': page,
+        **compteurs,
         'search': search,
         'departements': Departement.objects.all(),
         'niveaux': Niveau.objects.all(),
-        'annees': AnneeAcademique.objects.all(),
+        'annees': AnneeAcademique.get_toutes(),
     }
     return render(request, 'gestion_academique/etudiants/list.html', context)
 
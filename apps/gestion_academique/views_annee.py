@@ -7,10 +7,16 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Count
 from django.utils import timezone
+from collections import defaultdict
 from datetime import datetime
 
 from .models import AnneeAcademique, Etudiant, EtudiantArchive, Departement, Niveau
-from .services import PassageAnneeService, ArchivageService
+from .services import PassageAnneeService
+from apps.gestion_notes.services import MoyenneUEService
+from apps.taches.services import TacheService
+from config.export_utils import TAILLE_LOT_EXPORT, format_export, reponse_export
+from config.pagination_utils import PageCurseur
+from config.stats_utils import compter_par_valeur
 from .forms import AnneeAcademiqueForm
 
 
@@ -23,11 +29,11 @@ def annee_list(request):
         messages.error(request, "Accès refusé !")
         return redirect('home')
     
-    annees = AnneeAcademique.objects.all().order_by('-date_debut')
+    annees = AnneeAcademique.get_toutes()
     
     context = {
         'annees': annees,
-        'total': annees.count(),
+        'total': len(annees),
     }
     return render(request, 'gestion_academique/annees/list.html', context)
 
@@ -134,42 +140,31 @@ def passage_annee_form(request):
         return redirect('home')
     
     # Récupérer l'année active (ancienne) et les années candidates (nouvelles)
-    try:
-        annee_active = AnneeAcademique.objects.get(est_active=True)
-    except AnneeAcademique.DoesNotExist:
+    annees = AnneeAcademique.get_toutes()
+    annee_active = next((annee for annee in annees if annee.est_active), None)
+    if annee_active is None:
         messages.error(request, "Aucune année académique active trouvée !")
         return redirect('gestion_academique:annee_list')
     
     # Années candidates : non actives et pas encore utilisées pour un passage
-    annees_candidates = AnneeAcademique.objects.filter(
-        est_active=False,
-        date_debut__gt=annee_active.date_debut
-    ).order_by('date_debut')
+    annees_candidates = sorted(
+        (annee for annee in annees if not annee.est_active and annee.date_debut > annee_active.date_debut),
+        key=lambda annee: annee.date_debut
+    )
     
-    if not annees_candidates.exists():
+    if not annees_candidates:
         messages.warning(request, 
             "Aucune nouvelle année académique disponible ! "
             "Veuillez d'abord créer la prochaine année académique.")
         return redirect('gestion_academique:annee_create')
     
     # Statistiques sur l'année actuelle
-    stats_annee_actuelle = {
-        'l1': Etudiant.objects.filter(
-            annee_academique=annee_active, 
-            niveau__code='L1',
-            statut='actif'
-        ).count(),
-        'l2': Etudiant.objects.filter(
-            annee_academique=annee_active, 
-            niveau__code='L2',
-            statut='actif'
-        ).count(),
-        'l3': Etudiant.objects.filter(
-            annee_academique=annee_active, 
-            niveau__code='L3',
-            statut='actif'
-        ).count(),
-    }
+    stats_annee_actuelle = compter_par_valeur(
+        Etudiant.objects.filter(annee_academique=annee_active, statut='actif'),
+        'niveau__code',
+        {'l1': 'L1', 'l2': 'L2', 'l3': 'L3'},
+        total=None
+    )
     stats_annee_actuelle['total'] = sum(stats_annee_actuelle.values())
     
     context = {
@@ -184,7 +179,8 @@ def passage_annee_form(request):
 def passage_annee_executer(request):
     """
     Exécute le passage automatique d'année
-    MODIFIÉ : Affiche maintenant les statistiques de redoublement
+    MODIFIÉ : Le passage est mis en file et exécuté par le worker
+    (python manage.py lancer_worker), la page de suivi affiche les statistiques
     """
     if not (request.user.profile.is_admin() or request.user.profile.is_direction()):
         messages.error(request, "Accès refusé !")
@@ -208,64 +204,41 @@ def passage_annee_executer(request):
             f"Le passage de l'année {ancienne_annee.annee} a déjà été effectué !")
         return redirect('gestion_academique:annee_list')
     
-    # Exécuter le passage
-    stats = PassageAnneeService.passage_automatique_annee(ancienne_annee, nouvelle_annee)
-    
-    # Afficher les résultats - VERSION AMÉLIORÉE
-    if stats['erreurs']:
-        messages.warning(request, 
-            f"Passage effectué avec {len(stats['erreurs'])} erreur(s).")
-        for erreur in stats['erreurs'][:5]:  # Limiter à 5 erreurs affichées
-            messages.error(request, f"Erreur: {erreur}")
-    else:
-        messages.success(request, 
-            f"✅ Passage d'année réussi vers {nouvelle_annee.annee} !")
-    
-    # ⭐ NOUVEAU : Messages détaillés avec redoublements
-    messages.info(request, 
-        f"📊 Passages : L1→L2: {stats['l1_vers_l2']} | L2→L3: {stats['l2_vers_l3']}")
-    
-    # Afficher les passages manuels s'il y en a
-    total_manuels = stats['l1_vers_l2_manuel'] + stats['l2_vers_l3_manuel']
-    if total_manuels > 0:
-        messages.success(request, 
-            f"🔓 Passages manuels : {total_manuels} (L1→L2: {stats['l1_vers_l2_manuel']}, L2→L3: {stats['l2_vers_l3_manuel']})")
-    
-    # ⭐ NOUVEAU : Afficher les redoublements
-    total_redoublants = stats['l1_redouble'] + stats['l2_redouble']
-    if total_redoublants > 0:
-        messages.warning(request, 
-            f"⚠️ Redoublements : {total_redoublants} étudiants (L1: {stats['l1_redouble']}, L2: {stats['l2_redouble']})")
-        messages.info(request, 
-            f"💡 Vous pouvez gérer les passages manuels depuis le menu 'Passage Manuel'")
+    # Un seul passage à la fois
+    tache = TacheService.tache_en_file('passage_annee')
+    if tache:
+        messages.warning(request, "Un passage d'année est déjà en cours d'exécution.")
+        return redirect('taches:tache_detail', pk=tache.pk)
+    
+    # Le passage est exécuté en arrière-plan par le worker
+    tache = TacheService.planifier(
+        'passage_annee',
+        parametres={
+            'ancienne_annee_id': ancienne_annee.pk,
+            'nouvelle_annee_id': nouvelle_annee.pk,
+        },
+        utilisateur=request.user
+    )
     
-    # Afficher les archives L3
     messages.info(request, 
-        f"📁 L3 archivés: {stats['l3_archives']} "
-        f"(Diplômés: {stats['l3_diplomes']}, Non diplômés: {stats['l3_non_diplomes']})")
+        f"🚀 Passage d'année vers {nouvelle_annee.annee} lancé. "
+        f"Suivez l'avancement ci-dessous.")
     
-    return redirect('gestion_academique:annee_list')
+    return redirect('taches:tache_detail', pk=tache.pk)
 
 
 # ==================== ARCHIVES (DIPLÔMÉS ET NON-DIPLÔMÉS) ====================
 
-@login_required
-def archives_list(request):
+def filtrer_archives(request):
     """
-    Liste des étudiants archivés (diplômés et non-diplômés)
+    Archives visibles par l'utilisateur, filtrées selon les paramètres GET
+    de la liste des archives (partagé par la liste et son export)
     
-    PERMISSIONS:
-    - Direction: voit TOUS les départements
-    - Chef de département: voit uniquement SON département
+    Returns:
+        tuple: (QuerySet d'archives, filtres appliqués)
     """
-    if not (request.user.profile.is_direction() or request.user.profile.is_chef_departement()):
-        messages.error(request, "Accès refusé !")
-        return redirect('home')
-    
     # Filtrer selon le rôle
-    archives = EtudiantArchive.objects.select_related(
-        'etudiant', 'departement', 'annee_sortie'
-    ).order_by('-date_archivage')
+    archives = EtudiantArchive.objects.all()
     
     if request.user.profile.is_chef_departement():
         # Chef : uniquement son département
@@ -293,12 +266,39 @@ def archives_list(request):
             Q(etudiant__prenom__icontains=search)
         )
     
-    # Statistiques
-    stats = {
-        'total': archives.count(),
-        'diplomes': archives.filter(statut_diplome='diplome').count(),
-        'non_diplomes': archives.filter(statut_diplome='non_diplome').count(),
+    filters = {
+        'departement': departement_id,
+        'annee': annee_id,
+        'statut': statut,
+        'search': search,
     }
+    return archives, filters
+
+
+@login_required
+def archives_list(request):
+    """
+    Liste des étudiants archivés (diplômés et non-diplômés)
+    
+    PERMISSIONS:
+    - Direction: voit TOUS les départements
+    - Chef de département: voit uniquement SON département
+    """
+    if not (request.user.profile.is_direction() or request.user.profile.is_chef_departement()):
+        messages.error(request, "Accès refusé !")
+        return redirect('home')
+    
+    archives, filters = filtrer_archives(request)
+    archives = archives.select_related(
+        'etudiant', 'departement', 'annee_sortie'
+    )
+    
+    # Statistiques
+    stats = compter_par_valeur(
+        archives,
+        'statut_diplome',
+        {'diplomes': 'diplome', 'non_diplomes': 'non_diplome'}
+    )
     
     # Données pour les filtres
     departements = Departement.objects.all()
@@ -309,21 +309,53 @@ def archives_list(request):
         sortants__isnull=False
     ).distinct().order_by('-date_debut')
     
+    page = PageCurseur(
+        request,
+        archives.annotate(nb_ues_manquantes=Count('ues_manquantes')),
+        ['-date_archivage']
+    )
+    
     context = {
-        'archives': archives,
+        'archives': page,
+        'page': page,
         'stats': stats,
         'departements': departements,
         'annees': annees,
-        'filters': {
-            'departement': departement_id,
-            'annee': annee_id,
-            'statut': statut,
-            'search': search,
-        }
+        'filters': filters,
     }
     return render(request, 'gestion_academique/archives/list.html', context)
 
 
+@login_required
+def archives_export(request):
+    """
+    Export CSV / Excel des étudiants archivés (mêmes filtres et permissions que la liste)
+    Lignes lues par lots et écrites au fil de l'eau (voir config/export_utils.py)
+    """
+    if not (request.user.profile.is_direction() or request.user.profile.is_chef_departement()):
+        messages.error(request, "Accès refusé !")
+        return redirect('home')
+    
+    archives, filters = filtrer_archives(request)
+    
+    statuts = dict(EtudiantArchive.STATUT_DIPLOME_CHOICES)
+    lignes = (
+        (matricule, nom, prenom, departement, annee, statuts.get(statut, statut),
+         nb_ues_manquantes, a_reverifier, date_archivage)
+        for matricule, nom, prenom, departement, annee, statut, nb_ues_manquantes, a_reverifier, date_archivage
+        in archives.annotate(nb_ues_manquantes=Count('ues_manquantes')).order_by('-date_archivage', 'pk').values_list(
+            'etudiant__matricule', 'etudiant__nom', 'etudiant__prenom', 'departement__code',
+            'annee_sortie__annee', 'statut_diplome', 'nb_ues_manquantes', 'a_reverifier', 'date_archivage'
+        ).iterator(chunk_size=TAILLE_LOT_EXPORT)
+    )
+    
+    entetes = [
+        'Matricule', 'Nom', 'Prénom', 'Département', 'Année de sortie', 'Statut',
+        'UE manquantes', 'À re-vérifier', "Date d'archivage"
+    ]
+    return reponse_export(format_export(request), 'archives', entetes, lignes)
+
+
 @login_required
 def archive_detail(request, pk):
     """Détails d'un étudiant archivé"""
@@ -341,21 +373,16 @@ def archive_detail(request, pk):
     
     # Récupérer les UE manquantes si non diplômé
     ues_manquantes = []
-    if archive.statut_diplome == 'non_diplome' and archive.ue_manquantes:
-        import json
-        from apps.gestion_notes.models import UniteEnseignement
+    if archive.statut_diplome == 'non_diplome':
+        ues = list(archive.ues_manquantes.select_related('semestre').order_by('code'))
+        matrice = MoyenneUEService.lire_matrice([archive.etudiant_id], ues)
         
-        ue_codes = json.loads(archive.ue_manquantes)
-        for code in ue_codes:
-            try:
-                ue = UniteEnseignement.objects.get(code=code)
-                ues_manquantes.append({
-                    'ue': ue,
-                    'est_valide': ue.est_valide_ue(archive.etudiant),
-                    'moyenne': ue.calculer_moyenne_ue(archive.etudiant)
-                })
-            except UniteEnseignement.DoesNotExist:
-                pass
+        for ue in ues:
+            ues_manquantes.append({
+                'ue': ue,
+                'est_valide': matrice.est_valide(archive.etudiant_id, ue),
+                'moyenne': matrice.moyenne(archive.etudiant_id, ue)
+            })
     
     context = {
         'archive': archive,
@@ -377,20 +404,12 @@ def archives_verifier_maj(request):
     if request.method != 'POST':
         return redirect('gestion_academique:archives_list')
     
-    resultat = ArchivageService.verifier_maj_archives_auto()
-    
-    if resultat['passages_diplome'] > 0:
-        messages.success(request, 
-            f"✅ {resultat['passages_diplome']} étudiant(s) "
-            f"sont maintenant marqués comme diplômés !")
-    else:
-        messages.info(request, 
-            "Aucun changement de statut détecté.")
+    tache = TacheService.tache_en_file('verification_archives')
+    if tache is None:
+        tache = TacheService.planifier('verification_archives', utilisateur=request.user)
+        messages.info(request, "🔄 Vérification des archives lancée en arrière-plan.")
     
-    messages.info(request, 
-        f"{resultat['verifies']} archive(s) vérifiée(s).")
-    
-    return redirect('gestion_academique:archives_list')
+    return redirect('taches:tache_detail', pk=tache.pk)
 
 
 # ==================== PASSAGE MANUEL ====================
@@ -408,9 +427,8 @@ def passage_manuel_liste(request):
         return redirect('home')
     
     # Récupérer l'année active
-    try:
-        annee_active = AnneeAcademique.objects.get(est_active=True)
-    except AnneeAcademique.DoesNotExist:
+    annee_active = AnneeAcademique.get_active()
+    if annee_active is None:
         messages.error(request, "Aucune année académique active !")
         return redirect('gestion_academique:annee_list')
     
@@ -421,12 +439,25 @@ def passage_manuel_liste(request):
         niveau__ordre__lt=3  # Uniquement L1 et L2
     ).select_related('niveau', 'departement')
     
-    # Calculer les dettes pour chaque étudiant
+    # Filtres
+    departement_id = request.GET.get('departement', '')
+    niveau_id = request.GET.get('niveau', '')
+    afficher_tous = request.GET.get('tous', '') == 'oui'
+    
+    if departement_id:
+        etudiants = etudiants.filter(departement_id=departement_id)
+    
+    if niveau_id:
+        etudiants = etudiants.filter(niveau_id=niveau_id)
+    
+    # Calculer les dettes de toute la cohorte en une fois
+    dettes = MoyenneUEService.compter_ues_non_validees(etudiants)
+    
     etudiants_avec_dettes = []
     
     for etudiant in etudiants:
-        nb_dettes = etudiant.compter_ues_non_validees()
-        peut_passer, raison = etudiant.peut_passer_niveau_superieur()
+        nb_dettes = dettes.get(etudiant.pk, 0)
+        peut_passer, raison = etudiant.peut_passer_niveau_superieur(nb_dettes=nb_dettes)
         
         etudiants_avec_dettes.append({
             'etudiant': etudiant,
@@ -436,23 +467,6 @@ def passage_manuel_liste(request):
             'doit_redoubler': nb_dettes >= 4 and not etudiant.passage_manuel
         })
     
-    # Filtres
-    departement_id = request.GET.get('departement', '')
-    niveau_id = request.GET.get('niveau', '')
-    afficher_tous = request.GET.get('tous', '') == 'oui'
-    
-    if departement_id:
-        etudiants_avec_dettes = [
-            e for e in etudiants_avec_dettes 
-            if str(e['etudiant'].departement.id) == departement_id
-        ]
-    
-    if niveau_id:
-        etudiants_avec_dettes = [
-            e for e in etudiants_avec_dettes 
-            if str(e['etudiant'].niveau.id) == niveau_id
-        ]
-    
     # Par défaut, afficher seulement ceux qui doivent redoubler (4+ dettes)
     if not afficher_tous:
         etudiants_avec_dettes = [
@@ -617,19 +631,26 @@ def passage_manuel_historique(request):
         )
     
     # Statistiques
+    # Une seule requête groupée (niveau, département), répartitions calculées en mémoire
+    par_niveau = defaultdict(int)
+    par_departement = defaultdict(int)
+    for ligne in etudiants.order_by().values('niveau__code', 'departement__code').annotate(total=Count('id')):
+        par_niveau[ligne['niveau__code']] += ligne['total']
+        par_departement[ligne['departement__code']] += ligne['total']
+    
     stats = {
-        'total': etudiants.count(),
-        'par_niveau': etudiants.values('niveau__code').annotate(
-            total=Count('id')
-        ).order_by('niveau__code'),
-        'par_departement': etudiants.values('departement__code').annotate(
-            total=Count('id')
-        ).order_by('departement__code'),
+        'total': sum(par_niveau.values()),
+        'par_niveau': [
+            {'niveau__code': code, 'total': total} for code, total in sorted(par_niveau.items())
+        ],
+        'par_departement': [
+            {'departement__code': code, 'total': total} for code, total in sorted(par_departement.items())
+        ],
     }
     
     # Données pour filtres
     departements = Departement.objects.all()
-    annees = AnneeAcademique.objects.all().order_by('-date_debut')
+    annees = AnneeAcademique.get_toutes()
     niveaux = Niveau.objects.all().order_by('ordre')
     
     context = {
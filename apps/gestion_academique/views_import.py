@@ -5,28 +5,25 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponse
 from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
 from datetime import datetime, date
+import codecs
 import csv
-import re
-import unicodedata
+import hashlib
 import openpyxl
 from openpyxl import Workbook
-from io import BytesIO, StringIO
+from io import BytesIO
 
+from apps.authentication.models import Profile
+from apps.authentication.services import TableauBordService
+from apps.taches.services import TacheService
+from config.import_utils import normaliser_entete
 from .models import Etudiant, Departement, Niveau, AnneeAcademique
 from .forms import ImportEtudiantsForm
 
 
-def normaliser_entete(entete):
-    if entete is None:
-        return ''
-
-    entete = str(entete).strip().lower()
-    entete = unicodedata.normalize('NFKD', entete).encode('ascii', 'ignore').decode('ascii')
-    entete = re.sub(r'[^a-z0-9]+', '_', entete)
-    return entete.strip('_')
-
-
 HEADER_ALIASES = {
     'matricule': 'matricule',
     'numero_matricule': 'matricule',
@@ -68,27 +65,67 @@ HEADER_ALIASES = {
 }
 
 
+# Matricules vérifiés (requêtes IN) et étudiants créés (bulk_create) par lots :
+# quelques requêtes par lot, quel que soit le nombre de lignes du fichier
+TAILLE_LOT_IMPORT = 500
+
+# Analyse d'un fichier conservée en base (cache 'imports') jusqu'à la confirmation (secondes)
+DUREE_ANALYSE_IMPORT = 3600
+
+COLONNES_REQUISES = [
+    'matricule', 'nom', 'prenom', 'date_naissance',
+    'lieu_naissance', 'sexe', 'niveau', 'departement'
+]
+
+
 def lire_lignes_fichier(fichier):
+    """
+    Lit le fichier (CSV ou Excel) ligne par ligne, sans le charger en mémoire
+    Générateur : chaque ligne est une liste de valeurs, en-tête compris
+    """
     filename = getattr(fichier, 'name', '')
-    contenu = fichier.read()
-    if isinstance(contenu, str):
-        contenu = contenu.encode('utf-8')
+    if hasattr(fichier, 'seek'):
+        fichier.seek(0)
 
     if filename.lower().endswith('.csv'):
-        texte = contenu.decode('utf-8-sig')
-        return [row for row in csv.reader(StringIO(texte)) if row]
+        for row in csv.reader(codecs.iterdecode(fichier, 'utf-8-sig')):
+            if row:
+                yield row
+        return
 
     try:
-        wb = openpyxl.load_workbook(BytesIO(contenu), data_only=True)
-        ws = wb.active
-        return [[cell.value for cell in row] for row in ws.iter_rows(values_only=True)]
+        wb = openpyxl.load_workbook(fichier, read_only=True, data_only=True)
     except Exception as e:
         raise ValueError(f"Impossible de lire ce fichier Excel : {str(e)}")
 
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        wb.close()
+
+
+def mapper_entetes(raw_headers):
+    """Index de colonne de chaque champ reconnu : {champ: index}"""
+    header_map = {}
+    for index, raw_header in enumerate(raw_headers):
+        clé = normaliser_entete(raw_header)
+        if clé in HEADER_ALIASES:
+            champ = HEADER_ALIASES[clé]
+            if champ not in header_map:
+                header_map[champ] = index
+    return header_map
+
 
 @login_required
 def import_etudiants_page(request):
-    """Page d'import des étudiants depuis Excel - Admin + Chef"""
+    """
+    Page d'import des étudiants depuis Excel - Admin + Chef
+    Import en deux étapes :
+    1. Envoi du fichier : analyse complète sans écriture, rapport affiché
+       (analyse conservée dans le cache 'imports', en base, rattachée au contenu du fichier)
+    2. Confirmation : création des lignes déjà analysées, sans relire le fichier
+    """
     
     # PERMISSION : Admin OU Chef de département
     if not (request.user.profile.is_admin() or request.user.profile.is_chef_departement()):
@@ -100,6 +137,35 @@ def import_etudiants_page(request):
     if request.user.profile.is_chef_departement():
         departement_limite = request.user.profile.departement
     
+    if request.method == 'POST' and 'jeton' in request.POST:
+        # ÉTAPE 2 : confirmation de l'import analysé
+        cle = cle_analyse_import(request.user, request.POST['jeton'])
+        analyse = caches['imports'].get(cle)
+        annee = AnneeAcademique.objects.filter(pk=request.POST.get('annee_academique') or None).first()
+        
+        if analyse is None or annee is None:
+            messages.error(request, "Analyse expirée ou introuvable : veuillez renvoyer le fichier.")
+            return redirect('gestion_academique:import_etudiants')
+        
+        resultat = appliquer_import_etudiants(analyse, annee, request.user)
+        caches['imports'].delete(cle)
+        
+        # Afficher les résultats
+        if resultat['succes'] > 0:
+            messages.success(request, f"✅ {resultat['succes']} étudiant(s) importé(s) avec succès !")
+            messages.info(
+                request,
+                "🔑 Les mots de passe initiaux (matricule) sont attribués en arrière-plan : "
+                "les étudiants pourront se connecter à la fin de la tâche."
+            )
+        
+        context = {
+            'form': ImportEtudiantsForm(),
+            'resultat': resultat,
+            'departement_limite': departement_limite,
+        }
+        return render(request, 'gestion_academique/import_etudiants.html', context)
+    
     if request.method == 'POST':
         form = ImportEtudiantsForm(request.POST, request.FILES)
         
@@ -107,16 +173,20 @@ def import_etudiants_page(request):
             fichier = request.FILES['fichier_excel']
             annee = form.cleaned_data['annee_academique']
             
-            # Traiter le fichier avec limitation département si chef
-            resultat = traiter_fichier_excel(fichier, annee, departement_limite)
-            
-            # Afficher les résultats
-            if resultat['succes'] > 0:
-                messages.success(request, f"✅ {resultat['succes']} étudiant(s) importé(s) avec succès !")
+            # ÉTAPE 1 : analyse sans écriture (fichier déjà analysé : rapport en cache)
+            jeton = empreinte_fichier(fichier)
+            cle = cle_analyse_import(request.user, jeton)
+            analyse = caches['imports'].get(cle)
+            if analyse is None:
+                analyse = analyser_fichier_etudiants(fichier, departement_limite)
+                caches['imports'].set(cle, analyse, DUREE_ANALYSE_IMPORT)
             
             context = {
-                'form': ImportEtudiantsForm(),
-                'resultat': resultat,
+                'form': ImportEtudiantsForm(initial={'annee_academique': annee}),
+                'resultat': analyse,
+                'simulation': True,
+                'jeton': jeton,
+                'annee': annee,
                 'departement_limite': departement_limite,
             }
             return render(request, 'gestion_academique/import_etudiants.html', context)
@@ -131,230 +201,332 @@ def import_etudiants_page(request):
     return render(request, 'gestion_academique/import_etudiants.html', context)
 
 
-def traiter_fichier_excel(fichier, annee_academique, departement_limite=None):
+def empreinte_fichier(fichier):
+    """SHA-256 du contenu du fichier envoyé (lu par morceaux)"""
+    empreinte = hashlib.sha256()
+    for morceau in fichier.chunks():
+        empreinte.update(morceau)
+    return empreinte.hexdigest()
+
+
+def cle_analyse_import(user, jeton):
+    """Clé de cache de l'analyse d'un fichier pour un utilisateur"""
+    return f"import_etudiants:{user.pk}:{jeton}"
+
+
+def traiter_fichier_excel(fichier, annee_academique, departement_limite=None, utilisateur=None):
     """
-    Traite un fichier Excel et crée les étudiants
+    Traite un fichier Excel et crée les étudiants (analyse puis création, sans confirmation)
     departement_limite : Si défini, seuls les étudiants de ce département seront importés
     Retourne : {'succes': int, 'erreurs': list, 'details': list}
     """
+    analyse = analyser_fichier_etudiants(fichier, departement_limite)
+    resultat = appliquer_import_etudiants(analyse, annee_academique, utilisateur)
+    resultat['erreurs'] = analyse['erreurs'] + resultat['erreurs']
+    return resultat
+
+
+def analyser_fichier_etudiants(fichier, departement_limite=None):
+    """
+    Analyse complète d'un fichier d'import, sans aucune écriture en base
+    Le fichier est lu au fil de l'eau ; départements et niveaux sont chargés
+    une fois, les matricules vérifiés par lots de TAILLE_LOT_IMPORT
+    Retourne : {
+        'erreurs': list,  # erreurs par ligne (même format que traiter_fichier_excel)
+        'details': list,  # lignes 'À créer' et 'Existant (ignoré)'
+        'lignes': list,   # [(row_num, champs)] prêtes pour appliquer_import_etudiants
+    }
+    """
     
-    resultat = {
-        'succes': 0,
+    analyse = {
         'erreurs': [],
-        'details': []
+        'details': [],
+        'lignes': []
     }
     
     try:
         # Lire le fichier Excel ou CSV
         lignes = lire_lignes_fichier(fichier)
-        if not lignes:
-            resultat['erreurs'].append('Le fichier est vide ou illisible.')
-            return resultat
+        raw_headers = next(lignes, None)
+        if raw_headers is None:
+            analyse['erreurs'].append('Le fichier est vide ou illisible.')
+            return analyse
 
-        raw_headers = lignes[0]
         if not raw_headers or not any(str(c).strip() for c in raw_headers):
-            resultat['erreurs'].append('Ligne d en-tête invalide ou manquante.')
-            return resultat
-
-        header_map = {}
-        for index, raw_header in enumerate(raw_headers):
-            clé = normaliser_entete(raw_header)
-            if clé in HEADER_ALIASES:
-                champ = HEADER_ALIASES[clé]
-                if champ not in header_map:
-                    header_map[champ] = index
-
-        colonnes_requises = [
-            'matricule', 'nom', 'prenom', 'date_naissance',
-            'lieu_naissance', 'sexe', 'niveau', 'departement'
-        ]
-        colonnes_manquantes = [col for col in colonnes_requises if col not in header_map]
+            analyse['erreurs'].append('Ligne d en-tête invalide ou manquante.')
+            return analyse
+
+        header_map = mapper_entetes(raw_headers)
+        colonnes_manquantes = [col for col in COLONNES_REQUISES if col not in header_map]
         if colonnes_manquantes:
-            resultat['erreurs'].append(f"Colonnes manquantes : {', '.join(colonnes_manquantes)}")
-            return resultat
+            analyse['erreurs'].append(f"Colonnes manquantes : {', '.join(colonnes_manquantes)}")
+            return analyse
+
+        # Référentiels chargés une seule fois pour tout le fichier
+        departements = {d.code: d for d in Departement.objects.all()}
+        niveaux = {n.code: n for n in Niveau.objects.all()}
+        matricules_retenus = set()
+        lot = []
 
         # Traiter chaque ligne (à partir de la ligne 2)
-        for row_num, row in enumerate(lignes[1:], start=2):
-            try:
-                data = {}
-                for champ, index in header_map.items():
-                    data[champ] = row[index] if index < len(row) and row[index] is not None else ''
+        for row_num, row in enumerate(lignes, start=2):
+            data = {}
+            for champ, index in header_map.items():
+                data[champ] = row[index] if index < len(row) and row[index] is not None else ''
 
-                # Ignorer les lignes vides (matricule vide)
-                matricule = str(data.get('matricule', '')).strip()
-                if not matricule:
-                    continue
+            # Ignorer les lignes vides (matricule vide)
+            matricule = str(data.get('matricule', '')).strip()
+            if not matricule:
+                continue
 
-                # VÉRIFICATION DÉPARTEMENT (si chef)
-                if departement_limite:
-                    dept_code = str(data.get('departement', '')).strip().upper()
-                    if dept_code != departement_limite.code:
-                        resultat['erreurs'].append({
-                            'ligne': row_num,
-                            'erreur': f"Département '{dept_code}' non autorisé. Vous ne pouvez importer que des étudiants {departement_limite.code}"
-                        })
-                        continue
-
-                # Valider et créer l'étudiant
-                etudiant, created = creer_etudiant_depuis_ligne(data, annee_academique, row_num)
-
-                if created:
-                    resultat['succes'] += 1
-                    resultat['details'].append({
-                        'ligne': row_num,
-                        'matricule': etudiant.matricule,
-                        'nom': etudiant.get_full_name(),
-                        'departement': etudiant.departement.code,
-                        'statut': 'Créé'
-                    })
-                else:
-                    resultat['details'].append({
+            # VÉRIFICATION DÉPARTEMENT (si chef)
+            if departement_limite:
+                dept_code = str(data.get('departement', '')).strip().upper()
+                if dept_code != departement_limite.code:
+                    analyse['erreurs'].append({
                         'ligne': row_num,
-                        'matricule': matricule,
-                        'nom': f"{str(data.get('nom', '')).strip()} {str(data.get('prenom', '')).strip()}",
-                        'departement': str(data.get('departement', '')).strip(),
-                        'statut': 'Existant (ignoré)'
+                        'erreur': f"Département '{dept_code}' non autorisé. Vous ne pouvez importer que des étudiants {departement_limite.code}"
                     })
+                    continue
+
+            lot.append((row_num, matricule, data))
+            if len(lot) >= TAILLE_LOT_IMPORT:
+                verifier_lot_etudiants(lot, departements, niveaux, matricules_retenus, analyse)
+                lot = []
 
-            except Exception as e:
-                resultat['erreurs'].append({
-                    'ligne': row_num,
-                    'erreur': str(e)
-                })
+        if lot:
+            verifier_lot_etudiants(lot, departements, niveaux, matricules_retenus, analyse)
     
     except Exception as e:
-        resultat['erreurs'].append({
+        analyse['erreurs'].append({
             'ligne': 'Fichier',
             'erreur': f"Erreur lecture fichier : {str(e)}"
         })
     
+    return analyse
+
+
+def verifier_lot_etudiants(lot, departements, niveaux, matricules_retenus, analyse):
+    """
+    Valide un lot de lignes [(row_num, matricule, data)] sans écrire
+    - 2 requêtes IN pour les matricules déjà présents (étudiants, comptes)
+    - validation de chaque ligne en mémoire (preparer_etudiant)
+    matricules_retenus : matricules déjà retenus plus haut dans le fichier (doublons ignorés)
+    """
+    matricules = [matricule for _, matricule, _ in lot]
+    etudiants_existants = set(
+        Etudiant.objects.filter(matricule__in=matricules).values_list('matricule', flat=True)
+    )
+    comptes_existants = set(
+        User.objects.filter(username__in=matricules).values_list('username', flat=True)
+    )
+
+    for row_num, matricule, data in lot:
+        # Étudiant déjà inscrit (en base ou plus haut dans le fichier)
+        if matricule in etudiants_existants or matricule in matricules_retenus:
+            analyse['details'].append({
+                'ligne': row_num,
+                'matricule': matricule,
+                'nom': f"{str(data.get('nom', '')).strip()} {str(data.get('prenom', '')).strip()}",
+                'departement': str(data.get('departement', '')).strip(),
+                'statut': 'Existant (ignoré)'
+            })
+            continue
+
+        try:
+            champs = preparer_etudiant(data, matricule, departements, niveaux)
+            if matricule in comptes_existants:
+                raise ValueError(f"Le matricule {matricule} est déjà utilisé comme identifiant")
+        except ValueError as e:
+            analyse['erreurs'].append({'ligne': row_num, 'erreur': str(e)})
+            continue
+
+        matricules_retenus.add(matricule)
+        analyse['lignes'].append((row_num, champs))
+        analyse['details'].append({
+            'ligne': row_num,
+            'matricule': matricule,
+            'nom': f"{champs['nom']} {champs['prenom']}",
+            'departement': champs['departement'].code,
+            'statut': 'À créer'
+        })
+
+
+def appliquer_import_etudiants(analyse, annee_academique, utilisateur=None):
+    """
+    Crée les étudiants d'une analyse (analyser_fichier_etudiants) sans relire le fichier
+    Les matricules sont revérifiés (inscriptions faites depuis l'analyse), puis
+    comptes, étudiants et profils créés dans une seule transaction : tout ou rien
+    Retourne : {'succes': int, 'erreurs': list, 'details': list}
+    """
+    resultat = {
+        'succes': 0,
+        'erreurs': [],
+        'details': []
+    }
+    lignes = analyse['lignes']
+
+    etudiants_existants = set()
+    comptes_existants = set()
+    for debut in range(0, len(lignes), TAILLE_LOT_IMPORT):
+        matricules = [champs['matricule'] for _, champs in lignes[debut:debut + TAILLE_LOT_IMPORT]]
+        etudiants_existants.update(
+            Etudiant.objects.filter(matricule__in=matricules).values_list('matricule', flat=True)
+        )
+        comptes_existants.update(
+            User.objects.filter(username__in=matricules).values_list('username', flat=True)
+        )
+
+    details = [detail for detail in analyse['details'] if detail['statut'] != 'À créer']
+    a_creer = []
+    for row_num, champs in lignes:
+        matricule = champs['matricule']
+        if matricule in etudiants_existants:
+            details.append({
+                'ligne': row_num,
+                'matricule': matricule,
+                'nom': f"{champs['nom']} {champs['prenom']}",
+                'departement': champs['departement'].code,
+                'statut': 'Existant (ignoré)'
+            })
+        elif matricule in comptes_existants:
+            resultat['erreurs'].append({
+                'ligne': row_num,
+                'erreur': f"Le matricule {matricule} est déjà utilisé comme identifiant"
+            })
+        else:
+            a_creer.append((row_num, champs))
+
+    if a_creer:
+        details += creer_etudiants(a_creer, annee_academique, resultat, utilisateur)
+
+    # Détails dans l'ordre des lignes du fichier
+    resultat['details'] = sorted(details, key=lambda detail: detail['ligne'])
     return resultat
 
-def creer_etudiant_depuis_ligne(data, annee_academique, row_num):
+
+def creer_etudiants(a_creer, annee_academique, resultat, utilisateur=None):
     """
-    Crée un étudiant depuis une ligne du fichier Excel
-    Retourne : (etudiant, created)
+    Crée comptes, étudiants et profils de lignes validées [(row_num, champs)]
+    dans une transaction (bulk_create par lots de TAILLE_LOT_IMPORT)
+    Le hachage des mots de passe initiaux (PBKDF2, l'essentiel du temps d'import)
+    est confié au worker : comptes créés sans mot de passe utilisable, puis
+    tâche 'mots_de_passe_etudiants' (resultat['tache_mots_de_passe'])
+    Retourne : détails des étudiants créés
     """
-    
     try:
-        # Vérifier si l'étudiant existe déjà
-        matricule = str(data['matricule']).strip()
-        
-        if Etudiant.objects.filter(matricule=matricule).exists():
-            return Etudiant.objects.get(matricule=matricule), False
-        
-        # Récupérer le département
-        dept_code = str(data['departement']).strip().upper()
-        try:
-            departement = Departement.objects.get(code=dept_code)
-        except Departement.DoesNotExist:
-            raise ValueError(f"Le département '{dept_code}' n'existe pas")
-        
-        # Récupérer le niveau
-        niveau_code = str(data['niveau']).strip().upper()
-        try:
-            niveau = Niveau.objects.get(code=niveau_code)
-        except Niveau.DoesNotExist:
-            raise ValueError(f"Le niveau '{niveau_code}' n'existe pas")
-        
-        # Parser la date de naissance
-        date_naissance = data['date_naissance']
-        if isinstance(date_naissance, str):
-            for fmt in ('%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%Y/%m/%d'):
-                try:
-                    date_naissance = datetime.strptime(date_naissance, fmt).date()
-                    break
-                except Exception:
-                    continue
-            else:
-                raise ValueError(f"Format de date invalide : {date_naissance}. Utilisez JJ/MM/AAAA ou AAAA-MM-JJ")
-        elif isinstance(date_naissance, datetime):
-            date_naissance = date_naissance.date()
-        elif isinstance(date_naissance, date):
-            pass
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=champs['matricule'],
+                    password=make_password(None),
+                    first_name=champs['prenom'],
+                    last_name=champs['nom']
+                )
+                for _, champs in a_creer
+            ], batch_size=TAILLE_LOT_IMPORT)
+            etudiants = Etudiant.objects.bulk_create([
+                Etudiant(annee_academique=annee_academique, statut='actif', **champs)
+                for _, champs in a_creer
+            ], batch_size=TAILLE_LOT_IMPORT)
+            # bulk_create n'émet pas post_save : profils créés ici
+            Profile.objects.bulk_create([
+                Profile(user=user, role='etudiant', etudiant=etudiant)
+                for user, etudiant in zip(users, etudiants)
+            ], batch_size=TAILLE_LOT_IMPORT)
+    except DatabaseError as e:
+        # Import annulé en entier (ex : matricule créé entre-temps par un autre import)
+        for row_num, _ in a_creer:
+            resultat['erreurs'].append({
+                'ligne': row_num,
+                'erreur': f"Erreur lors de la création de l'étudiant : {str(e)}"
+            })
+        return []
+
+    # bulk_create n'émet pas post_save : compteurs de la page d'accueil invalidés ici
+    TableauBordService.invalider()
+
+    tache = TacheService.planifier(
+        'mots_de_passe_etudiants',
+        parametres={'comptes': [user.pk for user in users]},
+        utilisateur=utilisateur
+    )
+    resultat['tache_mots_de_passe'] = tache.pk
+
+    resultat['succes'] += len(etudiants)
+    return [
+        {
+            'ligne': row_num,
+            'matricule': etudiant.matricule,
+            'nom': etudiant.get_full_name(),
+            'departement': etudiant.departement.code,
+            'statut': 'Créé'
+        }
+        for (row_num, _), etudiant in zip(a_creer, etudiants)
+    ]
+
+
+def preparer_etudiant(data, matricule, departements, niveaux):
+    """
+    Valide une ligne du fichier sans accès à la base
+    departements / niveaux : {code: objet}
+    Retourne : champs de l'Etudiant à créer
+    Lève ValueError (message en français) si la ligne est invalide
+    """
+    
+    # Récupérer le département
+    dept_code = str(data['departement']).strip().upper()
+    departement = departements.get(dept_code)
+    if departement is None:
+        raise ValueError(f"Le département '{dept_code}' n'existe pas")
+    
+    # Récupérer le niveau
+    niveau_code = str(data['niveau']).strip().upper()
+    niveau = niveaux.get(niveau_code)
+    if niveau is None:
+        raise ValueError(f"Le niveau '{niveau_code}' n'existe pas")
+    
+    # Parser la date de naissance
+    date_naissance = data['date_naissance']
+    if isinstance(date_naissance, str):
+        for fmt in ('%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%Y/%m/%d'):
+            try:
+                date_naissance = datetime.strptime(date_naissance.strip(), fmt).date()
+                break
+            except Exception:
+                continue
         else:
             raise ValueError(f"Format de date invalide : {date_naissance}. Utilisez JJ/MM/AAAA ou AAAA-MM-JJ")
-        
-        # Valider le sexe
-        sexe = str(data['sexe']).strip().upper()
-        if sexe not in ['M', 'F']:
-            raise ValueError(f"Sexe invalide : {sexe}. Utilisez M ou F")
-        
-        # Vérifier si le username (matricule) existe déjà
-        if User.objects.filter(username=matricule).exists():
-            raise ValueError(f"Le matricule {matricule} est déjà utilisé comme identifiant")
-        
-        # Créer le compte utilisateur
-        try:
-            user = User.objects.create_user(
-                username=matricule,
-                password=matricule,  # Mot de passe = matricule
-                first_name=data['prenom'],
-                last_name=data['nom']
-            )
-        except Exception as e:
-            if 'UNIQUE constraint failed' in str(e):
-                raise ValueError(f"Le matricule {matricule} existe déjà dans le système")
-            raise ValueError(f"Erreur lors de la création du compte utilisateur : {str(e)}")
-        
-        # Générer l'email si vide
-        email = data.get('email', '').strip()
-        if not email:
-            email = f"{matricule.replace('-', '')}@student.uganc.edu.gn"
-        
-        # Créer l'étudiant
-        try:
-            etudiant = Etudiant.objects.create(
-                matricule=matricule,
-                nom=data['nom'],
-                prenom=data['prenom'],
-                date_naissance=date_naissance,
-                lieu_naissance=data['lieu_naissance'],
-                sexe=sexe,
-                email=email,
-                telephone=data.get('telephone', '').strip(),
-                adresse=data.get('adresse', '').strip(),
-                departement=departement,
-                niveau=niveau,
-                annee_academique=annee_academique,
-                statut='actif'
-            )
-        except Exception as e:
-            # Supprimer le user créé si l'étudiant ne peut pas être créé
-            user.delete()
-            
-            # Traduire les erreurs SQLite en français
-            error_msg = str(e)
-            if 'NOT NULL constraint failed' in error_msg:
-                if 'email' in error_msg:
-                    raise ValueError("L'adresse email est obligatoire")
-                elif 'telephone' in error_msg:
-                    raise ValueError("Le numéro de téléphone est obligatoire")
-                else:
-                    raise ValueError("Un champ obligatoire est manquant")
-            elif 'UNIQUE constraint failed' in error_msg:
-                if 'matricule' in error_msg:
-                    raise ValueError(f"Le matricule {matricule} existe déjà")
-                elif 'email' in error_msg:
-                    raise ValueError(f"L'email {email} est déjà utilisé")
-                else:
-                    raise ValueError("Une valeur unique est en doublon")
-            else:
-                raise ValueError(f"Erreur lors de la création de l'étudiant : {error_msg}")
-        
-        # Lier le profil
-        user.profile.role = 'etudiant'
-        user.profile.etudiant = etudiant
-        user.profile.save()
-        
-        return etudiant, True
+    elif isinstance(date_naissance, datetime):
+        date_naissance = date_naissance.date()
+    elif isinstance(date_naissance, date):
+        pass
+    else:
+        raise ValueError(f"Format de date invalide : {date_naissance}. Utilisez JJ/MM/AAAA ou AAAA-MM-JJ")
     
-    except ValueError as e:
-        # Les ValueError sont déjà en français
-        raise e
-    except Exception as e:
-        # Autres erreurs
-        raise ValueError(f"Erreur inattendue : {str(e)}")
+    # Valider le sexe
+    sexe = str(data['sexe']).strip().upper()
+    if sexe not in ['M', 'F']:
+        raise ValueError(f"Sexe invalide : {sexe}. Utilisez M ou F")
+    
+    # Générer l'email si vide
+    email = str(data.get('email', '')).strip()
+    if not email:
+        email = f"{matricule.replace('-', '')}@student.uganc.edu.gn"
+    
+    return {
+        'matricule': matricule,
+        'nom': str(data['nom']).strip(),
+        'prenom': str(data['prenom']).strip(),
+        'date_naissance': date_naissance,
+        'lieu_naissance': str(data['lieu_naissance']).strip(),
+        'sexe': sexe,
+        'email': email,
+        'telephone': str(data.get('telephone', '')).strip(),
+        'adresse': str(data.get('adresse', '')).strip(),
+        'departement': departement,
+        'niveau': niveau,
+    }
 
 
 @login_required
@@ -3,7 +3,7 @@
 MODULE 3 : Gestion des Notes - Admin
 """
 from django.contrib import admin
-from .models import Note, UniteEnseignement
+from .models import Note, ResultatUE, UniteEnseignement
 
 
 @admin.register(UniteEnseignement)
@@ -35,4 +35,11 @@ class NoteAdmin(admin.ModelAdmin):
         ('Workflow', {
             'fields': ('statut', 'date_creation', 'date_modification', 'date_soumission', 'date_validation')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(ResultatUE)
+class ResultatUEAdmin(admin.ModelAdmin):
+    list_display = ['etudiant', 'ue', 'moyenne', 'note_litterale', 'valide', 'date_maj']
+    list_filter = ['valide', 'ue__semestre']
+    search_fields = ['etudiant__matricule', 'etudiant__nom', 'ue__code']
+    readonly_fields = ['etudiant', 'ue', 'moyenne', 'note_litterale', 'valide', 'date_maj']
@@ -0,0 +1,116 @@
+# gestion_notes/classeur.py
+"""
+Lecture des classeurs Excel de notes : une feuille par matière (titre = code
+de la matière), une ligne par étudiant (matricule, note1, note2, note3)
+Aucun accès à la base : les feuilles peuvent être lues par des processus
+séparés (voir ImportNotesService.lire_classeur)
+"""
+import openpyxl
+
+from config.import_utils import normaliser_entete
+
+
+CHAMPS_NOTES = ('note1', 'note2', 'note3')
+
+ENTETES_NOTES = {
+    'matricule': 'matricule',
+    'numero_matricule': 'matricule',
+    'no_matricule': 'matricule',
+    'note1': 'note1',
+    'note_1': 'note1',
+    'n1': 'note1',
+    'note2': 'note2',
+    'note_2': 'note2',
+    'n2': 'note2',
+    'note3': 'note3',
+    'note_3': 'note3',
+    'n3': 'note3',
+}
+
+
+def lister_feuilles(chemin):
+    """Titres des feuilles du classeur (ValueError si le fichier est illisible)"""
+    try:
+        wb = openpyxl.load_workbook(chemin, read_only=True)
+    except Exception as e:
+        raise ValueError(f"Impossible de lire ce classeur Excel : {str(e)}")
+
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def lire_note(valeur):
+    """
+    Convertit une cellule en note sur 10 (None si vide)
+    Lève ValueError si la valeur n'est pas un nombre entre 0 et 10
+    """
+    if valeur is None or (isinstance(valeur, str) and not valeur.strip()):
+        return None
+
+    if isinstance(valeur, str):
+        valeur = valeur.strip().replace(',', '.')
+
+    try:
+        note = float(valeur)
+    except (TypeError, ValueError):
+        raise ValueError(f"Note invalide : {valeur}")
+
+    if not 0 <= note <= 10:
+        raise ValueError(f"Note hors limites : {valeur} (entre 0 et 10)")
+    return note
+
+
+def lire_feuille(chemin, nom_feuille):
+    """
+    Lit une feuille de notes
+
+    Returns:
+        dict: {
+            'feuille': titre de la feuille (code matière),
+            'lignes': [(row_num, matricule, {'note1', 'note2', 'note3'})],
+            'erreurs': [{'feuille', 'ligne', 'erreur'}],
+        }
+    """
+    resultat = {'feuille': nom_feuille, 'lignes': [], 'erreurs': []}
+
+    def erreur(ligne, message):
+        resultat['erreurs'].append({'feuille': nom_feuille, 'ligne': ligne, 'erreur': message})
+
+    wb = openpyxl.load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        lignes = wb[nom_feuille].iter_rows(values_only=True)
+
+        entetes = next(lignes, None) or ()
+        colonnes = {}
+        for index, entete in enumerate(entetes):
+            champ = ENTETES_NOTES.get(normaliser_entete(entete))
+            if champ and champ not in colonnes:
+                colonnes[champ] = index
+
+        manquantes = [champ for champ in ('matricule',) + CHAMPS_NOTES if champ not in colonnes]
+        if manquantes:
+            erreur('En-tête', f"Colonnes manquantes : {', '.join(manquantes)}")
+            return resultat
+
+        for row_num, row in enumerate(lignes, start=2):
+            index = colonnes['matricule']
+            matricule = str(row[index]).strip() if index < len(row) and row[index] is not None else ''
+            if not matricule:
+                continue
+
+            try:
+                notes = {
+                    champ: lire_note(row[colonnes[champ]] if colonnes[champ] < len(row) else None)
+                    for champ in CHAMPS_NOTES
+                }
+            except ValueError as e:
+                erreur(row_num, f"{matricule} : {e}")
+                continue
+
+            resultat['lignes'].append((row_num, matricule, notes))
+    finally:
+        wb.close()
+
+    return resultat
@@ -42,6 +42,27 @@ class NoteForm(forms.ModelForm):
         }
 
 
+class NoteFeuilleForm(NoteForm):
+    """Ligne de la feuille de notes d'une matière (saisie groupée)"""
+    note_id = forms.IntegerField(widget=forms.HiddenInput)
+
+
+# Feuille complète : une ligne par note modifiable, préfixe 'notes'
+NoteFeuilleFormSet = forms.formset_factory(NoteFeuilleForm, extra=0)
+
+
+class ImportNotesForm(forms.Form):
+    """Classeur Excel de notes : une feuille par matière"""
+    fichier = forms.FileField(
+        label='Classeur Excel',
+        help_text="Format .xlsx : une feuille par matière (titre = code de la matière)",
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.xlsx'
+        })
+    )
+
+
 class UniteEnseignementForm(forms.ModelForm):
     """Formulaire pour créer une UE"""
     class Meta:
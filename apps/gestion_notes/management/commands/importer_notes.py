@@ -0,0 +1,50 @@
+# gestion_notes/management/commands/importer_notes.py
+"""
+Import des notes depuis un classeur Excel (une feuille par matière)
+Usage : python manage.py importer_notes classeur.xlsx [--enseignant ENS-001] [--processus 4]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.gestion_academique.models import Enseignant
+from apps.gestion_notes.services import ImportNotesService
+
+
+class Command(BaseCommand):
+    help = "Importe en brouillon les notes d'un classeur Excel (titre de feuille = code de la matière)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('classeur', help="Chemin du fichier .xlsx")
+        parser.add_argument('--enseignant', help="Code de l'enseignant (limite l'import à ses matières)")
+        parser.add_argument(
+            '--processus',
+            type=int,
+            help="Processus de lecture des feuilles (défaut : IMPORT_NOTES_PROCESSUS)"
+        )
+
+    def handle(self, *args, **options):
+        enseignant = None
+        if options['enseignant']:
+            try:
+                enseignant = Enseignant.objects.get(code=options['enseignant'])
+            except Enseignant.DoesNotExist:
+                raise CommandError(f"Enseignant {options['enseignant']} introuvable")
+
+        try:
+            rapport = ImportNotesService.importer(
+                options['classeur'], enseignant, options['processus'] or settings.IMPORT_NOTES_PROCESSUS
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for feuille in rapport['feuilles']:
+            self.stdout.write(
+                f"  {feuille['feuille']} : {feuille['creees']} créée(s), "
+                f"{feuille['modifiees']} modifiée(s), {feuille['inchangees']} inchangée(s)"
+            )
+        for erreur in rapport['erreurs']:
+            self.stdout.write(self.style.WARNING(f"  [{erreur['feuille']} - {erreur['ligne']}] {erreur['erreur']}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {rapport['creees']} note(s) créée(s), {rapport['modifiees']} modifiée(s) en {rapport['duree']:.2f} s"
+        ))
@@ -0,0 +1,36 @@
+# gestion_notes/management/commands/reconstruire_resultats_ue.py
+"""
+Reconstruction de la table des résultats UE à partir des notes validées
+Usage : python manage.py reconstruire_resultats_ue [--departement NTIC] [--niveau L1]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.gestion_academique.models import Etudiant
+from apps.gestion_notes.services import ResultatUEService
+
+
+class Command(BaseCommand):
+    help = "Recalcule en masse les moyennes UE (table ResultatUE) de tous les étudiants filtrés"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departement', help="Code du département (ex : NTIC)")
+        parser.add_argument('--niveau', help="Code du niveau (ex : L1)")
+
+    def handle(self, *args, **options):
+        etudiants = Etudiant.objects.all()
+
+        if options['departement']:
+            etudiants = etudiants.filter(departement__code=options['departement'])
+        if options['niveau']:
+            etudiants = etudiants.filter(niveau__code=options['niveau'])
+
+        def progression(traites, total):
+            self.stdout.write(f"  {traites}/{total} étudiant(s)")
+
+        debut = time.perf_counter()
+        nombre = ResultatUEService.reconstruire(etudiants, progression=progression)
+        duree = time.perf_counter() - debut
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {nombre} résultat(s) UE enregistré(s) en {duree:.2f} s"))
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.10 on 2026-10-17 22:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+# Barème des notes littérales figé à la date de la migration
+# (copie de UniteEnseignement.note_litterale_pour_moyenne)
+BAREME_NOTES_LITTERALES = (
+    (9.00, 'A+'), (8.51, 'A'), (8.00, 'A-'),
+    (7.60, 'B+'), (7.40, 'B'), (7.00, 'B-'),
+    (6.60, 'C+'), (6.40, 'C'), (6.00, 'C-'),
+    (5.60, 'D+'), (5.40, 'D'), (5.00, 'D-'),
+)
+
+
+def note_litterale(moyenne):
+    for seuil, note in BAREME_NOTES_LITTERALES:
+        if moyenne >= seuil:
+            return note
+    return 'E'
+
+
+def remplir_resultats_ue(apps, schema_editor):
+    """Calcule les résultats UE existants à partir des notes validées"""
+    Note = apps.get_model('gestion_notes', 'Note')
+    ResultatUE = apps.get_model('gestion_notes', 'ResultatUE')
+
+    lignes = Note.objects.filter(
+        statut='valide',
+        matiere__unites__isnull=False
+    ).values('etudiant_id', 'matiere__unites').annotate(
+        total_points=Sum(F('moyenne') * F('matiere__coefficient')),
+        total_coef=Sum('matiere__coefficient')
+    ).order_by()
+
+    resultats = []
+    for ligne in lignes:
+        if not ligne['total_coef']:
+            continue
+        moyenne = round(ligne['total_points'] / ligne['total_coef'], 2)
+        resultats.append(ResultatUE(
+            etudiant_id=ligne['etudiant_id'],
+            ue_id=ligne['matiere__unites'],
+            moyenne=moyenne,
+            note_litterale=note_litterale(moyenne),
+            valide=moyenne >= 5.00,
+        ))
+
+    ResultatUE.objects.bulk_create(resultats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_academique', '0005_etudiantarchive_ues_manquantes'),
+        ('gestion_notes', '0002_alter_note_enseignant_alter_note_etudiant_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultatUE',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('moyenne', models.FloatField(default=0, verbose_name='Moyenne UE')),
+                ('note_litterale', models.CharField(max_length=2, verbose_name='Note littérale')),
+                ('valide', models.BooleanField(default=False, verbose_name='UE validée')),
+                ('date_maj', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+                ('etudiant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resultats_ue', to='gestion_academique.etudiant', verbose_name='Étudiant')),
+                ('ue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resultats', to='gestion_notes.uniteenseignement', verbose_name='UE')),
+            ],
+            options={
+                'verbose_name': 'Résultat UE',
+                'verbose_name_plural': 'Résultats UE',
+                'ordering': ['ue__semestre__ordre', 'ue__code'],
+                'unique_together': {('etudiant', 'ue')},
+            },
+        ),
+        migrations.RunPython(remplir_resultats_ue, migrations.RunPython.noop),
+    ]
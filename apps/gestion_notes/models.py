@@ -4,8 +4,12 @@ MODULE 3 : Gestion des Notes - Models
 """
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
 from apps.gestion_academique.models import Etudiant, Enseignant
 from apps.structure_pedagogique.models import Matiere, Semestre
+from config.cache_utils import invalider, invalider_objets
+from .signals import notes_modifiees, notes_validees
 
 
 class UniteEnseignement(models.Model):
@@ -40,40 +44,42 @@ class UniteEnseignement(models.Model):
         """
         Calcule la moyenne de l'UE pour un étudiant
         Moyenne UE = somme(moyenne_matiere * coefficient) / somme(coefficients)
+        Seules les notes validées sont prises en compte.
+        Lue dans la table ResultatUE ; pour plusieurs étudiants/UE,
+        utiliser MoyenneUEService.lire_matrice
         """
-        total_points = 0
-        total_coef = 0
-
-        for matiere in self.matieres.all():
-            try:
-                note = Note.objects.get(
-                    etudiant=etudiant,
-                    matiere=matiere,
-                    statut='valide'
-                )
-                total_points += note.moyenne * matiere.coefficient
-                total_coef += matiere.coefficient
-            except Note.DoesNotExist:
-                # Si pas de note validée, on ignore
-                pass
-
-        if total_coef > 0:
-            return round(total_points / total_coef, 2)
-        return 0.0
+        from .services import MoyenneUEService
+
+        matrice = MoyenneUEService.lire_matrice([etudiant], [self])
+        return matrice.moyenne(etudiant, self)
 
     def get_resultat(self, etudiant):
         """Retourne le résultat de l'UE pour un étudiant"""
-        moyenne = self.calculer_moyenne_ue(etudiant)
+        return self.resultat_pour_moyenne(self.calculer_moyenne_ue(etudiant))
+
+    def get_note_litterale_ue(self, etudiant):
+        """Retourne la note littérale de l'UE pour un étudiant"""
+        return self.note_litterale_pour_moyenne(self.calculer_moyenne_ue(etudiant))
+
+    def est_valide_ue(self, etudiant):
+        """UE validée si moyenne >= 5"""
+        return self.est_valide_moyenne(self.calculer_moyenne_ue(etudiant))
+
+    # ===== RÈGLES À PARTIR D'UNE MOYENNE DÉJÀ CALCULÉE =====
+
+    @staticmethod
+    def resultat_pour_moyenne(moyenne):
+        """Résultat (admis / session / dette) correspondant à une moyenne UE"""
         if moyenne >= 5:
             return 'admis'
         elif moyenne >= 3:
             return 'session'
         else:
             return 'dette'
-    def get_note_litterale_ue(self, etudiant):
-    
-        moyenne = self.calculer_moyenne_ue(etudiant)
-        
+
+    @staticmethod
+    def note_litterale_pour_moyenne(moyenne):
+        """Note littérale correspondant à une moyenne UE"""
         if moyenne >= 9.00:
             return 'A+'
         elif moyenne >= 8.51:
@@ -101,9 +107,10 @@ class UniteEnseignement(models.Model):
         else:
             return 'E'
 
-    def est_valide_ue(self, etudiant):
-        """UE validée si moyenne >= 5"""
-        return self.calculer_moyenne_ue(etudiant) >= 5.00
+    @staticmethod
+    def est_valide_moyenne(moyenne):
+        """Une UE est validée si sa moyenne >= 5"""
+        return moyenne >= 5.00
 
 
 class Note(models.Model):
@@ -264,4 +271,157 @@ class Note(models.Model):
 
     def est_valide(self):
         """Une note est validée si moyenne >= 5"""
-        return self.moyenne >= 5.
\ No newline at end of file
+        return self.moyenne >= 5.
+
+
+class ResultatUE(models.Model):
+    """
+    Résultat d'un étudiant pour une UE, tenu à jour à chaque changement
+    des notes validées (voir ResultatUEService)
+    Absence de ligne = aucune note validée dans l'UE (moyenne 0)
+    """
+    etudiant = models.ForeignKey(
+        Etudiant,
+        on_delete=models.CASCADE,
+        related_name='resultats_ue',
+        verbose_name="Étudiant"
+    )
+    ue = models.ForeignKey(
+        UniteEnseignement,
+        on_delete=models.CASCADE,
+        related_name='resultats',
+        verbose_name="UE"
+    )
+    moyenne = models.FloatField(default=0, verbose_name="Moyenne UE")
+    note_litterale = models.CharField(max_length=2, verbose_name="Note littérale")
+    valide = models.BooleanField(default=False, verbose_name="UE validée")
+    date_maj = models.DateTimeField(auto_now=True, verbose_name="Mis à jour le")
+
+    class Meta:
+        verbose_name = "Résultat UE"
+        verbose_name_plural = "Résultats UE"
+        unique_together = ['etudiant', 'ue']
+        ordering = ['ue__semestre__ordre', 'ue__code']
+
+    def __str__(self):
+        return f"{self.etudiant} - {self.ue.code} : {self.moyenne}/10"
+
+    def get_resultat(self):
+        """Résultat (admis / session / dette) de l'UE"""
+        return UniteEnseignement.resultat_pour_moyenne(self.moyenne)
+
+
+@receiver(post_init, sender=Note)
+def memoriser_statut_note(sender, instance, **kwargs):
+    """Mémorise le statut chargé pour détecter le passage à 'valide'"""
+    # __dict__ : ne déclenche pas de requête si 'statut' est différé (.only())
+    instance._statut_initial = instance.__dict__.get('statut')
+    instance._moyenne_initiale = instance.__dict__.get('moyenne')
+
+
+@receiver(post_save, sender=Note)
+def signaler_note_validee(sender, instance, created, **kwargs):
+    """
+    Émet notes_modifiees quand une note validée apparaît, change ou disparaît
+    et notes_validees quand la note devient 'valide'
+    """
+    paires = [(instance.etudiant_id, instance.matiere_id)]
+    devient_valide = instance.statut == 'valide' and (created or instance._statut_initial != 'valide')
+    validee_modifiee = instance._statut_initial == 'valide' and (
+        instance.statut != 'valide' or instance.moyenne != instance._moyenne_initiale
+    )
+
+    # Résultats UE à jour avant les traitements qui les lisent
+    if devient_valide or validee_modifiee:
+        notes_modifiees.send(sender=Note, paires=paires)
+    if devient_valide:
+        notes_validees.send(sender=Note, paires=paires)
+
+    instance._statut_initial = instance.statut
+    instance._moyenne_initiale = instance.moyenne
+
+
+@receiver(post_delete, sender=Note)
+def signaler_note_supprimee(sender, instance, **kwargs):
+    """Émet notes_modifiees quand une note validée est supprimée"""
+    if instance.__dict__.get('statut') == 'valide':
+        notes_modifiees.send(
+            sender=Note,
+            paires=[(instance.etudiant_id, instance.matiere_id)]
+        )
+
+
+@receiver(notes_modifiees)
+def mettre_a_jour_resultats_ue(sender, paires, **kwargs):
+    """Recalcule les résultats UE des (étudiant, matière) concernés"""
+    from .services import ResultatUEService
+
+    ResultatUEService.mettre_a_jour(paires)
+
+
+@receiver(m2m_changed, sender=UniteEnseignement.matieres.through)
+def recalculer_resultats_ue(sender, instance, action, reverse, pk_set, **kwargs):
+    """Une matière ajoutée ou retirée d'une UE change les moyennes de l'UE"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    from .services import ResultatUEService
+
+    if not reverse:
+        ResultatUEService.reconstruire(ues=[instance.pk])
+    else:
+        # instance = Matière ; après un clear(), les UE retirées ne sont plus connues : toutes
+        ResultatUEService.reconstruire(ues=pk_set or None)
+
+
+@receiver(post_init, sender=Matiere)
+def memoriser_coefficient_matiere(sender, instance, **kwargs):
+    """Mémorise le coefficient chargé pour détecter sa modification"""
+    instance._coefficient_initial = instance.__dict__.get('coefficient')
+
+
+@receiver(post_save, sender=Matiere)
+def recalculer_resultats_ue_coefficient(sender, instance, created, **kwargs):
+    """
+    Le coefficient pondère les moyennes des UE de la matière : résultats
+    recalculés pour les étudiants ayant une note validée dans la matière
+    """
+    coefficient_initial = instance._coefficient_initial
+    instance._coefficient_initial = instance.coefficient
+    if created or coefficient_initial is None or coefficient_initial == instance.coefficient:
+        return
+
+    ues = list(instance.unites.values_list('pk', flat=True))
+    if not ues:
+        return
+
+    from .services import ResultatUEService
+
+    ResultatUEService.reconstruire(
+        etudiants=Etudiant.objects.filter(notes__matiere=instance, notes__statut='valide').distinct(),
+        ues=ues
+    )
+
+
+# ===== INVALIDATION DU CACHE (config/cache_utils.py) =====
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalider_cache_note(sender, instance, **kwargs):
+    """Les données en cache de l'étudiant dépendent de ses notes"""
+    invalider('etudiant', instance.etudiant_id)
+
+
+@receiver(notes_modifiees)
+def invalider_cache_notes_modifiees(sender, paires, **kwargs):
+    """Validations en masse (update()) : étudiants concernés"""
+    invalider_objets('etudiant', [etudiant_id for etudiant_id, _ in paires])
+
+
+@receiver(post_save, sender=UniteEnseignement)
+@receiver(post_delete, sender=UniteEnseignement)
+@receiver(m2m_changed, sender=UniteEnseignement.matieres.through)
+def invalider_cache_ue(sender, **kwargs):
+    """Composition ou intitulé d'une UE modifié : toutes les entrées dépendant des UE"""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalider('ue')
@@ -0,0 +1,704 @@
+# gestion_notes/services.py
+"""
+Services de calcul des moyennes d'UE
+Calcule les moyennes de N étudiants × M UE en une seule requête agrégée
+au lieu d'une requête par matière et par étudiant.
+Les moyennes sont tenues à jour dans la table ResultatUE, lue par les pages.
+Import des notes depuis les classeurs Excel des enseignants.
+"""
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.db.models import F, Q, QuerySet, Sum
+
+from apps.gestion_academique.models import Etudiant
+from apps.structure_pedagogique.models import Matiere
+from .classeur import CHAMPS_NOTES, lire_feuille, lister_feuilles
+from .models import Note, ResultatUE, UniteEnseignement
+from .signals import notes_modifiees, notes_validees
+
+
+def _pk(objet):
+    """Accepte indifféremment une instance ou un identifiant"""
+    return getattr(objet, 'pk', objet)
+
+
+class MatriceMoyennesUE:
+    """
+    Matrice des moyennes UE : {(etudiant_id, ue_id): moyenne}
+    Une UE sans note validée pour un étudiant a une moyenne de 0.0
+    (même règle que UniteEnseignement.calculer_moyenne_ue)
+    """
+
+    def __init__(self, moyennes=None):
+        self.moyennes = moyennes or {}
+
+    def moyenne(self, etudiant, ue):
+        """Moyenne de l'UE pour l'étudiant"""
+        return self.moyennes.get((_pk(etudiant), _pk(ue)), 0.0)
+
+    def resultat(self, etudiant, ue):
+        """Résultat (admis / session / dette) de l'UE pour l'étudiant"""
+        return UniteEnseignement.resultat_pour_moyenne(self.moyenne(etudiant, ue))
+
+    def note_litterale(self, etudiant, ue):
+        """Note littérale de l'UE pour l'étudiant"""
+        return UniteEnseignement.note_litterale_pour_moyenne(self.moyenne(etudiant, ue))
+
+    def est_valide(self, etudiant, ue):
+        """UE validée si moyenne >= 5"""
+        return UniteEnseignement.est_valide_moyenne(self.moyenne(etudiant, ue))
+
+
+class MoyenneUEService:
+    """
+    Service de calcul des moyennes d'UE par lots
+    """
+
+    @staticmethod
+    def calculer_matrice(etudiants, ues=None):
+        """
+        Calcule les moyennes UE pondérées par les coefficients
+        Moyenne UE = somme(moyenne_matiere * coefficient) / somme(coefficients)
+        (notes validées uniquement)
+
+        Args:
+            etudiants: QuerySet, liste d'Etudiant ou liste d'identifiants
+            ues: QuerySet, liste d'UE ou d'identifiants (None = toutes les UE)
+
+        Returns:
+            MatriceMoyennesUE
+        """
+        filtres = {'matiere__unites__isnull': False}
+        if ues is not None:
+            filtres = {'matiere__unites__in': ues}
+
+        # Un seul filter() : la jointure sur les UE est réutilisée par le regroupement
+        notes = Note.objects.filter(
+            etudiant__in=etudiants,
+            statut='valide',
+            **filtres
+        )
+
+        # Une seule requête : regroupement par (étudiant, UE)
+        lignes = notes.values(
+            'etudiant_id', 'matiere__unites'
+        ).annotate(
+            total_points=Sum(F('moyenne') * F('matiere__coefficient')),
+            total_coef=Sum('matiere__coefficient')
+        ).order_by()
+
+        moyennes = {}
+        for ligne in lignes:
+            if ligne['total_coef']:
+                moyennes[(ligne['etudiant_id'], ligne['matiere__unites'])] = round(
+                    ligne['total_points'] / ligne['total_coef'], 2
+                )
+
+        return MatriceMoyennesUE(moyennes)
+
+    @staticmethod
+    def lire_matrice(etudiants, ues=None):
+        """
+        Matrice des moyennes UE lue dans la table ResultatUE (une requête, sans agrégation)
+        Mêmes arguments et même résultat que calculer_matrice
+        """
+        resultats = ResultatUE.objects.filter(etudiant__in=etudiants)
+        if ues is not None:
+            resultats = resultats.filter(ue__in=ues)
+
+        return MatriceMoyennesUE({
+            (etudiant_id, ue_id): moyenne
+            for etudiant_id, ue_id, moyenne in resultats.values_list('etudiant_id', 'ue_id', 'moyenne')
+        })
+
+    @staticmethod
+    def ues_non_validees(etudiants, ordre_max=None):
+        """
+        Liste des UE non validées pour toute une cohorte
+        en un nombre constant de requêtes (3), quelle que soit sa taille
+
+        UE concernées pour chaque étudiant : UE de son département
+        dont le niveau est <= ordre_max (par défaut : son niveau actuel)
+
+        Args:
+            etudiants: QuerySet ou liste d'Etudiant
+            ordre_max: Ordre de niveau maximal (None = niveau de l'étudiant)
+
+        Returns:
+            dict: {etudiant_id: [ue_id, ...]}
+        """
+        from apps.gestion_academique.models import Etudiant
+
+        if not isinstance(etudiants, QuerySet):
+            etudiants = Etudiant.objects.filter(pk__in=[_pk(e) for e in etudiants])
+
+        cohorte = list(etudiants.values_list('id', 'niveau__ordre', 'departement_id'))
+        if not cohorte:
+            return {}
+
+        # Catalogue des UE : (ue, ordre du niveau, département) - 1 requête
+        ues_par_departement = defaultdict(list)
+        for ue_id, ordre, departement_id in UniteEnseignement.objects.filter(
+            matieres__departements__isnull=False
+        ).values_list('id', 'semestre__niveau__ordre', 'matieres__departements').distinct():
+            ues_par_departement[departement_id].append((ue_id, ordre))
+
+        matrice = MoyenneUEService.lire_matrice(etudiants.values('pk'))
+
+        resultat = {}
+        for etudiant_id, niveau_ordre, departement_id in cohorte:
+            plafond = niveau_ordre if ordre_max is None else ordre_max
+            resultat[etudiant_id] = [
+                ue_id for ue_id, ordre in ues_par_departement.get(departement_id, [])
+                if ordre <= plafond and not matrice.est_valide(etudiant_id, ue_id)
+            ]
+        return resultat
+
+    @staticmethod
+    def compter_ues_non_validees(etudiants, ordre_max=None):
+        """
+        Nombre d'UE non validées (dettes) pour toute une cohorte
+
+        Returns:
+            dict: {etudiant_id: nb_ues_non_validees}
+        """
+        return {
+            etudiant_id: len(ue_ids)
+            for etudiant_id, ue_ids in MoyenneUEService.ues_non_validees(etudiants, ordre_max).items()
+        }
+
+
+class ResultatUEService:
+    """
+    Tenue à jour de la table ResultatUE (moyenne, note littérale, validation
+    de chaque UE par étudiant) à partir des notes validées
+    """
+
+    TAILLE_LOT = 500
+
+    @staticmethod
+    def construire(etudiant_id, ue_id, moyenne):
+        """Ligne ResultatUE pour une moyenne calculée"""
+        return ResultatUE(
+            etudiant_id=etudiant_id,
+            ue_id=ue_id,
+            moyenne=moyenne,
+            note_litterale=UniteEnseignement.note_litterale_pour_moyenne(moyenne),
+            valide=UniteEnseignement.est_valide_moyenne(moyenne),
+        )
+
+    @staticmethod
+    def mettre_a_jour(paires):
+        """
+        Recalcule les résultats des UE contenant les matières des paires
+        (notes validées, invalidées, modifiées ou supprimées)
+
+        Args:
+            paires: Itérable de (etudiant_id, matiere_id)
+
+        Returns:
+            int: Nombre de résultats (étudiant, UE) recalculés
+        """
+        paires = set(paires)
+        if not paires:
+            return 0
+
+        ues_par_matiere = defaultdict(list)
+        for matiere_id, ue_id in UniteEnseignement.matieres.through.objects.filter(
+            matiere_id__in={matiere_id for _, matiere_id in paires}
+        ).values_list('matiere_id', 'uniteenseignement_id'):
+            ues_par_matiere[matiere_id].append(ue_id)
+
+        cibles = {
+            (etudiant_id, ue_id)
+            for etudiant_id, matiere_id in paires
+            for ue_id in ues_par_matiere[matiere_id]
+        }
+        if not cibles:
+            return 0
+
+        matrice = MoyenneUEService.calculer_matrice(
+            {etudiant_id for etudiant_id, _ in cibles},
+            {ue_id for _, ue_id in cibles}
+        )
+
+        a_ecrire = [
+            ResultatUEService.construire(etudiant_id, ue_id, matrice.moyennes[(etudiant_id, ue_id)])
+            for etudiant_id, ue_id in cibles if (etudiant_id, ue_id) in matrice.moyennes
+        ]
+
+        # Plus aucune note validée dans l'UE : la ligne disparaît
+        ues_sans_note = defaultdict(list)
+        for etudiant_id, ue_id in cibles - matrice.moyennes.keys():
+            ues_sans_note[etudiant_id].append(ue_id)
+
+        with transaction.atomic():
+            ResultatUE.objects.bulk_create(
+                a_ecrire,
+                update_conflicts=True,
+                unique_fields=['etudiant', 'ue'],
+                update_fields=['moyenne', 'note_litterale', 'valide', 'date_maj'],
+            )
+            if ues_sans_note:
+                conditions = Q()
+                for etudiant_id, ue_ids in ues_sans_note.items():
+                    conditions |= Q(etudiant_id=etudiant_id, ue_id__in=ue_ids)
+                ResultatUE.objects.filter(conditions).delete()
+
+        return len(cibles)
+
+    @staticmethod
+    def reconstruire(etudiants=None, ues=None, taille_lot=TAILLE_LOT, progression=None):
+        """
+        Reconstruit la table par lots d'étudiants : une requête agrégée,
+        une suppression et une insertion en masse par lot
+
+        Args:
+            etudiants: QuerySet d'Etudiant (None = tous)
+            ues: UE ou identifiants à reconstruire (None = toutes)
+            progression: Fonction appelée avec (traités, total) après chaque lot
+
+        Returns:
+            int: Nombre de résultats enregistrés
+        """
+        from apps.gestion_academique.models import Etudiant
+
+        if etudiants is None:
+            etudiants = Etudiant.objects.all()
+        if ues is not None:
+            ues = [getattr(ue, 'pk', ue) for ue in ues]
+
+        etudiant_ids = list(etudiants.order_by('pk').values_list('pk', flat=True))
+        nombre = 0
+
+        for debut in range(0, len(etudiant_ids), taille_lot):
+            lot = etudiant_ids[debut:debut + taille_lot]
+            matrice = MoyenneUEService.calculer_matrice(lot, ues)
+
+            anciens = ResultatUE.objects.filter(etudiant_id__in=lot)
+            if ues is not None:
+                anciens = anciens.filter(ue_id__in=ues)
+
+            with transaction.atomic():
+                anciens.delete()
+                ResultatUE.objects.bulk_create([
+                    ResultatUEService.construire(etudiant_id, ue_id, moyenne)
+                    for (etudiant_id, ue_id), moyenne in matrice.moyennes.items()
+                ], batch_size=taille_lot)
+
+            nombre += len(matrice.moyennes)
+            if progression:
+                progression(debut + len(lot), len(etudiant_ids))
+
+        return nombre
+
+
+class FeuilleNotesService:
+    """
+    Feuille de notes d'une matière (une ligne par étudiant)
+    """
+
+    @staticmethod
+    def charger_notes(matiere, etudiants, enseignant):
+        """
+        Notes de la matière pour les étudiants, en une requête ;
+        les brouillons manquants sont créés en une seule insertion
+
+        Args:
+            etudiants: Liste d'Etudiant (déjà chargés)
+
+        Returns:
+            dict: {etudiant_id: Note}
+        """
+        notes = {
+            note.etudiant_id: note
+            for note in Note.objects.filter(matiere=matiere, etudiant__in=etudiants)
+        }
+
+        manquants = [etudiant.pk for etudiant in etudiants if etudiant.pk not in notes]
+        if manquants:
+            # ignore_conflicts : un brouillon créé entre-temps (autre onglet) n'est pas une erreur
+            Note.objects.bulk_create([
+                Note(etudiant_id=etudiant_id, matiere=matiere, enseignant=enseignant, statut='brouillon')
+                for etudiant_id in manquants
+            ], ignore_conflicts=True)
+
+            # Les clés primaires ne sont pas renvoyées avec ignore_conflicts : relecture
+            notes.update({
+                note.etudiant_id: note
+                for note in Note.objects.filter(matiere=matiere, etudiant_id__in=manquants)
+            })
+
+        return notes
+
+    @staticmethod
+    def notes_modifiables(matiere, note_ids):
+        """Notes de la matière encore modifiables (brouillon / invalidée) : {note_id: Note}"""
+        return Note.objects.filter(
+            pk__in=note_ids,
+            matiere=matiere,
+            statut__in=['brouillon', 'invalide']
+        ).select_related('etudiant').in_bulk()
+
+    @staticmethod
+    def enregistrer(lignes, soumettre=False):
+        """
+        Applique les notes saisies et écrit toute la feuille en une fois (bulk_update)
+        Enregistrement : seules les lignes modifiées repassent en brouillon
+        Soumission : toutes les lignes passent au statut 'soumis'
+
+        Args:
+            lignes: Liste de (Note, {'note1', 'note2', 'note3'}) déjà validées
+
+        Returns:
+            int: Nombre de notes écrites
+        """
+        maintenant = timezone.now()
+        a_ecrire = []
+
+        for note, donnees in lignes:
+            modifiee = any(getattr(note, champ) != donnees[champ] for champ in ('note1', 'note2', 'note3'))
+            if not (modifiee or soumettre):
+                continue
+
+            note.note1 = donnees['note1']
+            note.note2 = donnees['note2']
+            note.note3 = donnees['note3']
+            note.calculer_moyenne()
+            a_ecrire.append(note)
+
+        if not a_ecrire:
+            return 0
+
+        # bulk_update ne passe pas par save() : statut et dates (auto_now compris)
+        # sont identiques pour toute la feuille, écrits par un seul UPDATE
+        # au lieu d'un CASE par ligne
+        communs = {'statut': 'brouillon', 'date_modification': maintenant}
+        if soumettre:
+            communs = {'statut': 'soumis', 'date_soumission': maintenant, 'date_modification': maintenant}
+
+        with transaction.atomic():
+            Note.objects.bulk_update(a_ecrire, ['note1', 'note2', 'note3', 'moyenne'], batch_size=500)
+            Note.objects.filter(pk__in=[note.pk for note in a_ecrire]).update(**communs)
+
+        for note in a_ecrire:
+            for champ, valeur in communs.items():
+                setattr(note, champ, valeur)
+
+        return len(a_ecrire)
+
+
+class WorkflowNotesService:
+    """
+    Transitions du workflow appliquées à tout un ensemble de notes
+    en une seule instruction UPDATE (sans save() ligne par ligne)
+    """
+
+    @staticmethod
+    def soumettre(notes):
+        """
+        Soumet au chef les notes en brouillon ou invalidées
+
+        Args:
+            notes: QuerySet de Note
+
+        Returns:
+            int: Nombre de notes soumises
+        """
+        # update() ne passe pas par save() : date_modification (auto_now) écrite ici
+        # (timezone.now() plutôt que Now() : même format stocké que save() sous SQLite)
+        maintenant = timezone.now()
+        return notes.filter(statut__in=['brouillon', 'invalide']).update(
+            statut='soumis',
+            date_soumission=maintenant,
+            date_modification=maintenant
+        )
+
+    @staticmethod
+    def valider(notes):
+        """
+        Valide les notes soumises puis émet une seule fois notes_modifiees
+        et notes_validees pour tout le lot (résultats UE, archives)
+
+        Args:
+            notes: QuerySet de Note
+
+        Returns:
+            int: Nombre de notes validées
+        """
+        with transaction.atomic():
+            lignes = list(notes.filter(statut='soumis').values_list('pk', 'etudiant_id', 'matiere_id'))
+            if not lignes:
+                return 0
+
+            maintenant = timezone.now()
+            nombre = Note.objects.filter(
+                pk__in=[note_id for note_id, _, _ in lignes],
+                statut='soumis'
+            ).update(
+                statut='valide',
+                date_validation=maintenant,
+                date_modification=maintenant
+            )
+
+            paires = [(etudiant_id, matiere_id) for _, etudiant_id, matiere_id in lignes]
+            notes_modifiees.send(sender=Note, paires=paires)
+            notes_validees.send(sender=Note, paires=paires)
+
+        return nombre
+
+
+class ImportNotesService:
+    """
+    Import des notes depuis un classeur Excel (une feuille par matière, voir classeur.py)
+    Feuilles lues en parallèle, étudiants et matières résolus par dictionnaires,
+    notes écrites par lots (bulk_create avec mise à jour en cas de conflit)
+    """
+
+    # Matricules par requête IN et notes par INSERT
+    TAILLE_LOT = 500
+
+    @staticmethod
+    def lire_classeur(chemin, processus=None):
+        """
+        Lit toutes les feuilles du classeur
+        Avec plusieurs processus, chaque feuille est lue par un worker
+        (openpyxl, limité par le CPU) ; les workers n'accèdent pas à la base
+        Réservé à la commande importer_notes (processus = IMPORT_NOTES_PROCESSUS) :
+        une requête web ne crée pas de processus
+
+        Args:
+            chemin: Chemin du fichier .xlsx
+            processus: Nombre de processus de lecture (défaut : 1, lecture dans le processus courant)
+
+        Returns:
+            list: Résultats de classeur.lire_feuille, dans l'ordre des feuilles
+        """
+        feuilles = lister_feuilles(chemin)
+
+        if not processus or processus <= 1 or len(feuilles) < 2:
+            return [lire_feuille(chemin, feuille) for feuille in feuilles]
+
+        with ProcessPoolExecutor(max_workers=min(processus, len(feuilles))) as executor:
+            return list(executor.map(lire_feuille, [chemin] * len(feuilles), feuilles))
+
+    @staticmethod
+    def importer(chemin, enseignant=None, processus=None):
+        """
+        Importe les notes d'un classeur
+
+        Une note existante n'est modifiée que si elle est encore modifiable
+        (brouillon / invalidée) et repasse en brouillon ; une note absente est
+        créée en brouillon. Les lignes inchangées ne sont pas réécrites.
+
+        Args:
+            chemin: Chemin du fichier .xlsx
+            enseignant: Enseignant qui importe : seules ses matières sont acceptées.
+                        None (import général) : nouvelles notes rattachées au
+                        premier enseignant de la matière
+            processus: Nombre de processus de lecture (voir lire_classeur)
+
+        Returns:
+            dict: {'feuilles': [...], 'erreurs': [...], 'creees': int, 'modifiees': int}
+        """
+        debut = time.perf_counter()
+        rapport = {'feuilles': [], 'erreurs': [], 'creees': 0, 'modifiees': 0}
+
+        feuilles = ImportNotesService.lire_classeur(chemin, processus)
+        for feuille in feuilles:
+            rapport['erreurs'] += feuille['erreurs']
+
+        # Matières (code = titre de la feuille), avec départements et enseignants
+        matieres = Matiere.objects.filter(code__in=[feuille['feuille'] for feuille in feuilles])
+        if enseignant is not None:
+            matieres = matieres.filter(enseignants=enseignant)
+        matieres = {
+            matiere.code: matiere
+            for matiere in matieres.prefetch_related('departements', 'enseignants')
+        }
+
+        # Étudiants de toutes les feuilles, par requêtes IN
+        matricules = list({matricule for feuille in feuilles for _, matricule, _ in feuille['lignes']})
+        etudiants = {}
+        for i in range(0, len(matricules), ImportNotesService.TAILLE_LOT):
+            etudiants.update({
+                etudiant.matricule: etudiant
+                for etudiant in Etudiant.objects.filter(
+                    matricule__in=matricules[i:i + ImportNotesService.TAILLE_LOT]
+                ).only('pk', 'matricule', 'niveau_id', 'departement_id')
+            })
+
+        a_ecrire = []
+        for feuille in feuilles:
+            code = feuille['feuille']
+            matiere = matieres.get(code)
+            if matiere is None:
+                message = (
+                    f"Matière '{code}' inconnue ou non enseignée par vous" if enseignant is not None
+                    else f"Matière '{code}' inconnue"
+                )
+                rapport['erreurs'].append({'feuille': code, 'ligne': 'Feuille', 'erreur': message})
+                continue
+
+            auteur = enseignant or next(iter(matiere.enseignants.all()), None)
+            if auteur is None:
+                rapport['erreurs'].append({
+                    'feuille': code, 'ligne': 'Feuille',
+                    'erreur': f"Aucun enseignant affecté à la matière '{code}'"
+                })
+                continue
+
+            notes, stats = ImportNotesService.preparer_feuille(
+                feuille, matiere, auteur, etudiants, rapport['erreurs']
+            )
+            a_ecrire += notes
+            rapport['feuilles'].append(stats)
+
+        # Notes soumises ou validées, ou créées par une saisie, entre la lecture
+        # et l'écriture : non écrites, retirées des compteurs
+        stats_par_matiere = {stats['matiere_id']: stats for stats in rapport['feuilles']}
+        ignorees, conflits = ImportNotesService.ecrire(a_ecrire)
+        for notes, compteur, erreur in (
+            (ignorees, 'modifiees', "Note soumise ou validée pendant l'import : ignorée"),
+            (conflits, 'creees', "Note créée par une saisie pendant l'import : ignorée"),
+        ):
+            for note in notes:
+                stats = stats_par_matiere[note.matiere_id]
+                stats[compteur] -= 1
+                rapport['erreurs'].append({'feuille': stats['feuille'], 'ligne': note.ligne, 'erreur': erreur})
+
+        rapport['creees'] = sum(stats['creees'] for stats in rapport['feuilles'])
+        rapport['modifiees'] = sum(stats['modifiees'] for stats in rapport['feuilles'])
+        rapport['duree'] = round(time.perf_counter() - debut, 2)
+        return rapport
+
+    @staticmethod
+    def preparer_feuille(feuille, matiere, enseignant, etudiants, erreurs):
+        """
+        Compare les lignes d'une feuille aux notes existantes (une requête par
+        lot de TAILLE_LOT étudiants) et prépare les notes à écrire
+
+        Returns:
+            tuple: (liste de Note à écrire, statistiques de la feuille)
+                   Une note à modifier porte la clé primaire de la note existante
+        """
+        code = feuille['feuille']
+        departements = {departement.pk for departement in matiere.departements.all()}
+        stats = {
+            'feuille': code, 'matiere': matiere.nom, 'matiere_id': matiere.pk,
+            'lignes': len(feuille['lignes']), 'creees': 0, 'modifiees': 0, 'inchangees': 0,
+        }
+
+        lignes = []
+        vus = set()
+        for row_num, matricule, valeurs in feuille['lignes']:
+            etudiant = etudiants.get(matricule)
+            if etudiant is None:
+                message = f"Étudiant {matricule} introuvable"
+            elif etudiant.niveau_id != matiere.niveau_id or etudiant.departement_id not in departements:
+                message = f"L'étudiant {matricule} ne suit pas la matière {code}"
+            elif etudiant.pk in vus:
+                message = f"Matricule {matricule} en double dans la feuille"
+            else:
+                vus.add(etudiant.pk)
+                lignes.append((row_num, etudiant, valeurs))
+                continue
+            erreurs.append({'feuille': code, 'ligne': row_num, 'erreur': message})
+
+        existantes = {}
+        ids = [etudiant.pk for _, etudiant, _ in lignes]
+        for i in range(0, len(ids), ImportNotesService.TAILLE_LOT):
+            existantes.update({
+                note.etudiant_id: note
+                for note in Note.objects.filter(
+                    matiere=matiere, etudiant_id__in=ids[i:i + ImportNotesService.TAILLE_LOT]
+                ).only('pk', 'etudiant_id', 'note1', 'note2', 'note3', 'statut')
+            })
+
+        notes = []
+        maintenant = timezone.now()
+        for row_num, etudiant, valeurs in lignes:
+            existante = existantes.get(etudiant.pk)
+            if existante is not None:
+                if not existante.peut_modifier():
+                    erreurs.append({
+                        'feuille': code, 'ligne': row_num,
+                        'erreur': f"Note de {etudiant.matricule} déjà {existante.get_statut_display().lower()} : ignorée"
+                    })
+                    continue
+                if all(getattr(existante, champ) == valeurs[champ] for champ in CHAMPS_NOTES):
+                    stats['inchangees'] += 1
+                    continue
+                stats['modifiees'] += 1
+            else:
+                stats['creees'] += 1
+
+            note = Note(
+                pk=existante.pk if existante is not None else None,
+                etudiant_id=etudiant.pk,
+                matiere_id=matiere.pk,
+                enseignant=enseignant,
+                statut='brouillon',
+                date_modification=maintenant,
+                **valeurs
+            )
+            note.calculer_moyenne()
+            note.ligne = row_num
+            notes.append(note)
+
+        return notes, stats
+
+    @staticmethod
+    def ecrire(notes):
+        """
+        Écrit les notes par lots, dans une transaction :
+        - modifications : les notes existantes sont verrouillées (SELECT ... FOR UPDATE)
+          et seules celles encore modifiables (brouillon / invalidée) sont réécrites
+        - créations : INSERT par lot dans un point de sauvegarde ; si une note a été
+          créée entre-temps par une saisie (conflit étudiant / matière), le lot est
+          repris note par note et les notes en conflit ne sont pas écrites
+        Les notes restent en brouillon : les résultats d'UE (notes validées) ne changent pas
+
+        Returns:
+            tuple: (notes à modifier ignorées car soumises ou validées depuis la lecture,
+                    notes à créer ignorées car créées entre-temps)
+        """
+        modifications = [note for note in notes if note.pk is not None]
+        creations = [note for note in notes if note.pk is None]
+        ignorees = []
+        conflits = []
+
+        with transaction.atomic():
+            for i in range(0, len(modifications), ImportNotesService.TAILLE_LOT):
+                lot = modifications[i:i + ImportNotesService.TAILLE_LOT]
+                modifiables = set(
+                    Note.objects.select_for_update().filter(
+                        pk__in=[note.pk for note in lot],
+                        statut__in=['brouillon', 'invalide']
+                    ).values_list('pk', flat=True)
+                )
+                ignorees += [note for note in lot if note.pk not in modifiables]
+                Note.objects.bulk_update(
+                    [note for note in lot if note.pk in modifiables],
+                    ['note1', 'note2', 'note3', 'moyenne', 'statut', 'date_modification'],
+                )
+
+            for i in range(0, len(creations), ImportNotesService.TAILLE_LOT):
+                lot = creations[i:i + ImportNotesService.TAILLE_LOT]
+                try:
+                    with transaction.atomic():
+                        Note.objects.bulk_create(lot)
+                except IntegrityError:
+                    # Cas rare (saisie concurrente) : reprise note par note
+                    for note in lot:
+                        try:
+                            with transaction.atomic():
+                                Note.objects.bulk_create([note])
+                        except IntegrityError:
+                            conflits.append(note)
+
+        return ignorees, conflits
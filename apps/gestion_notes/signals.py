@@ -0,0 +1,15 @@
+# gestion_notes/signals.py
+"""
+Signaux du module Gestion des Notes
+"""
+from django.dispatch import Signal
+
+
+# Envoyé quand des notes passent au statut 'valide'
+# Arguments : paires = liste de (etudiant_id, matiere_id)
+notes_validees = Signal()
+
+# Envoyé quand l'ensemble des notes validées change : validation, invalidation,
+# modification de la moyenne ou suppression d'une note validée
+# Arguments : paires = liste de (etudiant_id, matiere_id)
+notes_modifiees = Signal()
@@ -1 +1,252 @@
 # gestion_notes/tests.py
+"""
+MODULE 3 : Gestion des Notes - Tests
+"""
+import csv
+import io
+from datetime import date, datetime
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from apps.gestion_academique.models import AnneeAcademique, Departement, Enseignant, Etudiant, Niveau
+from apps.structure_pedagogique.models import Matiere, Semestre
+from .models import Note, ResultatUE, UniteEnseignement
+from config import export_utils
+from .services import ImportNotesService
+
+
+class ResultatUECoefficientTests(TestCase):
+    """Résultats UE recalculés quand le coefficient d'une matière change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departement = Departement.objects.create(code='NTIC', nom='NTIC')
+        niveau = Niveau.objects.create(code='L1', nom='Licence 1', ordre=1)
+        semestre = Semestre.objects.create(code='S1', nom='Semestre 1', ordre=1, niveau=niveau)
+        annee = AnneeAcademique.objects.create(
+            annee='2025-2026', date_debut=date(2025, 10, 1), date_fin=date(2026, 7, 31), est_active=True
+        )
+        enseignant = Enseignant.objects.create(
+            code='ENS-001', nom='Camara', prenom='Alpha', grade='assistant',
+            specialite='Réseaux', email='ens001@example.com'
+        )
+        cls.etudiant = Etudiant.objects.create(
+            matricule='111-222-333-444', nom='Diallo', prenom='Mariama',
+            date_naissance=date(2004, 1, 1), lieu_naissance='Conakry', sexe='F',
+            departement=departement, niveau=niveau, annee_academique=annee
+        )
+
+        cls.matiere_forte = Matiere.objects.create(
+            code='RES101', nom='Réseaux', coefficient=1, credits=3, niveau=niveau, semestre=semestre
+        )
+        cls.matiere_faible = Matiere.objects.create(
+            code='ALG101', nom='Algorithmique', coefficient=1, credits=3, niveau=niveau, semestre=semestre
+        )
+        cls.ue = UniteEnseignement.objects.create(code='UE101', nom='Informatique', semestre=semestre)
+        cls.ue.matieres.add(cls.matiere_forte, cls.matiere_faible)
+
+        # Moyennes 8 et 2 : moyenne UE 5 à coefficients égaux
+        for matiere, valeur in ((cls.matiere_forte, 8), (cls.matiere_faible, 2)):
+            Note.objects.create(
+                etudiant=cls.etudiant, matiere=matiere, enseignant=enseignant,
+                note1=valeur, note2=valeur, note3=valeur, statut='valide'
+            )
+
+    def resultat(self):
+        return ResultatUE.objects.get(etudiant=self.etudiant, ue=self.ue)
+
+    def test_resultat_initial(self):
+        resultat = self.resultat()
+        self.assertEqual(resultat.moyenne, 5.0)
+        self.assertTrue(resultat.valide)
+
+    def test_coefficient_modifie(self):
+        self.matiere_faible.coefficient = 3
+        self.matiere_faible.save()
+
+        # (8 × 1 + 2 × 3) / 4
+        resultat = self.resultat()
+        self.assertEqual(resultat.moyenne, 3.5)
+        self.assertFalse(resultat.valide)
+
+    def test_coefficient_inchange(self):
+        ResultatUE.objects.filter(pk=self.resultat().pk).update(moyenne=0)
+
+        self.matiere_faible.nom = 'Algorithmique avancée'
+        self.matiere_faible.save()
+
+        self.assertEqual(self.resultat().moyenne, 0)
+
+
+class EcritureImportTests(TestCase):
+    """Notes soumises ou créées par une saisie entre la lecture et l'écriture d'un import"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departement = Departement.objects.create(code='NTIC', nom='NTIC')
+        niveau = Niveau.objects.create(code='L1', nom='Licence 1', ordre=1)
+        semestre = Semestre.objects.create(code='S1', nom='Semestre 1', ordre=1, niveau=niveau)
+        annee = AnneeAcademique.objects.create(
+            annee='2025-2026', date_debut=date(2025, 10, 1), date_fin=date(2026, 7, 31), est_active=True
+        )
+        cls.enseignant = Enseignant.objects.create(
+            code='ENS-001', nom='Camara', prenom='Alpha', grade='assistant',
+            specialite='Réseaux', email='ens001@example.com'
+        )
+        cls.matiere = Matiere.objects.create(
+            code='RES101', nom='Réseaux', coefficient=1, credits=3, niveau=niveau, semestre=semestre
+        )
+        cls.etudiants = [
+            Etudiant.objects.create(
+                matricule=f'111-222-333-{i:03d}', nom='Diallo', prenom=f'Étudiant {i}',
+                date_naissance=date(2004, 1, 1), lieu_naissance='Conakry', sexe='F',
+                departement=departement, niveau=niveau, annee_academique=annee
+            )
+            for i in range(3)
+        ]
+
+    def nouvelle_note(self, etudiant, valeur):
+        return Note(
+            etudiant=etudiant, matiere=self.matiere, enseignant=self.enseignant,
+            note1=valeur, note2=valeur, note3=valeur, moyenne=valeur
+        )
+
+    def test_creations_sans_conflit(self):
+        ignorees, conflits = ImportNotesService.ecrire(
+            [self.nouvelle_note(etudiant, 12) for etudiant in self.etudiants]
+        )
+
+        self.assertEqual((ignorees, conflits), ([], []))
+        self.assertEqual(Note.objects.filter(matiere=self.matiere).count(), 3)
+
+    def test_note_creee_entre_temps(self):
+        saisie = Note.objects.create(
+            etudiant=self.etudiants[1], matiere=self.matiere, enseignant=self.enseignant,
+            note1=7, note2=7, note3=7
+        )
+
+        ignorees, conflits = ImportNotesService.ecrire(
+            [self.nouvelle_note(etudiant, 12) for etudiant in self.etudiants]
+        )
+
+        self.assertEqual(ignorees, [])
+        self.assertEqual([note.etudiant for note in conflits], [self.etudiants[1]])
+        self.assertEqual(Note.objects.filter(matiere=self.matiere).count(), 3)
+        saisie.refresh_from_db()
+        self.assertEqual(saisie.note1, 7)
+
+    def test_note_soumise_entre_temps(self):
+        note = Note.objects.create(
+            etudiant=self.etudiants[0], matiere=self.matiere, enseignant=self.enseignant,
+            note1=7, note2=7, note3=7
+        )
+        Note.objects.filter(pk=note.pk).update(statut='soumis')
+        note.note1 = 15
+
+        ignorees, conflits = ImportNotesService.ecrire([note])
+
+        self.assertEqual((ignorees, conflits), ([note], []))
+        note.refresh_from_db()
+        self.assertEqual(note.note1, 7)
+
+
+class ExportFluxTests(TestCase):
+    """Exports CSV / Excel écrits au fil de l'eau (config/export_utils.py)"""
+
+    entetes = ['Matricule', 'Note', 'Validée le', 'Admis']
+
+    def lignes(self, nombre, lues=None):
+        for i in range(nombre):
+            if lues is not None:
+                lues.append(i)
+            yield (f'111-222-333-{i:03d}', 12.5, date(2026, 1, 31), i % 2 == 0)
+
+    def test_csv_en_flux(self):
+        lues = []
+        response = export_utils.reponse_export('csv', 'notes', self.entetes, self.lignes(1200, lues))
+        morceaux = iter(response.streaming_content)
+
+        # En-tête envoyé avant la lecture de la première ligne
+        self.assertEqual(next(morceaux).decode('utf-8'), '\ufeffMatricule,Note,Validée le,Admis\r\n')
+        self.assertEqual(lues, [])
+
+        blocs = [morceau.decode('utf-8') for morceau in morceaux]
+        self.assertEqual([bloc.count('\r\n') for bloc in blocs], [500, 500, 200])
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="notes.csv"')
+        lignes = list(csv.reader(io.StringIO(''.join(blocs))))
+        self.assertEqual(lignes[0], ['111-222-333-000', '12.5', '31/01/2026', 'Oui'])
+        self.assertEqual(lignes[1][3], 'Non')
+
+    def test_xlsx(self):
+        response = export_utils.reponse_export('xlsx', 'notes', self.entetes, self.lignes(3))
+
+        classeur = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        lignes = list(classeur['notes'].iter_rows(values_only=True))
+        self.assertEqual(lignes[0], tuple(self.entetes))
+        self.assertEqual(len(lignes), 4)
+        self.assertEqual(lignes[1], ('111-222-333-000', 12.5, datetime(2026, 1, 31), 'Oui'))
+
+    def test_valeurs(self):
+        moment = timezone.make_aware(datetime(2026, 1, 31, 10, 30))
+
+        self.assertEqual(export_utils.valeur_export(moment), '31/01/2026 10:30')
+        self.assertEqual(export_utils.valeur_export(moment, excel=True), datetime(2026, 1, 31, 10, 30))
+        self.assertEqual(export_utils.valeur_export(None), '')
+        self.assertIsNone(export_utils.valeur_export(None, excel=True))
+
+    def test_format_demande(self):
+        requetes = RequestFactory()
+
+        self.assertEqual(export_utils.format_export(requetes.get('/', {'format': 'xlsx'})), 'xlsx')
+        self.assertEqual(export_utils.format_export(requetes.get('/', {'format': 'pdf'})), 'csv')
+        self.assertEqual(export_utils.format_export(requetes.get('/')), 'csv')
+
+
+class ExportNotesValidationTests(TestCase):
+    """Export des notes de la liste de validation d'un chef de département"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departement = Departement.objects.create(code='NTIC', nom='NTIC')
+        niveau = Niveau.objects.create(code='L1', nom='Licence 1', ordre=1)
+        semestre = Semestre.objects.create(code='S1', nom='Semestre 1', ordre=1, niveau=niveau)
+        annee = AnneeAcademique.objects.create(
+            annee='2025-2026', date_debut=date(2025, 10, 1), date_fin=date(2026, 7, 31), est_active=True
+        )
+        enseignant = Enseignant.objects.create(
+            code='ENS-001', nom='Camara', prenom='Alpha', grade='assistant',
+            specialite='Réseaux', email='ens001@example.com'
+        )
+        matiere = Matiere.objects.create(
+            code='RES101', nom='Réseaux', coefficient=1, credits=3, niveau=niveau, semestre=semestre
+        )
+        matiere.departements.add(departement)
+        etudiant = Etudiant.objects.create(
+            matricule='111-222-333-444', nom='Diallo', prenom='Mariama',
+            date_naissance=date(2004, 1, 1), lieu_naissance='Conakry', sexe='F',
+            departement=departement, niveau=niveau, annee_academique=annee
+        )
+        Note.objects.create(
+            etudiant=etudiant, matiere=matiere, enseignant=enseignant,
+            note1=10, note2=10, note3=15, statut='soumis'
+        )
+
+        cls.chef = User.objects.create_user('CHEF-NTIC', password=None)
+        cls.chef.profile.role = 'chef_departement'
+        cls.chef.profile.departement = departement
+        cls.chef.profile.save()
+
+    def test_export_csv(self):
+        self.client.force_login(self.chef)
+
+        response = self.client.get('/notes/validation/export/', {'format': 'csv'})
+
+        self.assertEqual(response.status_code, 200)
+        lignes = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(lignes[0][:2], ['Matricule', 'Nom'])
+        self.assertEqual(lignes[1][:6], ['111-222-333-444', 'Diallo', 'Mariama', 'L1', 'RES101', 'Réseaux'])
+        self.assertEqual(lignes[1][9:11], ['12.0', 'Soumis'])
+        self.assertEqual(len(lignes), 2)
@@ -19,13 +19,18 @@ urlpatterns = [
     # ==================== SAISIE DES NOTES (ENSEIGNANT) - ANCIEN SYSTÈME ====================
     path('saisie/', views.saisie_notes, name='saisie_notes'),
     path('saisie/sauvegarder/<int:note_id>/', views.saisie_sauvegarder, name='saisie_sauvegarder'),
+    path('saisie/feuille/<int:matiere_id>/', views.saisie_feuille, name='saisie_feuille'),
     path('saisie/soumettre/<int:matiere_id>/', views.saisie_soumettre, name='saisie_soumettre'),
+    path('saisie/import/', views.import_notes, name='import_notes'),
+    path('saisie/import/modele/', views.import_notes_modele, name='import_notes_modele'),
     
     # ==================== VALIDATION DES NOTES (CHEF DÉPARTEMENT) - ÉTENDU ====================
     path('validation/', views_validation.validation_notes_list, name='validation_notes_list'),
     path('validation/<int:note_id>/valider/', views_validation.validation_notes_valider, name='validation_notes_valider'),
     path('validation/<int:note_id>/invalider/', views_validation.validation_notes_invalider, name='validation_notes_invalider'),
     path('validation/valider-lot/', views_validation.validation_notes_valider_lot, name='validation_notes_valider_lot'),
+    path('validation/export/', views_validation.validation_notes_export, name='validation_notes_export'),
+    path('validation/export/resultats-ue/', views_validation.resultats_ue_export, name='resultats_ue_export'),
     
     # ==================== SAISIE DES NOTES (ENSEIGNANT) - NOUVEAU SYSTÈME ====================
     path('enseignant/notes/', views_validation.enseignant_notes_list, name='enseignant_notes_list'),
@@ -3,13 +3,19 @@
 MODULE 3 : Gestion des Notes - Views (avec permissions par rôle)
 CORRECTION : Ajout du filtre par année académique pour les rattrapages
 """
+import tempfile
+from io import BytesIO
+
+import openpyxl
+from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Q
-from .models import Note, UniteEnseignement
-from .forms import NoteForm, UniteEnseignementForm
+from .models import Note, ResultatUE, UniteEnseignement
+from .services import FeuilleNotesService, ImportNotesService, MoyenneUEService, WorkflowNotesService
+from .forms import ImportNotesForm, NoteFeuilleFormSet, NoteForm, UniteEnseignementForm
 from apps.gestion_academique.models import Etudiant, Enseignant, AnneeAcademique
 from apps.structure_pedagogique.models import Matiere, Semestre
 
@@ -127,14 +133,14 @@ def saisie_notes(request):
     matieres = Matiere.objects.filter(enseignants=enseignant)
     
     # Récupérer toutes les années académiques
-    annees = AnneeAcademique.objects.all().order_by('-est_active', '-date_debut')
+    annees = AnneeAcademique.get_toutes(active_en_tete=True)
     
     # Année sélectionnée (par défaut : année active)
     annee_id = request.GET.get('annee', '')
     if annee_id:
         annee_selectionnee = get_object_or_404(AnneeAcademique, pk=annee_id)
     else:
-        annee_selectionnee = AnneeAcademique.objects.filter(est_active=True).first()
+        annee_selectionnee = AnneeAcademique.get_active()
     
     # Filtre par matière
     matiere_id = request.GET.get('matiere', '')
@@ -167,26 +173,34 @@ def saisie_notes(request):
                 departement__in=matiere_selectionnee.departements.all()
             ).order_by('nom', 'prenom')
 
-        # Pour chaque étudiant, récupérer la note existante
+        # Notes existantes en une requête, brouillons manquants en une insertion
+        etudiants = list(etudiants)
+        notes = FeuilleNotesService.charger_notes(matiere_selectionnee, etudiants, enseignant)
+
+        # Champs de saisie écrits directement dans le gabarit : le rendu d'un
+        # widget par note (3 × N) coûtait plus que tout le reste de la page
+        # Lignes modifiables numérotées pour le formset de la feuille (préfixe 'notes')
         notes_data = []
+        nb_modifiables = 0
         for etu in etudiants:
-            note, created = Note.objects.get_or_create(
-                etudiant=etu,
-                matiere=matiere_selectionnee,
-                defaults={'enseignant': enseignant, 'statut': 'brouillon'}
-            )
+            note = notes[etu.pk]
+            note.etudiant = etu
+            peut_modifier = note.peut_modifier()
             notes_data.append({
                 'etudiant': etu,
                 'note': note,
-                'form': NoteForm(instance=note),
-                'peut_modifier': note.peut_modifier(),
+                'peut_modifier': peut_modifier,
+                'index': nb_modifiables if peut_modifier else None,
             })
+            if peut_modifier:
+                nb_modifiables += 1
 
         context = {
             'enseignant': enseignant,
             'matieres': matieres,
             'matiere_selectionnee': matiere_selectionnee,
             'notes_data': notes_data,
+            'nb_modifiables': nb_modifiables,
             'annees': annees,
             'annee_selectionnee': annee_selectionnee,
         }
@@ -241,6 +255,71 @@ def saisie_sauvegarder(request, note_id):
     return redirect(url)
 
 
+@login_required
+def saisie_feuille(request, matiere_id):
+    """
+    Enregistrer ou soumettre toute la feuille de notes d'une matière en une requête
+    Chaque ligne est validée (formset), les lignes en erreur sont signalées
+    et les autres écrites en une fois
+    """
+    if not request.user.profile.is_enseignant():
+        messages.error(request, "Vous n'avez pas la permission !")
+        return redirect('home')
+
+    enseignant = request.user.profile.enseignant
+    matiere = get_object_or_404(Matiere, pk=matiere_id, enseignants=enseignant)
+
+    # Retour sur la feuille avec le même filtre matière et année
+    annee_id = request.GET.get('annee', '')
+    url = f"/notes/saisie/?matiere={matiere.id}"
+    if annee_id:
+        url += f"&annee={annee_id}"
+
+    if request.method != 'POST':
+        return redirect(url)
+
+    formset = NoteFeuilleFormSet(request.POST, prefix='notes')
+    if not formset.management_form.is_valid():
+        messages.error(request, "Feuille de notes incomplète, veuillez recharger la page !")
+        return redirect(url)
+
+    formset.is_valid()
+    notes = FeuilleNotesService.notes_modifiables(
+        matiere,
+        [form.cleaned_data['note_id'] for form in formset if 'note_id' in form.cleaned_data]
+    )
+
+    lignes = []
+    erreurs = []
+    for numero, form in enumerate(formset, start=1):
+        note = notes.get(form.cleaned_data.get('note_id'))
+        if note is None:
+            erreurs.append(f"Ligne {numero} : note introuvable ou déjà soumise")
+        elif form.errors:
+            details = ' ; '.join(
+                f"{form.fields[champ].label} : {' '.join(liste)}" if champ in form.fields else ' '.join(liste)
+                for champ, liste in form.errors.items()
+            )
+            erreurs.append(f"{note.etudiant.get_full_name()} — {details}")
+        else:
+            lignes.append((note, form.cleaned_data))
+
+    soumettre = request.POST.get('action') == 'submit'
+    nombre = FeuilleNotesService.enregistrer(lignes, soumettre)
+
+    if soumettre:
+        messages.success(request, f"{nombre} note(s) de {matiere.nom} soumise(s) au Chef de département !")
+    elif nombre:
+        messages.success(request, f"{nombre} note(s) de {matiere.nom} sauvegardée(s) en brouillon !")
+    else:
+        messages.info(request, "Aucune modification à enregistrer")
+
+    for erreur in erreurs:
+        messages.error(request, erreur)
+
+    return redirect(url)
+
+
 @login_required
 def saisie_soumettre(request, matiere_id):
     """Soumettre TOUTES les notes d'une matière au chef"""
@@ -252,22 +331,16 @@ def saisie_soumettre(request, matiere_id):
     matiere = get_object_or_404(Matiere, pk=matiere_id, enseignants=enseignant)
 
     if request.method == 'POST':
-        notes = Note.objects.filter(
-            matiere=matiere,
-            enseignant=enseignant,
-            statut__in=['brouillon', 'invalide']
+        # Une seule instruction UPDATE pour toute la matière
+        nombre = WorkflowNotesService.soumettre(
+            Note.objects.filter(matiere=matiere, enseignant=enseignant)
         )
 
-        if notes.count() == 0:
+        if nombre == 0:
             messages.error(request, "Aucune note à soumettre !")
             return redirect('gestion_notes:saisie_notes')
 
-        for note in notes:
-            note.statut = 'soumis'
-            note.date_soumission = timezone.now()
-            note.save()
-
-        messages.success(request, f"Notes de {matiere.nom} soumises au Chef de département !")
+        messages.success(request, f"{nombre} note(s) de {matiere.nom} soumise(s) au Chef de département !")
         return redirect('gestion_notes:saisie_notes')
 
     context = {'matiere': matiere}
@@ -371,16 +444,118 @@ def valider_toutes_notes(request, matiere_id):
     departement = request.user.profile.departement
     matiere = get_object_or_404(Matiere, pk=matiere_id, departements=departement)
 
-    notes = Note.objects.filter(matiere=matiere, statut='soumis')
-    for note in notes:
-        note.statut = 'valide'
-        note.date_validation = timezone.now()
-        note.save()
+    nombre = WorkflowNotesService.valider(Note.objects.filter(matiere=matiere))
 
-    messages.success(request, f"Toutes les notes de {matiere.nom} validées !")
+    messages.success(request, f"Toutes les notes de {matiere.nom} validées ({nombre}) !")
     return redirect('gestion_notes:validation_notes')
 
 
+# ============================================================
+# IMPORT DES NOTES DEPUIS EXCEL (ENSEIGNANT)
+# ============================================================
+
+@login_required
+def import_notes(request):
+    """
+    Import des notes depuis un classeur Excel - Enseignant
+    Une feuille par matière (titre = code), colonnes matricule, note1, note2, note3
+    Les notes importées sont enregistrées en brouillon, à soumettre depuis la saisie
+    """
+    if not request.user.profile.is_enseignant():
+        messages.error(request, "Vous n'avez pas la permission !")
+        return redirect('home')
+
+    enseignant = request.user.profile.enseignant
+    rapport = None
+
+    if request.method == 'POST':
+        form = ImportNotesForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Classeur lu par son chemin, dans le processus de la requête
+            with tempfile.NamedTemporaryFile(suffix='.xlsx') as classeur:
+                for morceau in form.cleaned_data['fichier'].chunks():
+                    classeur.write(morceau)
+                classeur.flush()
+
+                try:
+                    rapport = ImportNotesService.importer(classeur.name, enseignant)
+                except ValueError as e:
+                    messages.error(request, str(e))
+
+            if rapport and (rapport['creees'] or rapport['modifiees']):
+                messages.success(
+                    request,
+                    f"✅ {rapport['creees']} note(s) créée(s) et {rapport['modifiees']} modifiée(s) en brouillon "
+                    f"en {rapport['duree']} s : vérifiez-les puis soumettez-les depuis la saisie."
+                )
+            form = ImportNotesForm()
+    else:
+        form = ImportNotesForm()
+
+    context = {
+        'enseignant': enseignant,
+        'form': form,
+        'rapport': rapport,
+    }
+    return render(request, 'gestion_notes/enseignant/import_notes.html', context)
+
+
+@login_required
+def import_notes_modele(request):
+    """
+    Classeur modèle de l'enseignant : une feuille par matière, pré-remplie avec
+    les étudiants de l'année active et leurs notes actuelles
+    """
+    if not request.user.profile.is_enseignant():
+        messages.error(request, "Vous n'avez pas la permission !")
+        return redirect('home')
+
+    enseignant = request.user.profile.enseignant
+    matieres = Matiere.objects.filter(enseignants=enseignant).prefetch_related('departements').order_by('code')
+    annee_active = AnneeAcademique.get_active()
+
+    notes = {
+        (note.matiere_id, note.etudiant_id): note
+        for note in Note.objects.filter(
+            matiere__in=matieres, etudiant__annee_academique=annee_active
+        ).only('matiere_id', 'etudiant_id', 'note1', 'note2', 'note3')
+    }
+
+    wb = openpyxl.Workbook(write_only=True)
+    for matiere in matieres:
+        ws = wb.create_sheet(title=matiere.code)
+        ws.append(['matricule', 'nom', 'prenom', 'note1', 'note2', 'note3'])
+
+        etudiants = Etudiant.objects.filter(
+            niveau=matiere.niveau,
+            departement__in=matiere.departements.all(),
+            annee_academique=annee_active,
+            statut='actif'
+        ).order_by('nom', 'prenom')
+
+        for etudiant in etudiants:
+            note = notes.get((matiere.pk, etudiant.pk))
+            ws.append([
+                etudiant.matricule, etudiant.nom, etudiant.prenom,
+                note.note1 if note else None,
+                note.note2 if note else None,
+                note.note3 if note else None,
+            ])
+
+    if not matieres:
+        wb.create_sheet(title='CODE-MATIERE').append(['matricule', 'nom', 'prenom', 'note1', 'note2', 'note3'])
+
+    buffer = BytesIO()
+    wb.save(buffer)
+
+    response = HttpResponse(
+        buffer.getvalue(),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = 'attachment; filename="modele_import_notes.xlsx"'
+    return response
+
+
 # ============================================================
 # MES NOTES (ÉTUDIANT)
 # ============================================================
@@ -397,7 +572,7 @@ def mes_notes(request):
     notes = Note.objects.filter(
         etudiant=etudiant,
         statut__in=['soumis', 'valide']
-    ).select_related('matiere', 'enseignant').order_by('matiere__semestre__ordre', 'matiere__nom')
+    ).select_related('matiere__semestre', 'enseignant').order_by('matiere__semestre__ordre', 'matiere__nom')
 
     semestres_data = {}
     for note in notes:
@@ -423,16 +598,17 @@ def mes_notes(request):
     ues = UniteEnseignement.objects.filter(
         matieres__notes__etudiant=etudiant,
         matieres__notes__statut__in=['soumis', 'valide']
-    ).distinct()
+    ).distinct().prefetch_related('matieres')
+
+    # Moyennes UE lues dans la table ResultatUE (une requête)
+    matrice = MoyenneUEService.lire_matrice([etudiant], ues)
 
     ues_data = []
     for ue in ues:
-        moyenne_ue = ue.calculer_moyenne_ue(etudiant)
-        resultat = ue.get_resultat(etudiant)
         ues_data.append({
             'ue': ue,
-            'moyenne': moyenne_ue,
-            'resultat': resultat,
+            'moyenne': matrice.moyenne(etudiant, ue),
+            'resultat': matrice.resultat(etudiant, ue),
             'matieres': ue.matieres.all(),
         })
 
@@ -463,20 +639,15 @@ def releve_notes(request):
         statut='valide'
     ).select_related('matiere', 'enseignant').order_by('matiere__semestre__ordre', 'matiere__nom')
 
-    ues = UniteEnseignement.objects.filter(
-        matieres__notes__etudiant=etudiant,
-        matieres__notes__statut='valide'
-    ).distinct()
-
-    ues_data = []
-    for ue in ues:
-        moyenne_ue = ue.calculer_moyenne_ue(etudiant)
-        resultat = ue.get_resultat(etudiant)
-        ues_data.append({
-            'ue': ue,
-            'moyenne': moyenne_ue,
-            'resultat': resultat,
-        })
+    # Une ligne ResultatUE par UE ayant au moins une note validée
+    ues_data = [
+        {
+            'ue': resultat.ue,
+            'moyenne': resultat.moyenne,
+            'resultat': resultat.get_resultat(),
+        }
+        for resultat in ResultatUE.objects.filter(etudiant=etudiant).select_related('ue')
+    ]
 
     context = {
         'etudiant': etudiant,
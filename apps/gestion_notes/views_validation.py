@@ -8,39 +8,34 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Q, Count
-from .models import Note
+from .models import Note, ResultatUE, UniteEnseignement
 from .forms import NoteForm
+from .services import WorkflowNotesService
 from apps.gestion_academique.models import Etudiant, AnneeAcademique
 from apps.structure_pedagogique.models import Matiere
+from config.export_utils import TAILLE_LOT_EXPORT, format_export, reponse_export
+from config.pagination_utils import PageCurseur
+from config.stats_utils import compter_statuts
 
 
 # ============================================================
 # VALIDATION DES NOTES (CHEF DÉPARTEMENT) - AVEC FILTRE ANNÉE
 # ============================================================================
 
-@login_required
-def validation_notes_list(request):
+def filtrer_notes_validation(request, departement):
     """
-    Liste des notes à valider avec filtres étendus
-    NOUVELLE LOGIQUE :
-    - Année active : Notes à valider de la nouvelle année
-    - Année précédente : Notes à valider (rattrapages)
-    """
-    if not request.user.profile.is_chef_departement():
-        messages.error(request, "Accès réservé aux chefs de département")
-        return redirect('home')
-    
-    departement = request.user.profile.departement
-    
-    # Récupérer toutes les années académiques
-    annees = AnneeAcademique.objects.all().order_by('-est_active', '-date_debut')
+    Notes du département filtrées selon les paramètres GET de la liste de validation
+    (partagé par la liste et son export)
     
+    Returns:
+        tuple: (QuerySet de notes, année sélectionnée, filtres appliqués)
+    """
     # Année sélectionnée (par défaut : année active)
     annee_id = request.GET.get('annee', '')
     if annee_id:
         annee_selectionnee = get_object_or_404(AnneeAcademique, pk=annee_id)
     else:
-        annee_selectionnee = AnneeAcademique.objects.filter(est_active=True).first()
+        annee_selectionnee = AnneeAcademique.get_active()
     
     # Filtres
     niveau_code = request.GET.get('niveau', '')
@@ -48,11 +43,7 @@ def validation_notes_list(request):
     matricule = request.GET.get('matricule', '')
     
     # Base query
-    notes = Note.objects.filter(
-        matiere__departements=departement
-    ).select_related(
-        'etudiant', 'matiere', 'enseignant', 'etudiant__niveau'
-    ).order_by('-date_soumission', 'matiere__nom', 'etudiant__nom')
+    notes = Note.objects.filter(matiere__departements=departement)
     
     # LOGIQUE DIFFÉRENTE SELON L'ANNÉE
     if annee_selectionnee:
@@ -76,31 +67,142 @@ def validation_notes_list(request):
     if matricule:
         notes = notes.filter(etudiant__matricule__icontains=matricule)
     
-    # Statistiques
-    stats = {
-        'total_etudiants': notes.values('etudiant').distinct().count(),
-        'soumis': notes.filter(statut='soumis').count(),
-        'valide': notes.filter(statut='valide').count(),
-        'invalide': notes.filter(statut='invalide').count(),
-        'total_notes': notes.count(),
+    filters = {
+        'niveau': niveau_code,
+        'statut': statut,
+        'matricule': matricule,
     }
+    return notes, annee_selectionnee, filters
+
+
+@login_required
+def validation_notes_list(request):
+    """
+    Liste des notes à valider avec filtres étendus
+    NOUVELLE LOGIQUE :
+    - Année active : Notes à valider de la nouvelle année
+    - Année précédente : Notes à valider (rattrapages)
+    """
+    if not request.user.profile.is_chef_departement():
+        messages.error(request, "Accès réservé aux chefs de département")
+        return redirect('home')
+    
+    departement = request.user.profile.departement
+    
+    # Récupérer toutes les années académiques
+    annees = AnneeAcademique.get_toutes(active_en_tete=True)
+    
+    notes, annee_selectionnee, filters = filtrer_notes_validation(request, departement)
+    notes = notes.select_related(
+        'etudiant', 'matiere', 'enseignant', 'etudiant__niveau'
+    )
+    
+    # Statistiques
+    stats = compter_statuts(
+        notes,
+        ['soumis', 'valide', 'invalide'],
+        total='total_notes',
+        distincts={'total_etudiants': 'etudiant'}
+    )
+    
+    # Une page de notes à la fois (curseur sur l'ordre d'affichage)
+    page = PageCurseur(request, notes, ['-date_soumission', 'matiere__nom', 'etudiant__nom'])
     
     context = {
-        'notes': notes,
+        'notes': page,
+        'page': page,
         'stats': stats,
         'departement': departement,
         'annees': annees,
         'annee_selectionnee': annee_selectionnee,
-        'filters': {
-            'niveau': niveau_code,
-            'statut': statut,
-            'matricule': matricule,
-        }
+        'filters': filters,
     }
     
     return render(request, 'gestion_notes/validation/list.html', context)
 
 
+@login_required
+def validation_notes_export(request):
+    """
+    Export CSV / Excel des notes de la liste de validation (mêmes filtres)
+    Lignes lues par lots et écrites au fil de l'eau (voir config/export_utils.py)
+    """
+    if not request.user.profile.is_chef_departement():
+        messages.error(request, "Accès réservé aux chefs de département")
+        return redirect('home')
+    
+    departement = request.user.profile.departement
+    notes, annee_selectionnee, filters = filtrer_notes_validation(request, departement)
+    
+    statuts = dict(Note.STATUT_CHOICES)
+    lignes = (
+        (matricule, nom, prenom, niveau, code, matiere, note1, note2, note3, moyenne,
+         statuts.get(statut, statut), date_soumission, date_validation)
+        for matricule, nom, prenom, niveau, code, matiere, note1, note2, note3, moyenne,
+            statut, date_soumission, date_validation
+        in notes.order_by('matiere__code', 'etudiant__nom', 'etudiant__prenom', 'pk').values_list(
+            'etudiant__matricule', 'etudiant__nom', 'etudiant__prenom', 'etudiant__niveau__code',
+            'matiere__code', 'matiere__nom', 'note1', 'note2', 'note3', 'moyenne',
+            'statut', 'date_soumission', 'date_validation'
+        ).iterator(chunk_size=TAILLE_LOT_EXPORT)
+    )
+    
+    entetes = [
+        'Matricule', 'Nom', 'Prénom', 'Niveau', 'Code matière', 'Matière',
+        'Note 1', 'Note 2', 'Note 3', 'Moyenne', 'Statut', 'Soumise le', 'Validée le'
+    ]
+    annee = annee_selectionnee.annee.replace('/', '-') if annee_selectionnee else 'toutes'
+    return reponse_export(format_export(request), f'notes_{departement.code}_{annee}', entetes, lignes)
+
+
+@login_required
+def resultats_ue_export(request):
+    """
+    Export CSV / Excel des résultats UE des étudiants du département
+    Filtres de la liste de validation : année, niveau, matricule
+    """
+    if not request.user.profile.is_chef_departement():
+        messages.error(request, "Accès réservé aux chefs de département")
+        return redirect('home')
+    
+    departement = request.user.profile.departement
+    
+    annee_id = request.GET.get('annee', '')
+    if annee_id:
+        annee_selectionnee = get_object_or_404(AnneeAcademique, pk=annee_id)
+    else:
+        annee_selectionnee = AnneeAcademique.get_active()
+    
+    resultats = ResultatUE.objects.filter(
+        etudiant__departement=departement,
+        etudiant__annee_academique=annee_selectionnee
+    )
+    
+    niveau_code = request.GET.get('niveau', '')
+    matricule = request.GET.get('matricule', '')
+    if niveau_code:
+        resultats = resultats.filter(etudiant__niveau__code=niveau_code)
+    if matricule:
+        resultats = resultats.filter(etudiant__matricule__icontains=matricule)
+    
+    lignes = (
+        (matricule, nom, prenom, niveau, semestre, code, ue, moyenne, note_litterale,
+         UniteEnseignement.resultat_pour_moyenne(moyenne), valide)
+        for matricule, nom, prenom, niveau, semestre, code, ue, moyenne, note_litterale, valide
+        in resultats.order_by('etudiant__nom', 'etudiant__prenom', 'etudiant_id', 'ue__semestre__ordre', 'ue__code').values_list(
+            'etudiant__matricule', 'etudiant__nom', 'etudiant__prenom', 'etudiant__niveau__code',
+            'ue__semestre__code', 'ue__code', 'ue__nom', 'moyenne', 'note_litterale', 'valide'
+        ).iterator(chunk_size=TAILLE_LOT_EXPORT)
+    )
+    
+    entetes = [
+        'Matricule', 'Nom', 'Prénom', 'Niveau', 'Semestre', 'Code UE', 'UE',
+        'Moyenne', 'Note littérale', 'Résultat', 'UE validée'
+    ]
+    annee = annee_selectionnee.annee.replace('/', '-') if annee_selectionnee else 'toutes'
+    return reponse_export(format_export(request), f'resultats_ue_{departement.code}_{annee}', entetes, lignes)
+
+
 @login_required
 def validation_notes_valider(request, note_id):
     """Valider une note individuelle"""
@@ -160,16 +262,11 @@ def validation_notes_valider_lot(request):
         if note_ids:
             notes = Note.objects.filter(
                 pk__in=note_ids,
-                matiere__departements=request.user.profile.departement,
-                statut='soumis'
+                matiere__departements=request.user.profile.departement
             )
             
-            count = 0
-            for note in notes:
-                note.statut = 'valide'
-                note.date_validation = timezone.now()
-                note.save()
-                count += 1
+            # Une seule instruction UPDATE, un seul signal pour tout le lot
+            count = WorkflowNotesService.valider(notes)
             
             messages.success(request, f"{count} note(s) validée(s) avec succès")
         else:
@@ -197,14 +294,14 @@ def enseignant_notes_list(request):
     enseignant = request.user.profile.enseignant
     
     # Récupérer toutes les années académiques
-    annees = AnneeAcademique.objects.all().order_by('-est_active', '-date_debut')
+    annees = AnneeAcademique.get_toutes(active_en_tete=True)
     
     # Année sélectionnée (par défaut : année active)
     annee_id = request.GET.get('annee', '')
     if annee_id:
         annee_selectionnee = get_object_or_404(AnneeAcademique, pk=annee_id)
     else:
-        annee_selectionnee = AnneeAcademique.objects.filter(est_active=True).first()
+        annee_selectionnee = AnneeAcademique.get_active()
     
     # Filtres
     matiere_id = request.GET.get('matiere', '')
@@ -234,13 +331,7 @@ def enseignant_notes_list(request):
         matiere_selectionnee = None
     
     # Statistiques
-    stats = {
-        'total': notes.count(),
-        'brouillon': notes.filter(statut='brouillon').count(),
-        'soumis': notes.filter(statut='soumis').count(),
-        'valide': notes.filter(statut='valide').count(),
-        'invalide': notes.filter(statut='invalide').count(),
-    }
+    stats = compter_statuts(notes, ['brouillon', 'soumis', 'valide', 'invalide'])
     
     # Matières de l'enseignant
     matieres = Matiere.objects.filter(enseignants=enseignant)
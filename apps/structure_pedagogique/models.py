@@ -5,7 +5,10 @@ Fichier : apps/structure_pedagogique/models.py
 """
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from apps.gestion_academique.models import Niveau, Enseignant, Departement
+from config.cache_utils import invalider
 
 
 class Semestre(models.Model):
@@ -91,4 +94,17 @@ class Matiere(models.Model):
     
     def get_departements_list(self):
         """Retourne la liste des départements"""
-        return ", ".join([d.nom for d in self.departements.all()])
\ No newline at end of file
+        return ", ".join([d.nom for d in self.departements.all()])
+
+
+# ===== INVALIDATION DU CACHE (config/cache_utils.py) =====
+
+@receiver(post_save, sender=Semestre)
+@receiver(post_delete, sender=Semestre)
+@receiver(post_save, sender=Matiere)
+@receiver(post_delete, sender=Matiere)
+@receiver(m2m_changed, sender=Matiere.departements.through)
+def invalider_cache_matiere(sender, **kwargs):
+    """Matière ou semestre modifié : toutes les entrées dépendant des matières"""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalider('matiere')
@@ -1 +1,97 @@
 # structure_pedagogique/tests.py
+"""
+MODULE 4 : Structure Pédagogique - Tests
+"""
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.gestion_academique.models import Niveau
+from config.cache_utils import cle_etudiant, cle_matiere, invalider, invalider_objets, memoiser, versions
+from .models import Matiere, Semestre
+
+
+@memoiser('matiere', dependances=('ue',))
+def calcul_matiere(matiere, facteur, arrondi=0):
+    return round(matiere.coefficient * facteur, arrondi)
+
+
+class CacheVersionneTests(TestCase):
+    """Clés versionnées et mémoïsation (config/cache_utils.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        niveau = Niveau.objects.create(code='L1', nom='Licence 1', ordre=1)
+        semestre = Semestre.objects.create(code='S1', nom='Semestre 1', ordre=1, niveau=niveau)
+        cls.matiere = Matiere.objects.create(
+            code='RES101', nom='Réseaux', coefficient=2, credits=3, niveau=niveau, semestre=semestre
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_stables(self):
+        premieres = versions(('etudiant', None), ('etudiant', 1))
+
+        self.assertEqual(versions(('etudiant', None), ('etudiant', 1)), premieres)
+
+    def test_invalider_un_objet(self):
+        cle_1, cle_2 = cle_etudiant(1, 'bulletin'), cle_etudiant(2, 'bulletin')
+
+        invalider('etudiant', 1)
+
+        self.assertNotEqual(cle_etudiant(1, 'bulletin'), cle_1)
+        self.assertEqual(cle_etudiant(2, 'bulletin'), cle_2)
+
+    def test_invalider_le_type_ou_une_dependance(self):
+        cle = cle_etudiant(1, 'bulletin', dependances=('matiere',))
+        invalider_objets('etudiant', [2, 3])
+        self.assertEqual(cle_etudiant(1, 'bulletin', dependances=('matiere',)), cle)
+
+        invalider('matiere')
+        cle_apres_matiere = cle_etudiant(1, 'bulletin', dependances=('matiere',))
+        self.assertNotEqual(cle_apres_matiere, cle)
+
+        invalider('etudiant')
+        self.assertNotEqual(cle_etudiant(1, 'bulletin', dependances=('matiere',)), cle_apres_matiere)
+
+    def test_matiere_modifiee_par_signal(self):
+        cle = cle_matiere(self.matiere, 'moyennes')
+
+        self.matiere.coefficient = 3
+        self.matiere.save()
+
+        self.assertNotEqual(cle_matiere(self.matiere, 'moyennes'), cle)
+
+    def test_invalidation_repetee_apres_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            invalider('etudiant', 1)
+            version_transaction, = versions(('etudiant', 1))
+
+        self.assertEqual(len(rappels), 1)
+        self.assertNotEqual(versions(('etudiant', 1)), [version_transaction])
+
+    def test_memoiser(self):
+        appels = []
+        fonction = memoiser('matiere')(lambda matiere, facteur: appels.append(facteur) or facteur * 2)
+
+        self.assertEqual(fonction(self.matiere, 3), 6)
+        self.assertEqual(fonction(self.matiere, 3), 6)
+        self.assertEqual(fonction(self.matiere.pk, 3), 6)
+        self.assertEqual(appels, [3])
+
+        self.assertEqual(fonction(self.matiere, 4), 8)
+        invalider('matiere', self.matiere)
+        self.assertEqual(fonction(self.matiere, 3), 6)
+        self.assertEqual(appels, [3, 4, 3])
+
+    def test_memoiser_arguments_nommes_et_dependances(self):
+        self.assertEqual(calcul_matiere(self.matiere, 1.26, arrondi=1), 2.5)
+        self.assertEqual(calcul_matiere(self.matiere, 1.26, arrondi=2), 2.52)
+
+        # Coefficient modifié sans signal : résultat en cache jusqu'à l'invalidation de 'ue'
+        Matiere.objects.filter(pk=self.matiere.pk).update(coefficient=4)
+        self.matiere.refresh_from_db()
+        self.assertEqual(calcul_matiere(self.matiere, 1.26, arrondi=1), 2.5)
+        invalider('ue')
+        self.assertEqual(calcul_matiere(self.matiere, 1.26, arrondi=1), 5.0)
+        self.assertEqual(calcul_matiere.sans_cache(self.matiere, 1.26, arrondi=1), 5.0)
@@ -7,6 +7,7 @@ from django.contrib import messages
 from django.db.models import Q, Count
 from .models import Semestre, Matiere
 from .forms import SemestreForm, MatiereForm
+from config.pagination_utils import PageCurseur
 
 
 # ==================== SEMESTRES (Admin uniquement) ====================
@@ -97,7 +98,7 @@ def matiere_list(request):
     """Liste des matières - Tous peuvent voir"""
     matieres = Matiere.objects.select_related(
         'niveau', 'semestre'
-    ).prefetch_related('enseignants', 'departements').order_by('code')
+    ).prefetch_related('enseignants', 'departements')
     
     # Si Chef, filtrer par son département
     if request.user.profile.is_chef_departement()  or request.user.profile.is_chef_departement():
@@ -126,8 +127,11 @@ def matiere_list(request):
     # Pour les filtres
     from apps.gestion_academique.models import Departement, Niveau
     
+    page = PageCurseur(request, matieres, ['code'])
+    
     context = {
-        'matieres': matieres,
+        'matieres': page,
+        'page': page,
         'total': matieres.count(),
         'search': search,
         'departements': Departement.objects.all(),
@@ -0,0 +1,17 @@
+# taches/admin.py
+from django.contrib import admin
+from .models import FichierTache, Tache
+
+
+@admin.register(Tache)
+class TacheAdmin(admin.ModelAdmin):
+    list_display = ('id', 'type_tache', 'statut', 'progression', 'total', 'cree_par', 'date_creation', 'date_fin')
+    list_filter = ('type_tache', 'statut')
+    readonly_fields = ('date_creation', 'date_debut', 'date_fin', 'date_maj')
+
+
+@admin.register(FichierTache)
+class FichierTacheAdmin(admin.ModelAdmin):
+    list_display = ('nom', 'tache', 'taille', 'date_creation')
+    exclude = ('contenu',)
+    readonly_fields = ('date_creation',)
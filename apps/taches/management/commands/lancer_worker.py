@@ -0,0 +1,63 @@
+# taches/management/commands/lancer_worker.py
+"""
+Worker des tâches de fond
+Usage : python manage.py lancer_worker [--une-fois] [--intervalle 2]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.taches.services import TacheService
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches de fond en attente (passage d'année, archives, ...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help="Traite les tâches en attente puis s'arrête"
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=2.0,
+            help="Délai (secondes) entre deux consultations de la file vide"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS("🚀 Worker démarré"))
+        prochaine_verification = 0
+
+        try:
+            while True:
+                close_old_connections()
+
+                # Tâches laissées en cours par un worker arrêté (au démarrage, puis chaque minute)
+                if time.monotonic() >= prochaine_verification:
+                    liberees = TacheService.liberer_bloquees()
+                    if liberees:
+                        self.stdout.write(self.style.WARNING(f"⚠ {liberees} tâche(s) interrompue(s) marquée(s) échouée(s)"))
+                    prochaine_verification = time.monotonic() + 60
+
+                tache = TacheService.reserver_prochaine()
+
+                if tache is None:
+                    if options['une_fois']:
+                        break
+                    time.sleep(options['intervalle'])
+                    continue
+
+                self.stdout.write(f"▶ {tache}")
+                TacheService.executer(tache)
+
+                if tache.statut == 'terminee':
+                    self.stdout.write(self.style.SUCCESS(f"✅ {tache}"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"❌ {tache} : {tache.erreur.splitlines()[0]}"))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write("Worker arrêté")
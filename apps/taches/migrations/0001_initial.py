@@ -0,0 +1,40 @@
+# Generated by Django 5.2.10 on 2026-10-17 22:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_tache', models.CharField(choices=[('passage_annee', "Passage d'année"), ('verification_archives', 'Vérification des archives')], max_length=50, verbose_name='Type')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echouee', 'Échouée')], db_index=True, default='en_attente', max_length=20, verbose_name='Statut')),
+                ('parametres', models.JSONField(blank=True, default=dict, verbose_name='Paramètres')),
+                ('progression', models.IntegerField(default=0, verbose_name='Éléments traités')),
+                ('total', models.IntegerField(default=0, verbose_name='Total à traiter')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Message')),
+                ('resultat', models.JSONField(blank=True, null=True, verbose_name='Résultat')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Créée le')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Démarrée le')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Terminée le')),
+                ('cree_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='taches', to=settings.AUTH_USER_MODEL, verbose_name='Créée par')),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-17 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0002_tache_generation_bulletins'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='date_maj',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernière activité'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-17 23:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0003_tache_date_maj'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FichierTache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('type_contenu', models.CharField(max_length=100, verbose_name='Type de contenu')),
+                ('contenu', models.BinaryField(verbose_name='Contenu')),
+                ('taille', models.PositiveIntegerField(default=0, verbose_name='Taille (octets)')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('tache', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fichier', to='taches.tache', verbose_name='Tâche')),
+            ],
+            options={
+                'verbose_name': 'Fichier de tâche',
+                'verbose_name_plural': 'Fichiers de tâches',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-17 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0004_fichiertache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tache',
+            name='type_tache',
+            field=models.CharField(choices=[('passage_annee', "Passage d'année"), ('verification_archives', 'Vérification des archives'), ('generation_bulletins', 'Génération des bulletins'), ('mots_de_passe_etudiants', 'Mots de passe des étudiants importés')], max_length=50, verbose_name='Type'),
+        ),
+    ]
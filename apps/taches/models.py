@@ -0,0 +1,161 @@
+# taches/models.py
+"""
+Tâches de fond - Models
+File d'attente de tâches longues (passage d'année, vérification des archives,
+génération des bulletins, mots de passe des étudiants importés)
+exécutées par le worker `python manage.py lancer_worker`
+"""
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class Tache(models.Model):
+    """Tâche longue exécutée en arrière-plan par le worker"""
+
+    TYPE_CHOICES = (
+        ('passage_annee', "Passage d'année"),
+        ('verification_archives', 'Vérification des archives'),
+        ('generation_bulletins', 'Génération des bulletins'),
+        ('mots_de_passe_etudiants', 'Mots de passe des étudiants importés'),
+    )
+
+    STATUT_CHOICES = (
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+        ('echouee', 'Échouée'),
+    )
+
+    type_tache = models.CharField(max_length=50, choices=TYPE_CHOICES, verbose_name="Type")
+    statut = models.CharField(
+        max_length=20,
+        choices=STATUT_CHOICES,
+        default='en_attente',
+        db_index=True,
+        verbose_name="Statut"
+    )
+    parametres = models.JSONField(default=dict, blank=True, verbose_name="Paramètres")
+
+    # Avancement
+    progression = models.IntegerField(default=0, verbose_name="Éléments traités")
+    total = models.IntegerField(default=0, verbose_name="Total à traiter")
+    message = models.CharField(max_length=255, blank=True, verbose_name="Message")
+
+    # Résultat
+    resultat = models.JSONField(null=True, blank=True, verbose_name="Résultat")
+    erreur = models.TextField(blank=True, verbose_name="Erreur")
+
+    cree_par = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='taches',
+        verbose_name="Créée par"
+    )
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Créée le")
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name="Démarrée le")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Terminée le")
+    # Signe de vie du worker : réservation et chaque avancement (voir TacheService.liberer_bloquees)
+    date_maj = models.DateTimeField(null=True, blank=True, verbose_name="Dernière activité")
+
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        ordering = ['-date_creation']
+
+    def __str__(self):
+        return f"{self.get_type_tache_display()} #{self.pk} ({self.get_statut_display()})"
+
+    def get_pourcentage(self):
+        """Pourcentage d'avancement (0-100)"""
+        if self.statut == 'terminee':
+            return 100
+        if self.total > 0:
+            return min(100, int(self.progression * 100 / self.total))
+        return 0
+
+    def est_terminee(self):
+        """La tâche est finie (avec succès ou non)"""
+        return self.statut in ['terminee', 'echouee']
+
+    def enregistrer_fichier(self, nom, type_contenu, fichier):
+        """Conserve en base le fichier produit (objet fichier ouvert en binaire)"""
+        fichier.seek(0)
+        contenu = fichier.read()
+        FichierTache.objects.update_or_create(
+            tache=self,
+            defaults={'nom': nom, 'type_contenu': type_contenu, 'contenu': contenu, 'taille': len(contenu)}
+        )
+
+    def maj_progression(self, progression, total=None, message=None):
+        """
+        Enregistre l'avancement sans toucher aux autres champs
+        (appelé par les gestionnaires pendant l'exécution)
+        """
+        self.progression = progression
+        self.date_maj = timezone.now()
+        champs = {'progression': progression, 'date_maj': self.date_maj}
+        if total is not None:
+            self.total = total
+            champs['total'] = total
+        if message is not None:
+            self.message = message[:255]
+            champs['message'] = self.message
+        Tache.objects.filter(pk=self.pk).update(**champs)
+
+    def _cloturer(self, **champs):
+        """
+        Passe la tâche à son statut final si elle est toujours en cours
+        UPDATE conditionnel : une tâche déjà libérée par TacheService.liberer_bloquees
+        (worker jugé arrêté) n'est pas réécrite par un worker qui finit en retard
+
+        Returns:
+            bool: False si la tâche n'était plus en cours (instance rechargée)
+        """
+        champs['date_fin'] = timezone.now()
+        if not Tache.objects.filter(pk=self.pk, statut='en_cours').update(**champs):
+            self.refresh_from_db()
+            return False
+
+        for champ, valeur in champs.items():
+            setattr(self, champ, valeur)
+        return True
+
+    def terminer(self, resultat):
+        """Marque la tâche comme terminée avec son résultat"""
+        return self._cloturer(
+            statut='terminee',
+            resultat=resultat,
+            progression=max(self.progression, self.total),
+        )
+
+    def echouer(self, erreur):
+        """Marque la tâche comme échouée"""
+        return self._cloturer(statut='echouee', erreur=erreur)
+
+
+class FichierTache(models.Model):
+    """
+    Fichier produit par une tâche (ex : ZIP des bulletins), conservé en base :
+    le worker et le site sont des services distincts, sans disque commun
+    """
+    tache = models.OneToOneField(
+        Tache,
+        on_delete=models.CASCADE,
+        related_name='fichier',
+        verbose_name="Tâche"
+    )
+    nom = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    type_contenu = models.CharField(max_length=100, verbose_name="Type de contenu")
+    contenu = models.BinaryField(verbose_name="Contenu")
+    taille = models.PositiveIntegerField(default=0, verbose_name="Taille (octets)")
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+
+    class Meta:
+        verbose_name = "Fichier de tâche"
+        verbose_name_plural = "Fichiers de tâches"
+
+    def __str__(self):
+        return f"{self.nom} ({self.tache})"
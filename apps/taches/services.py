@@ -0,0 +1,127 @@
+# taches/services.py
+"""
+Services des tâches de fond : mise en file, réservation et exécution
+Aucun broker externe : la file est la table Tache, consommée par le worker
+"""
+import traceback
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Tache
+
+
+# Type de tâche → gestionnaire appelé avec (tache, **parametres)
+# Le gestionnaire retourne un résultat sérialisable en JSON
+GESTIONNAIRES = {
+    'passage_annee': 'apps.gestion_academique.taches.executer_passage_annee',
+    'verification_archives': 'apps.gestion_academique.taches.executer_verification_archives',
+    'generation_bulletins': 'apps.bulletins.taches.executer_generation_bulletins',
+    'mots_de_passe_etudiants': 'apps.gestion_academique.taches.executer_mots_de_passe_etudiants',
+}
+
+
+class TacheService:
+    """
+    Service de gestion de la file des tâches
+    """
+
+    # Tâche en cours sans avancement depuis ce délai : son worker est considéré arrêté
+    DELAI_INACTIVITE = timedelta(minutes=30)
+
+    @staticmethod
+    def planifier(type_tache, parametres=None, utilisateur=None):
+        """
+        Ajoute une tâche dans la file d'attente
+
+        Returns:
+            Tache: La tâche créée (statut 'en_attente')
+        """
+        if type_tache not in GESTIONNAIRES:
+            raise ValueError(f"Type de tâche inconnu : {type_tache}")
+
+        return Tache.objects.create(
+            type_tache=type_tache,
+            parametres=parametres or {},
+            cree_par=utilisateur,
+            message="En attente du worker",
+        )
+
+    @staticmethod
+    def tache_en_file(type_tache):
+        """Retourne la tâche de ce type en attente ou en cours (ou None)"""
+        return Tache.objects.filter(
+            type_tache=type_tache,
+            statut__in=['en_attente', 'en_cours']
+        ).order_by('date_creation').first()
+
+    @staticmethod
+    def reserver_prochaine():
+        """
+        Réserve la plus ancienne tâche en attente
+        La réservation est un UPDATE conditionnel : plusieurs workers
+        peuvent tourner sans exécuter deux fois la même tâche
+
+        Returns:
+            Tache ou None
+        """
+        candidates = Tache.objects.filter(statut='en_attente').order_by('date_creation')
+
+        for tache_id in candidates.values_list('pk', flat=True)[:10]:
+            maintenant = timezone.now()
+            reservee = Tache.objects.filter(pk=tache_id, statut='en_attente').update(
+                statut='en_cours',
+                date_debut=maintenant,
+                date_maj=maintenant,
+                message="Démarrage..."
+            )
+            if reservee:
+                return Tache.objects.get(pk=tache_id)
+
+        return None
+
+    @staticmethod
+    def liberer_bloquees(delai=None):
+        """
+        Marque comme échouées les tâches en cours dont le worker s'est arrêté
+        (aucun avancement depuis `delai`) : elles ne bloquent plus tache_en_file
+        et peuvent être relancées depuis l'application
+
+        Returns:
+            int: Nombre de tâches libérées
+        """
+        delai = delai or TacheService.DELAI_INACTIVITE
+        maintenant = timezone.now()
+        limite = maintenant - delai
+
+        return Tache.objects.filter(
+            statut='en_cours'
+        ).filter(
+            Q(date_maj__lt=limite) | Q(date_maj__isnull=True, date_debut__lt=limite)
+        ).update(
+            statut='echouee',
+            erreur=f"Worker arrêté pendant l'exécution (aucun avancement depuis "
+                   f"{int(delai.total_seconds() // 60)} min) : relancez la tâche.",
+            date_fin=maintenant,
+            date_maj=maintenant,
+        )
+
+    @staticmethod
+    def executer(tache):
+        """
+        Exécute une tâche réservée et enregistre son résultat ou son erreur
+
+        Returns:
+            Tache: La tâche mise à jour
+        """
+        try:
+            gestionnaire = import_string(GESTIONNAIRES[tache.type_tache])
+            resultat = gestionnaire(tache, **tache.parametres)
+        except Exception as e:
+            tache.echouer(f"{e}\n\n{traceback.format_exc()}")
+        else:
+            tache.terminer(resultat)
+
+        return tache
@@ -0,0 +1,165 @@
+# taches/tests.py
+"""
+Tâches de fond - Tests
+"""
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import FichierTache, Tache
+from .services import GESTIONNAIRES, TacheService
+
+
+def gestionnaire_ok(tache, valeur=0):
+    tache.maj_progression(1, 1)
+    return {'valeur': valeur}
+
+
+def gestionnaire_erreur(tache):
+    raise RuntimeError("Échec du traitement")
+
+
+def gestionnaire_bloque(tache):
+    # Le worker est jugé arrêté pendant l'exécution
+    Tache.objects.filter(pk=tache.pk).update(date_maj=timezone.now() - timedelta(hours=1))
+    TacheService.liberer_bloquees()
+    return {'valeur': 1}
+
+
+class ReservationTests(TestCase):
+    """Réservation des tâches en attente par UPDATE conditionnel"""
+
+    def setUp(self):
+        self.premiere = TacheService.planifier('passage_annee')
+        self.seconde = TacheService.planifier('verification_archives')
+
+    def test_reserve_la_plus_ancienne(self):
+        tache = TacheService.reserver_prochaine()
+
+        self.assertEqual(tache.pk, self.premiere.pk)
+        self.assertEqual(tache.statut, 'en_cours')
+        self.assertIsNotNone(tache.date_debut)
+        self.assertIsNotNone(tache.date_maj)
+
+    def test_pas_de_double_reservation(self):
+        self.assertEqual(TacheService.reserver_prochaine().pk, self.premiere.pk)
+        self.assertEqual(TacheService.reserver_prochaine().pk, self.seconde.pk)
+        self.assertIsNone(TacheService.reserver_prochaine())
+
+    def test_tache_prise_par_un_autre_worker(self):
+        maintenant = timezone.now
+
+        def autre_worker():
+            # Un autre worker réserve la première tâche entre la lecture et l'UPDATE
+            Tache.objects.filter(pk=self.premiere.pk).update(statut='en_cours')
+            return maintenant()
+
+        with mock.patch('apps.taches.services.timezone') as horloge:
+            horloge.now.side_effect = autre_worker
+            tache = TacheService.reserver_prochaine()
+
+        self.assertEqual(tache.pk, self.seconde.pk)
+
+
+class LiberationTests(TestCase):
+    """Tâches en cours sans avancement depuis DELAI_INACTIVITE"""
+
+    def creer(self, statut='en_cours', inactivite=None, date_maj=True):
+        date = timezone.now() - (inactivite or timedelta())
+        return Tache.objects.create(
+            type_tache='passage_annee', statut=statut,
+            date_debut=date, date_maj=date if date_maj else None
+        )
+
+    def test_tache_inactive_echouee(self):
+        tache = self.creer(inactivite=timedelta(minutes=31))
+
+        self.assertEqual(TacheService.liberer_bloquees(), 1)
+        tache.refresh_from_db()
+        self.assertEqual(tache.statut, 'echouee')
+        self.assertIn("Worker arrêté", tache.erreur)
+        self.assertIsNotNone(tache.date_fin)
+
+    def test_sans_date_maj_selon_date_debut(self):
+        tache = self.creer(inactivite=timedelta(minutes=31), date_maj=False)
+
+        self.assertEqual(TacheService.liberer_bloquees(), 1)
+        tache.refresh_from_db()
+        self.assertEqual(tache.statut, 'echouee')
+
+    def test_taches_actives_ou_en_attente_conservees(self):
+        active = self.creer(inactivite=timedelta(minutes=5))
+        en_attente = self.creer(statut='en_attente', inactivite=timedelta(hours=2))
+
+        self.assertEqual(TacheService.liberer_bloquees(), 0)
+        active.refresh_from_db()
+        en_attente.refresh_from_db()
+        self.assertEqual(active.statut, 'en_cours')
+        self.assertEqual(en_attente.statut, 'en_attente')
+
+
+@mock.patch.dict(GESTIONNAIRES, {
+    'passage_annee': 'apps.taches.tests.gestionnaire_ok',
+    'verification_archives': 'apps.taches.tests.gestionnaire_erreur',
+    'generation_bulletins': 'apps.taches.tests.gestionnaire_bloque',
+})
+class ExecutionTests(TestCase):
+    """Résultat ou erreur enregistrés par TacheService.executer"""
+
+    def executer(self, type_tache, parametres=None):
+        TacheService.planifier(type_tache, parametres)
+        tache = TacheService.executer(TacheService.reserver_prochaine())
+        return tache, Tache.objects.get(pk=tache.pk)
+
+    def test_succes(self):
+        tache, en_base = self.executer('passage_annee', {'valeur': 3})
+
+        self.assertEqual(tache.statut, 'terminee')
+        self.assertEqual(en_base.statut, 'terminee')
+        self.assertEqual(en_base.resultat, {'valeur': 3})
+        self.assertEqual(en_base.progression, 1)
+
+    def test_erreur(self):
+        tache, en_base = self.executer('verification_archives')
+
+        self.assertEqual(tache.statut, 'echouee')
+        self.assertEqual(en_base.statut, 'echouee')
+        self.assertIn("Échec du traitement", en_base.erreur)
+        self.assertIn("Traceback", en_base.erreur)
+        self.assertIsNone(en_base.resultat)
+
+    def test_tache_liberee_non_reecrite(self):
+        tache, en_base = self.executer('generation_bulletins')
+
+        self.assertEqual(tache.statut, 'echouee')
+        self.assertEqual(en_base.statut, 'echouee')
+        self.assertIn("Worker arrêté", en_base.erreur)
+        self.assertIsNone(en_base.resultat)
+
+    def test_terminer_apres_liberation(self):
+        TacheService.planifier('passage_annee')
+        tache = TacheService.reserver_prochaine()
+        Tache.objects.filter(pk=tache.pk).update(date_maj=timezone.now() - timedelta(hours=1))
+        TacheService.liberer_bloquees()
+
+        self.assertFalse(tache.terminer({'valeur': 1}))
+        self.assertFalse(tache.echouer("Erreur tardive"))
+        self.assertEqual(tache.statut, 'echouee')
+        self.assertIn("Worker arrêté", Tache.objects.get(pk=tache.pk).erreur)
+
+
+class FichierTacheTests(TestCase):
+    """Fichier produit par une tâche conservé en base"""
+
+    def test_enregistrer_fichier(self):
+        tache = TacheService.planifier('generation_bulletins')
+
+        tache.enregistrer_fichier('Bulletins.zip', 'application/zip', io.BytesIO(b'contenu'))
+        tache.enregistrer_fichier('Bulletins.zip', 'application/zip', io.BytesIO(b'nouveau contenu'))
+
+        fichier = FichierTache.objects.get(tache=tache)
+        self.assertEqual(bytes(fichier.contenu), b'nouveau contenu')
+        self.assertEqual(fichier.taille, 15)
@@ -0,0 +1,13 @@
+# taches/urls.py
+"""
+URLs des tâches de fond
+"""
+from django.urls import path
+from . import views
+
+app_name = 'taches'
+
+urlpatterns = [
+    path('<int:pk>/', views.tache_detail, name='tache_detail'),
+    path('<int:pk>/statut/', views.tache_statut, name='tache_statut'),
+]
@@ -0,0 +1,47 @@
+# taches/views.py
+"""
+Tâches de fond - Views (suivi de l'avancement)
+"""
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import JsonResponse
+
+from .models import Tache
+
+
+def _peut_voir(user, tache):
+    """Le créateur de la tâche et la direction peuvent la suivre"""
+    return tache.cree_par_id == user.pk or user.profile.is_admin()
+
+
+@login_required
+def tache_detail(request, pk):
+    """Page de suivi d'une tâche (rafraîchie automatiquement)"""
+    tache = get_object_or_404(Tache, pk=pk)
+
+    if not _peut_voir(request.user, tache):
+        messages.error(request, "Accès refusé !")
+        return redirect('home')
+
+    context = {'tache': tache}
+    return render(request, 'taches/detail.html', context)
+
+
+@login_required
+def tache_statut(request, pk):
+    """Avancement d'une tâche au format JSON (polling)"""
+    tache = get_object_or_404(Tache, pk=pk)
+
+    if not _peut_voir(request.user, tache):
+        return JsonResponse({'erreur': "Accès refusé"}, status=403)
+
+    return JsonResponse({
+        'statut': tache.statut,
+        'statut_display': tache.get_statut_display(),
+        'progression': tache.progression,
+        'total': tache.total,
+        'pourcentage': tache.get_pourcentage(),
+        'message': tache.message,
+        'terminee': tache.est_terminee(),
+    })
@@ -0,0 +1,165 @@
+# config/cache_utils.py
+"""
+Clés de cache versionnées des objets du domaine et mémoïsation des services
+
+Chaque type d'objet ('etudiant', 'matiere', 'ue', 'annee', ...) a une
+génération, et chaque objet une version, conservées dans le cache. Elles
+font partie des clés : invalider revient à les changer (aucune suppression
+de clé, aucune requête), les anciennes entrées expirent d'elles-mêmes.
+- invalider('etudiant', etudiant) : toutes les entrées de cet étudiant
+- invalider('matiere') : toutes les entrées de toutes les matières
+
+Les invalidations sont déclenchées par les signaux des modèles
+(voir les receivers des fichiers models.py)
+"""
+import functools
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Durée par défaut d'une entrée mémoïsée (secondes)
+DUREE_CACHE = 600
+
+PREFIXE = 'uganc'
+
+_ABSENT = object()
+
+
+def _pk(objet):
+    """Identifiant d'une instance de modèle, ou la valeur elle-même"""
+    return getattr(objet, 'pk', objet)
+
+
+def _cle_version(type_objet, objet=None):
+    if objet is None:
+        return f'{PREFIXE}:generation:{type_objet}'
+    return f'{PREFIXE}:version:{type_objet}:{_pk(objet)}'
+
+
+def versions(*references):
+    """
+    Versions courantes en un aller-retour avec le cache
+
+    Args:
+        references: (type_objet, objet ou None) ; None = génération du type
+
+    Returns:
+        list: Versions, dans l'ordre des références (créées si absentes ou évincées)
+    """
+    cles = [_cle_version(type_objet, objet) for type_objet, objet in references]
+    trouvees = cache.get_many(cles)
+
+    resultat = []
+    for cle in cles:
+        if cle not in trouvees:
+            # add : ne remplace pas une version posée entre-temps par un autre processus
+            cache.add(cle, time.time_ns(), None)
+            trouvees[cle] = cache.get(cle)
+        resultat.append(trouvees[cle])
+    return resultat
+
+
+def _nouvelles_versions(cles):
+    maintenant = time.time_ns()
+    cache.set_many({cle: maintenant for cle in cles}, None)
+
+
+def invalider(type_objet, objet=None):
+    """Rend obsolètes les entrées d'un objet, ou de tout le type si objet est None"""
+    invalider_cles([_cle_version(type_objet, objet)])
+
+
+def invalider_objets(type_objet, objets):
+    """invalider() pour plusieurs objets du même type, en un aller-retour"""
+    invalider_cles([_cle_version(type_objet, objet) for objet in set(map(_pk, objets))])
+
+
+def invalider_cles(cles):
+    """
+    Nouvelles versions tout de suite, et de nouveau après le COMMIT si une
+    transaction est en cours : un autre processus a pu remettre en cache
+    l'état d'avant la transaction sous la première nouvelle version
+    """
+    _nouvelles_versions(cles)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _nouvelles_versions(cles))
+
+
+def cle_objet(type_objet, objet, *parties, dependances=()):
+    """
+    Clé versionnée d'une donnée calculée pour un objet
+
+    Args:
+        type_objet: Type de l'objet ('etudiant', 'matiere', 'ue', 'annee', ...)
+        objet: Instance ou identifiant
+        parties: Suite de la clé (nom du calcul, paramètres)
+        dependances: Types dont une modification quelconque rend la donnée obsolète
+            (ex : ('matiere', 'ue') pour un bulletin)
+    """
+    references = [(type_objet, None), (type_objet, objet)] + [(dependance, None) for dependance in dependances]
+    generation, version, *generations = versions(*references)
+
+    prefixe = f'{PREFIXE}:{type_objet}:{_pk(objet)}:{generation}.{version}'
+    if generations:
+        prefixe += ':' + '.'.join(map(str, generations))
+
+    # Parties hachées : longueur bornée et sans espaces (contraintes memcached)
+    suite = hashlib.md5(':'.join(str(_pk(partie)) for partie in parties).encode()).hexdigest()
+    return f'{prefixe}:{suite}'
+
+
+# Clés des objets du domaine
+
+def cle_etudiant(etudiant, *parties, dependances=()):
+    return cle_objet('etudiant', etudiant, *parties, dependances=dependances)
+
+
+def cle_matiere(matiere, *parties, dependances=()):
+    return cle_objet('matiere', matiere, *parties, dependances=dependances)
+
+
+def cle_ue(ue, *parties, dependances=()):
+    return cle_objet('ue', ue, *parties, dependances=dependances)
+
+
+def cle_annee(annee, *parties, dependances=()):
+    return cle_objet('annee', annee, *parties, dependances=dependances)
+
+
+def memoiser(type_objet, dependances=(), duree=DUREE_CACHE):
+    """
+    Mémoïse un appel de service dont le premier argument est l'objet du domaine
+
+    Le résultat (sérialisable par pickle) est mis en cache sous une clé
+    versionnée : objet, nom de la fonction, autres arguments (instances de
+    modèles réduites à leur pk). La fonction d'origine reste accessible par
+    .sans_cache.
+
+    Usage :
+        @staticmethod
+        @memoiser('etudiant', dependances=('matiere', 'ue'))
+        def donnees_bulletin(etudiant, semestre1, semestre2):
+            ...
+    """
+    def decorateur(fonction):
+        nom = f'{fonction.__module__}.{fonction.__qualname__}'
+
+        @functools.wraps(fonction)
+        def enveloppe(objet, *args, **kwargs):
+            cle = cle_objet(
+                type_objet, objet, nom, *args,
+                *(f'{nom_argument}={_pk(valeur)}' for nom_argument, valeur in sorted(kwargs.items())),
+                dependances=dependances
+            )
+            resultat = cache.get(cle, _ABSENT)
+            if resultat is _ABSENT:
+                resultat = fonction(objet, *args, **kwargs)
+                cache.set(cle, resultat, duree)
+            return resultat
+
+        enveloppe.sans_cache = fonction
+        return enveloppe
+
+    return decorateur
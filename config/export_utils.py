@@ -0,0 +1,109 @@
+# config/export_utils.py
+"""
+Export des listes en CSV ou Excel sans charger le QuerySet en mémoire
+Les lignes sont lues par lots (QuerySet.iterator) et écrites au fil de l'eau :
+- CSV : réponse en flux, l'en-tête part avant la fin de la requête SQL
+- Excel : classeur openpyxl en écriture seule, construit dans un fichier
+  temporaire puis envoyé par morceaux (un .xlsx est une archive zip, il ne
+  peut pas être envoyé avant d'être complet)
+"""
+import csv
+import datetime
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+
+# Lignes lues par aller-retour avec la base
+TAILLE_LOT_EXPORT = 2000
+
+# Lignes CSV envoyées ensemble au client
+LIGNES_PAR_BLOC = 500
+
+FORMATS_EXPORT = ('csv', 'xlsx')
+
+
+class Echo:
+    """Pseudo-fichier pour csv.writer : write() renvoie la ligne au lieu de la stocker"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def format_export(request):
+    """Format demandé (?format=csv|xlsx), CSV par défaut"""
+    format_demande = request.GET.get('format', 'csv')
+    return format_demande if format_demande in FORMATS_EXPORT else 'csv'
+
+
+def valeur_export(valeur, excel=False):
+    """Valeur de cellule : dates à l'heure locale (sans fuseau pour Excel), None -> vide"""
+    if isinstance(valeur, datetime.datetime):
+        if timezone.is_aware(valeur):
+            valeur = timezone.localtime(valeur).replace(tzinfo=None)
+        return valeur if excel else valeur.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valeur, datetime.date):
+        return valeur if excel else valeur.strftime('%d/%m/%Y')
+    if isinstance(valeur, bool):
+        return 'Oui' if valeur else 'Non'
+    if valeur is None:
+        return None if excel else ''
+    return valeur
+
+
+def reponse_export(format_demande, nom_fichier, entetes, lignes):
+    """
+    Réponse HTTP d'export
+
+    Args:
+        format_demande: 'csv' ou 'xlsx' (voir format_export)
+        nom_fichier: Nom du fichier sans extension
+        entetes: Libellés des colonnes
+        lignes: Itérable de lignes (générateur alimenté par QuerySet.iterator)
+    """
+    if format_demande == 'xlsx':
+        return _reponse_excel(nom_fichier, entetes, lignes)
+    return _reponse_csv(nom_fichier, entetes, lignes)
+
+
+def _reponse_csv(nom_fichier, entetes, lignes):
+    writer = csv.writer(Echo())
+
+    def contenu():
+        # BOM : accents lus correctement à l'ouverture dans Excel
+        yield '\ufeff' + writer.writerow(entetes)
+
+        # Lignes regroupées par blocs : un envoi par bloc plutôt que par ligne
+        bloc = []
+        for ligne in lignes:
+            bloc.append(writer.writerow([valeur_export(valeur) for valeur in ligne]))
+            if len(bloc) >= LIGNES_PAR_BLOC:
+                yield ''.join(bloc)
+                bloc = []
+        if bloc:
+            yield ''.join(bloc)
+
+    response = StreamingHttpResponse(contenu(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}.csv"'
+    return response
+
+
+def _reponse_excel(nom_fichier, entetes, lignes):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=nom_fichier[:31])
+    ws.append(entetes)
+    for ligne in lignes:
+        ws.append([valeur_export(valeur, excel=True) for valeur in ligne])
+
+    # Fichier temporaire supprimé à la fermeture, envoyé par blocs par FileResponse
+    fichier = tempfile.TemporaryFile()
+    wb.save(fichier)
+    fichier.seek(0)
+
+    return FileResponse(
+        fichier,
+        as_attachment=True,
+        filename=f'{nom_fichier}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
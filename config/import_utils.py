@@ -0,0 +1,18 @@
+# config/import_utils.py
+"""
+Outils communs aux imports de fichiers (étudiants, notes)
+Sans dépendance aux modèles : utilisables par les processus de lecture
+"""
+import re
+import unicodedata
+
+
+def normaliser_entete(entete):
+    """En-tête de colonne en clé comparable : 'Date de naissance' -> 'date_de_naissance'"""
+    if entete is None:
+        return ''
+
+    entete = str(entete).strip().lower()
+    entete = unicodedata.normalize('NFKD', entete).encode('ascii', 'ignore').decode('ascii')
+    entete = re.sub(r'[^a-z0-9]+', '_', entete)
+    return entete.strip('_')
@@ -0,0 +1,203 @@
+# config/pagination_utils.py
+"""
+Pagination par curseur (keyset / seek) des pages de liste
+La page suivante est lue avec WHERE (clé de tri) > (dernière ligne affichée)
+au lieu d'un OFFSET : le coût d'une page ne dépend pas du nombre de lignes
+de la table ni du rang de la page
+"""
+import base64
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+
+PAR_PAGE = 50
+
+
+class PageCurseur:
+    """
+    Une page d'un QuerySet trié, repérée par un curseur dans l'URL
+
+    Le curseur (?apres=... ou ?avant=...) contient les valeurs de la clé de
+    tri de la dernière (ou première) ligne de la page voisine. La clé est
+    complétée par 'pk' pour être unique ; les NULL sont placés en fin de
+    liste quel que soit le sens du tri (même ordre sous SQLite et PostgreSQL).
+    Les autres paramètres GET (filtres) sont conservés dans les liens.
+
+    Usage :
+        page = PageCurseur(request, notes, ['-date_soumission', 'matiere__nom', 'etudiant__nom'])
+        context = {'notes': page, 'page': page}
+    """
+
+    def __init__(self, request, queryset, ordre, par_page=PAR_PAGE):
+        self.request = request
+        self.modele = queryset.model
+        self.par_page = par_page
+        self.champs = [champ.lstrip('-') for champ in ordre] + ['pk']
+        self.descendants = [champ.startswith('-') for champ in ordre] + [False]
+
+        apres = self._decoder(request.GET.get('apres'))
+        avant = None if apres is not None else self._decoder(request.GET.get('avant'))
+
+        if avant is not None:
+            # Page précédente : lecture à l'envers puis remise dans l'ordre
+            lignes = list(
+                queryset.filter(self._condition(avant, suivant=False))
+                .order_by(*self._tri(inverse=True))[:par_page + 1]
+            )
+            self.a_precedente = len(lignes) > par_page
+            self.lignes = lignes[:par_page][::-1]
+            self.a_suivante = True
+        else:
+            if apres is not None:
+                queryset = queryset.filter(self._condition(apres, suivant=True))
+            lignes = list(queryset.order_by(*self._tri())[:par_page + 1])
+            self.a_suivante = len(lignes) > par_page
+            self.lignes = lignes[:par_page]
+            self.a_precedente = apres is not None
+
+        # Page vide atteinte par un lien « précédent » : rien avant
+        if not self.lignes:
+            self.a_precedente = self.a_suivante = False
+
+    # ---- Accès depuis les gabarits ----
+
+    def __iter__(self):
+        return iter(self.lignes)
+
+    def __len__(self):
+        return len(self.lignes)
+
+    def __bool__(self):
+        return bool(self.lignes)
+
+    @property
+    def pagine(self):
+        """Vrai s'il existe au moins une autre page"""
+        return self.a_precedente or self.a_suivante
+
+    @property
+    def url_suivante(self):
+        """Query string de la page suivante (filtres conservés)"""
+        if not self.a_suivante:
+            return ''
+        return self._url('apres', self._cle(self.lignes[-1]))
+
+    @property
+    def url_precedente(self):
+        """Query string de la page précédente (filtres conservés)"""
+        if not self.a_precedente:
+            return ''
+        return self._url('avant', self._cle(self.lignes[0]))
+
+    # ---- Clé de tri ----
+
+    def _tri(self, inverse=False):
+        """Expressions order_by : NULL en dernier (en premier à l'envers)"""
+        tri = []
+        for champ, descendant in zip(self.champs, self.descendants):
+            nulls = {'nulls_first': True} if inverse else {'nulls_last': True}
+            if descendant != inverse:
+                tri.append(F(champ).desc(**nulls))
+            else:
+                tri.append(F(champ).asc(**nulls))
+        return tri
+
+    def _cle(self, objet):
+        """Valeurs de la clé de tri d'une ligne (relations select_related)"""
+        valeurs = []
+        for champ in self.champs:
+            valeur = objet
+            for attribut in champ.split('__'):
+                valeur = getattr(valeur, attribut, None) if valeur is not None else None
+            valeurs.append(valeur)
+        return valeurs
+
+    def _condition(self, cle, suivant):
+        """
+        Lignes situées après (suivant) ou avant la clé, dans l'ordre du tri :
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+        """
+        condition = Q(pk__in=[])
+        egalites = Q()
+
+        for champ, descendant, valeur in zip(self.champs, self.descendants, cle):
+            if valeur is None:
+                # NULL en fin de liste : rien après, toutes les valeurs avant
+                au_dela = Q(pk__in=[]) if suivant else Q(**{f'{champ}__isnull': False})
+                egal = Q(**{f'{champ}__isnull': True})
+            else:
+                operateur = 'lt' if descendant == suivant else 'gt'
+                au_dela = Q(**{f'{champ}__{operateur}': valeur})
+                if suivant:
+                    au_dela |= Q(**{f'{champ}__isnull': True})
+                egal = Q(**{champ: valeur})
+
+            condition |= egalites & au_dela
+            egalites &= egal
+
+        return condition
+
+    # ---- Curseur dans l'URL ----
+
+    def _url(self, parametre, cle):
+        params = self.request.GET.copy()
+        params.pop('apres', None)
+        params.pop('avant', None)
+        params[parametre] = self._encoder(cle)
+        return '?' + params.urlencode()
+
+    @staticmethod
+    def _encoder(cle):
+        # isoformat complet : les microsecondes font partie de la clé
+        # (DjangoJSONEncoder les tronque aux millisecondes)
+        valeurs = [
+            valeur.isoformat() if isinstance(valeur, (datetime.date, datetime.time))
+            else str(valeur) if isinstance(valeur, decimal.Decimal)
+            else valeur
+            for valeur in cle
+        ]
+        texte = json.dumps(valeurs, separators=(',', ':'))
+        return base64.urlsafe_b64encode(texte.encode()).decode().rstrip('=')
+
+    def _decoder(self, curseur):
+        """
+        Clé contenue dans le curseur, None si absent ou invalide
+        Chaque valeur est convertie et validée par le champ de tri (to_python) :
+        un curseur modifié à la main donne la première page, pas une erreur SQL
+        """
+        if not curseur:
+            return None
+        try:
+            texte = base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4))
+            cle = json.loads(texte)
+        except ValueError:
+            return None
+        if not isinstance(cle, list) or len(cle) != len(self.champs):
+            return None
+
+        valeurs = []
+        for champ, valeur in zip(self.champs, cle):
+            if valeur is None:
+                valeurs.append(None)
+                continue
+            if not isinstance(valeur, (str, int, float)):
+                return None
+            try:
+                valeurs.append(self._champ_modele(champ).to_python(valeur))
+            except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+                return None
+        return valeurs
+
+    def _champ_modele(self, chemin):
+        """Champ du modèle désigné par un chemin de tri ('pk', 'etudiant__nom', ...)"""
+        modele = self.modele
+        champ = None
+        for nom in chemin.split('__'):
+            if champ is not None:
+                modele = champ.related_model
+            champ = modele._meta.pk if nom == 'pk' else modele._meta.get_field(nom)
+        # Clé étrangère : valeur de la colonne visée
+        return champ.target_field if champ.is_relation and champ.many_to_one else champ
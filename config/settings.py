@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'apps.gestion_notes',
     'apps.structure_pedagogique',
     'apps.bulletins',
+    'apps.taches',
 ]
 
 MIDDLEWARE = [
@@ -63,6 +64,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.gestion_academique.context_processors.annees_academiques',
             ],
         },
     },
@@ -90,6 +92,43 @@ else:
         }
     }
 
+# Cache partagé entre les processus (workers gunicorn, commandes)
+# CACHE_BACKEND : locmem (propre à chaque processus), fichier, base
+# (table créée par « manage.py createcachetable »), redis ou memcached
+# CACHE_LOCATION remplace l'emplacement par défaut du backend
+BACKENDS_CACHE = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'uganc'),
+    'fichier': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, 'cache')),
+    'base': ('django.core.cache.backends.db.DatabaseCache', 'cache_uganc'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+if CACHE_BACKEND not in BACKENDS_CACHE:
+    raise ValueError(f"CACHE_BACKEND inconnu : {CACHE_BACKEND} ({', '.join(BACKENDS_CACHE)})")
+if not DEBUG and CACHE_BACKEND == 'locmem':
+    # En production le web et le worker sont des processus distincts : un cache
+    # propre à chaque processus ne verrait pas les invalidations des autres
+    raise ValueError("CACHE_BACKEND=locmem interdit en production (DEBUG=False) : utilisez base, redis ou memcached")
+
+CACHES = {
+    'default': {
+        'BACKEND': BACKENDS_CACHE[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=BACKENDS_CACHE[CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'uganc',
+        'TIMEOUT': 300,
+    },
+    # Analyses des imports en attente de confirmation : toujours en base, la
+    # confirmation peut être reçue par un autre processus que l'envoi du fichier
+    'imports': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_uganc_imports',
+        'KEY_PREFIX': 'uganc',
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -116,6 +155,25 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Bulletins : nombre de processus de rendu PDF pour la génération par lots,
+# utilisé par le worker des tâches et la commande generer_bulletins
+# (les requêtes web rendent toujours dans leur propre processus)
+BULLETINS_PROCESSUS = config('BULLETINS_PROCESSUS', default=os.cpu_count() or 1, cast=int)
+
+# Import des étudiants : threads de hachage des mots de passe initiaux, dans
+# le worker des tâches (tâche mots_de_passe_etudiants, jamais dans une requête web)
+# PBKDF2 libère le GIL ; 1 = hachage dans le thread du worker
+IMPORT_THREADS_HACHAGE = config('IMPORT_THREADS_HACHAGE', default=os.cpu_count() or 1, cast=int)
+
+# Import des notes : processus de lecture des feuilles d'un classeur Excel,
+# utilisé par la commande importer_notes (l'import depuis la page web lit
+# toujours dans le processus de la requête)
+IMPORT_NOTES_PROCESSUS = config('IMPORT_NOTES_PROCESSUS', default=os.cpu_count() or 1, cast=int)
+
+# Feuille de notes saisie en une fois : 4 champs par étudiant
+# (la limite par défaut de 1000 champs bloquerait les classes de plus de 250 étudiants)
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
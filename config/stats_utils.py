@@ -0,0 +1,76 @@
+# config/stats_utils.py
+"""
+Statistiques des pages de liste (répartition par statut)
+Tous les compteurs d'un QuerySet filtré en une seule requête agrégée
+au lieu d'un .count() par statut
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Count, Q
+
+from config.cache_utils import PREFIXE, versions
+
+# Durée des compteurs mis en cache (filet de sécurité si une écriture échappe aux invalidations)
+DUREE_CACHE_STATS = 600
+
+
+def compter_par_valeur(queryset, champ, valeurs, total='total', distincts=None):
+    """
+    Compte les lignes du QuerySet par valeur d'un champ, en une requête
+    (COUNT(...) FILTER (WHERE ...) sous PostgreSQL, CASE sous SQLite)
+
+    Args:
+        queryset: QuerySet déjà filtré
+        champ: Champ (ou chemin de relation) comparé, ex : 'statut', 'niveau__code'
+        valeurs: {clé du résultat: valeur du champ}, ex : {'diplomes': 'diplome'}
+        total: Clé du nombre total de lignes (None = pas de total)
+        distincts: {clé du résultat: champ} comptés sans doublons, ex : {'total_etudiants': 'etudiant'}
+
+    Returns:
+        dict: {clé: nombre}
+    """
+    agregats = {
+        cle: Count('pk', filter=Q(**{champ: valeur}))
+        for cle, valeur in valeurs.items()
+    }
+    if total:
+        agregats[total] = Count('pk')
+    for cle, champ_distinct in (distincts or {}).items():
+        agregats[cle] = Count(champ_distinct, distinct=True)
+
+    return queryset.order_by().aggregate(**agregats)
+
+
+def compter_statuts(queryset, statuts, total='total', distincts=None):
+    """Répartition par 'statut' : {statut: nombre} (voir compter_par_valeur)"""
+    return compter_par_valeur(
+        queryset, 'statut', {statut: statut for statut in statuts}, total, distincts
+    )
+
+
+def compter_en_cache(queryset, champ, valeurs, dependance, total='total'):
+    """
+    compter_par_valeur mis en cache : la clé contient la requête SQL du
+    QuerySet (filtres compris) et la génération `dependance` du cache, changée
+    à chaque écriture des lignes comptées (ex : TableauBordService.PREFIXE_CLE
+    pour les étudiants) ; les pages suivantes d'une liste ne recomptent pas
+
+    Returns:
+        dict: {clé: nombre}
+    """
+    try:
+        requete = str(queryset.order_by().query)
+    except EmptyResultSet:
+        return compter_par_valeur(queryset, champ, valeurs, total)
+
+    generation, = versions((dependance, None))
+    empreinte = hashlib.md5(f'{requete}|{champ}|{sorted(valeurs.items())}|{total}'.encode()).hexdigest()
+    cle = f'{PREFIXE}:stats:{dependance}:{generation}:{empreinte}'
+
+    compteurs = cache.get(cle)
+    if compteurs is None:
+        compteurs = compter_par_valeur(queryset, champ, valeurs, total)
+        cache.set(cle, compteurs, DUREE_CACHE_STATS)
+    return compteurs
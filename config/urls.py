@@ -19,6 +19,7 @@ urlpatterns = [
     path('notes/', include('apps.gestion_notes.urls')),
     path('structure/', include('apps.structure_pedagogique.urls')),
     path('bulletins/', include('apps.bulletins.urls')),
+    path('taches/', include('apps.taches.urls')),
 ]
 
 # Servir les fichiers media en développement